@@ -0,0 +1,201 @@
+"""Micro-benchmark các handler lệnh (bot.py và các cog), chạy hoàn toàn offline.
+
+Các handler được gọi trực tiếp với Context/Guild/Member giả lập ở nhiều quy mô
+(số thành viên của guild đang gọi lệnh x số guild của bot). Mỗi trường hợp ghi
+lại thời gian mỗi lần gọi và bộ nhớ cấp phát (đỉnh tracemalloc), có thể lưu
+làm baseline rồi so sánh ở lần chạy sau.
+
+Ví dụ::
+
+    python -m benchmarks.bench_commands --members 10,100000 --guilds 1,10000 --save baseline.json
+    python -m benchmarks.bench_commands --members 10,100000 --guilds 1,10000 --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# bot.py đọc cấu hình lúc import, nên đặt giá trị giả trước
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark-token')
+os.environ.setdefault('OWNER_ID', '1')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'bot-benchmark.log'))
+os.environ.setdefault('STATS_DB', os.path.join(tempfile.gettempdir(), 'bot-benchmark-metrics.db'))
+
+import logging  # noqa: E402
+
+from discord.ext import commands  # noqa: E402
+
+import bot as bot_module  # noqa: E402
+from core import config  # noqa: E402
+from benchmarks.fakes import FakeContext, FakeGuild, FakeMember, FakeUser  # noqa: E402
+
+
+class FakeWebSocket:
+    latency = 0.042
+
+
+def install_scenario(members, guilds):
+    """Đưa các guild giả vào cache của bot và trả về Context cho guild đầu tiên."""
+    bot = bot_module.bot
+    home = FakeGuild(1, members)
+    others = [FakeGuild(i, members, cached_members=False) for i in range(2, guilds + 1)]
+
+    state = bot._connection
+    state._guilds = {g.id: g for g in [home] + others}
+    state.user = FakeUser(999, name='bench-bot', bot=True)
+    bot.ws = FakeWebSocket()
+    bot_module.member_stats.seed(bot.guilds)
+    bot_module.guild_index.seed(bot_module.GuildEntry.from_guild(g) for g in bot.guilds)
+    # Đo đường trả lời lỗi đầy đủ thay vì đường bị gộp
+    bot_module.error_throttle.user_window = bot_module.error_throttle.channel_window = 0
+
+    owner = FakeMember(config.OWNER_ID, home, home.roles[:5], name='owner')
+    return home, owner
+
+
+def build_cases(home, owner):
+    bot = bot_module.bot
+
+    def invoke(name, *args):
+        command = bot.get_command(name)
+
+        async def run():
+            ctx = FakeContext(owner, home, command=command)
+            await command(ctx, *args)
+        return run
+
+    errors = bot.get_cog('Errors')
+
+    def error(exc):
+        async def run():
+            ctx = FakeContext(owner, home)
+            await errors.on_command_error(ctx, exc)
+        return run
+
+    return {
+        'help': invoke('help'),
+        'userinfo': invoke('userinfo', owner),
+        'serverinfo': invoke('serverinfo'),
+        'stats': invoke('stats'),
+        'servers': invoke('servers'),
+        'memory': invoke('memory'),
+        'on_command_error[not_found]': error(commands.CommandNotFound('Command "foo" is not found')),
+        'on_command_error[other]': error(commands.CommandError('boom')),
+    }
+
+
+async def measure(run, min_time, max_iterations, alloc_iterations):
+    await run()  # warmup
+
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_iterations and (time.perf_counter() < deadline or len(timings) < 3):
+        started = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await run()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'iterations': len(timings),
+        'mean_us': sum(timings) / len(timings) * 1e6,
+        'min_us': timings[0] * 1e6,
+        'p95_us': timings[min(int(0.95 * len(timings)), len(timings) - 1)] * 1e6,
+        'peak_alloc_bytes': max(peaks) if peaks else 0,
+    }
+
+
+async def run_benchmarks(args):
+    for extension in bot_module.EXTENSIONS:
+        await bot_module.bot.load_extension(extension)
+
+    results = {}
+    for guilds in args.guilds:
+        for members in args.members:
+            home, owner = install_scenario(members, guilds)
+            for name, run in build_cases(home, owner).items():
+                if args.only and name.split('[')[0] not in args.only:
+                    continue
+                key = f'{name} members={members} guilds={guilds}'
+                results[key] = await measure(run, args.min_time, args.max_iterations, args.alloc_iterations)
+                print_row(key, results[key])
+    return results
+
+
+def print_row(key, result):
+    line = (
+        f"{key:<55} {result['mean_us']:>12.1f}µs  p95 {result['p95_us']:>12.1f}µs  "
+        f"alloc {result['peak_alloc_bytes'] / 1024:>10.1f}KiB  n={result['iterations']}"
+    )
+    print(line)
+
+
+def compare(results, baseline, threshold):
+    """In so sánh với baseline, trả về danh sách trường hợp chậm hơn ngưỡng."""
+    regressions = []
+    print('\nSo sánh với baseline:')
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result['mean_us'] / baseline[key]['mean_us']
+        marker = '⚠️ ' if ratio > 1 + threshold else '   '
+        print(f"{marker}{key:<55} {baseline[key]['mean_us']:>12.1f}µs → {result['mean_us']:>12.1f}µs ({ratio:.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return regressions
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark offline các handler lệnh của bot')
+    parser.add_argument('--members', type=int_list, default=[10, 100_000], help='số thành viên của guild gọi lệnh')
+    parser.add_argument('--guilds', type=int_list, default=[1, 10_000], help='số guild bot đang ở')
+    parser.add_argument('--only', type=lambda v: v.split(','), default=None, help='chỉ chạy các lệnh này')
+    parser.add_argument('--min-time', type=float, default=0.5, help='số giây tối thiểu đo mỗi trường hợp')
+    parser.add_argument('--max-iterations', type=int, default=10_000)
+    parser.add_argument('--alloc-iterations', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help='lưu kết quả làm baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='so sánh với baseline đã lưu')
+    parser.add_argument('--threshold', type=float, default=0.10, help='tỉ lệ chậm đi bị coi là regression')
+    args = parser.parse_args(argv)
+
+    # Log của handler không phải thứ cần đo
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = asyncio.run(run_benchmarks(args))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f'\nĐã lưu baseline vào {args.save}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} trường hợp chậm hơn baseline quá {args.threshold:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
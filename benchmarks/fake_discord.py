@@ -0,0 +1,832 @@
+"""Discord giả lập (gateway + REST) để load test bot.py trên một máy, không cần Discord thật.
+
+Server phát READY/GUILD_CREATE cho số guild tùy chọn, trả lời yêu cầu chunk
+member bằng GUILD_MEMBERS_CHUNK và sinh MESSAGE_CREATE (tin nhắn thường lẫn
+lệnh) theo tốc độ cấu hình. Phía REST có độ trễ giả lập, bucket rate limit
+theo route, giới hạn global và 429 ngẫu nhiên. Mỗi lệnh được ghi thời điểm
+gửi, khi bot trả lời vào kênh đó thì tính độ trễ end-to-end.
+
+Ví dụ (tự chạy bot.py trỏ vào server giả lập trong 60 giây)::
+
+    python -m benchmarks.fake_discord --guilds 2000 --members 300 --big-guilds 2 --big-members 500000 \\
+        --message-rate 500 --command-ratio 0.1 --duration 60 --run-bot
+
+    # Owner gọi stats ở giây 10 và broadcast ở giây 20, có reconnect mỗi 30 giây
+    python -m benchmarks.fake_discord --guilds 500 --script "10:stats,20:broadcast Xin chào" \\
+        --reconnect-every 30 --duration 60 --run-bot --save report.json
+
+Chạy bot riêng thì đặt ``DISCORD_API_BASE``/``DISCORD_GATEWAY_URL`` như server in ra
+lúc khởi động, ``OWNER_ID`` bằng ``--owner-id`` và ``BOT_PREFIX`` bằng ``--prefix``.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter, deque
+
+from aiohttp import WSMsgType, web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.metrics import Histogram  # noqa: E402
+
+DISCORD_EPOCH_MS = 1420070400000
+BOT_ID = 500000000000000001
+OWNER_ID = 400000000000000000
+LARGE_THRESHOLD = 250
+CHUNK_SIZE = 1000
+
+# Intents bot gửi trong IDENTIFY
+GUILD_MESSAGES = 1 << 9
+MESSAGE_CONTENT = 1 << 15
+
+# VIEW_CHANNEL | SEND_MESSAGES | EMBED_LINKS | ATTACH_FILES | READ_MESSAGE_HISTORY | ADD_REACTIONS
+EVERYONE_PERMISSIONS = (1 << 10) | (1 << 11) | (1 << 14) | (1 << 15) | (1 << 16) | (1 << 6)
+
+# Lệnh owner được gửi bởi --owner-id trong guild đầu tiên
+OWNER_COMMANDS = {
+    'env', 'reloadenv', 'helpp', 'reload', 'servers', 'leave', 'status', 'stats',
+    'metrics', 'http', 'memory', 'broadcast', 'jobs', 'cancel'
+}
+
+CHATTER = ('hello', 'gg', 'ai online không', 'lol', 'ok', 'chiều nay chơi không', '👍', 'brb')
+
+JOINED_AT = '2023-01-01T00:00:00+00:00'
+
+_last_snowflake = 0
+
+
+def snowflake():
+    global _last_snowflake
+    value = (int(time.time() * 1000) - DISCORD_EPOCH_MS) << 22
+    _last_snowflake = max(value, _last_snowflake + 1)
+    return _last_snowflake
+
+
+def guild_id(index):
+    # Phần thời gian của snowflake (bit 22 trở lên) quyết định shard, nên tăng theo index để guild chia đều các shard
+    return 100000000000000000 + (index << 22)
+
+
+def channel_id(index, channel):
+    return 200000000000000000 + index * 100 + channel
+
+
+def role_id(index, role):
+    # Role @everyone có ID trùng với guild
+    return guild_id(index) if role == 0 else 300000000000000000 + index * 100 + role
+
+
+def member_id(index, member):
+    return 400000000000000000 + (index + 1) * 10_000_000 + member
+
+
+def guild_index(snowflake_id):
+    return (int(snowflake_id) - 100000000000000000) >> 22
+
+
+def channel_guild(snowflake_id):
+    return (int(snowflake_id) - 200000000000000000) // 100
+
+
+def user_payload(user_id, name, bot=False):
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': None, 'avatar': None, 'bot': bot}
+
+
+def member_payload(user):
+    return {'user': user, 'roles': [], 'joined_at': JOINED_AT, 'deaf': False, 'mute': False, 'flags': 0}
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        if item.strip():
+            name, _, weight = item.partition('=')
+            mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_script(value):
+    """``"10:stats,20:broadcast Xin chào"`` -> [(10.0, 'stats'), (20.0, 'broadcast Xin chào')]."""
+    steps = []
+    for item in value.split(','):
+        if item.strip():
+            at, _, command = item.partition(':')
+            steps.append((float(at), command.strip()))
+    return sorted(steps)
+
+
+class FakeGuild:
+    __slots__ = ('index', 'id', 'member_count', 'channels', 'roles', 'shard')
+
+    def __init__(self, index, member_count, channels, roles, shard_count):
+        self.index = index
+        self.id = guild_id(index)
+        self.member_count = member_count
+        self.channels = channels
+        self.roles = roles
+        self.shard = (self.id >> 22) % shard_count
+
+    @property
+    def large(self):
+        return self.member_count > LARGE_THRESHOLD
+
+    def member(self, i):
+        if self.index == 0 and i == 0:
+            return member_payload(user_payload(OWNER_ID, 'owner'))
+        # Khoảng 5% thành viên là bot
+        return member_payload(user_payload(member_id(self.index, i), f'user{i}', bot=i % 20 == 19))
+
+    def bot_member(self):
+        return member_payload(user_payload(BOT_ID, 'load-test-bot', bot=True))
+
+    def channel(self, c):
+        return {
+            'id': str(channel_id(self.index, c)), 'guild_id': str(self.id), 'type': 0, 'name': f'kenh-{c}',
+            'position': c, 'permission_overwrites': [], 'parent_id': None, 'nsfw': False, 'topic': None,
+            'rate_limit_per_user': 0, 'last_message_id': None
+        }
+
+    def payload(self):
+        roles = [
+            {
+                'id': str(role_id(self.index, r)), 'name': '@everyone' if r == 0 else f'role-{r}',
+                'permissions': str(EVERYONE_PERMISSIONS if r == 0 else 0), 'position': r, 'color': 0,
+                'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0
+            }
+            for r in range(self.roles)
+        ]
+        # Guild lớn chỉ gửi kèm chính bot, phần còn lại bot phải chunk (giống Discord)
+        members = [self.bot_member()]
+        if not self.large:
+            members += [self.member(i) for i in range(self.member_count)]
+        return {
+            'id': str(self.id), 'name': f'Load test {self.index}', 'icon': None, 'splash': None,
+            'discovery_splash': None, 'owner_id': str(member_id(self.index, 0)), 'afk_channel_id': None,
+            'afk_timeout': 300, 'verification_level': 1, 'default_message_notifications': 0,
+            'explicit_content_filter': 0, 'roles': roles, 'emojis': [], 'stickers': [], 'features': [],
+            'mfa_level': 0, 'system_channel_id': str(channel_id(self.index, 0)), 'system_channel_flags': 0,
+            'rules_channel_id': None, 'vanity_url_code': None, 'description': None, 'banner': None,
+            'premium_tier': 0, 'premium_subscription_count': 0, 'preferred_locale': 'vi',
+            'public_updates_channel_id': None, 'nsfw_level': 0, 'premium_progress_bar_enabled': False,
+            'joined_at': JOINED_AT, 'large': self.large, 'unavailable': False,
+            # Bot là thành viên thêm ngoài member_count người dùng, nếu không discord.py coi guild chưa chunk xong
+            'member_count': self.member_count + 1,
+            'voice_states': [], 'members': members, 'channels': [self.channel(c) for c in range(self.channels)],
+            'threads': [], 'presences': [], 'stage_instances': [], 'guild_scheduled_events': []
+        }
+
+
+class Connection:
+    """Một kết nối websocket gateway, nén zlib-stream nếu bot yêu cầu."""
+
+    def __init__(self, server, ws, compress):
+        self.server = server
+        self.ws = ws
+        self.compressor = zlib.compressobj() if compress else None
+        self.session = None
+
+    async def send(self, payload):
+        data = json.dumps(payload, separators=(',', ':'))
+        stats = self.server.stats
+        if self.compressor is not None:
+            raw = self.compressor.compress(data.encode()) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            stats['gateway_bytes'] += len(raw)
+            await self.ws.send_bytes(raw)
+        else:
+            stats['gateway_bytes'] += len(data)
+            await self.ws.send_str(data)
+
+
+class Session:
+    def __init__(self, session_id, shard_id, intents, guilds):
+        self.id = session_id
+        self.shard_id = shard_id
+        self.intents = intents
+        self.guilds = guilds
+        self.seq = 0
+        self.connection = None
+        self.identified_at = time.perf_counter()
+        self.ready_at = None  # lúc gửi xong GUILD_CREATE cuối cùng
+        self.traffic = None
+
+    async def dispatch(self, event, data):
+        if self.connection is None:
+            return False
+        self.seq += 1
+        self.connection.server.events[event] += 1
+        try:
+            await self.connection.send({'op': 0, 't': event, 's': self.seq, 'd': data})
+        except ConnectionError:
+            return False
+        return True
+
+
+class FakeDiscord:
+    def __init__(self, args):
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        # Kịch bản chạy một lần cho cả buổi test (không lặp lại khi bot identify lại sau khi khởi động lại)
+        self.script = parse_script(args.script)
+        self.script_started = None
+        self.guilds = {}
+        for index in range(args.guilds):
+            members = args.big_members if index < args.big_guilds else args.members
+            self.guilds[guild_id(index)] = FakeGuild(index, members, args.channels, args.roles, args.shards)
+        self.sessions = {}
+        self.connections = set()
+        self.started = time.perf_counter()
+        self.stats = Counter()
+        self.events = Counter()
+        self.rest = Counter()
+        self.rate_limited = Counter()
+        self.latency = {}  # lệnh -> Histogram độ trễ end-to-end
+        self.pending = {}  # channel_id -> deque[(thời điểm gửi, lệnh)]
+        self.other_sends = deque()  # thời điểm các tin nhắn bot tự gửi (broadcast...)
+        self.startup = {}
+        self.reconnect_started = {}
+        self.reconnects = []
+        self._buckets = {}
+        self._global = deque()
+
+    @property
+    def base_url(self):
+        return f'http://{self.args.host}:{self.args.port}'
+
+    @property
+    def api_base(self):
+        return f'{self.base_url}/api/v10'
+
+    @property
+    def gateway_url(self):
+        return f'ws://{self.args.host}:{self.args.port}/gateway'
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    # Gateway
+
+    async def handle_gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        connection = Connection(self, ws, request.query.get('compress') == 'zlib-stream')
+        self.connections.add(connection)
+        self.stats['gateway_connections'] += 1
+        await connection.send({'op': 10, 'd': {'heartbeat_interval': self.args.heartbeat_ms}, 's': None, 't': None})
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(message.data)
+                await self.handle_op(connection, payload['op'], payload.get('d'))
+        finally:
+            self.connections.discard(connection)
+            if connection.session is not None and connection.session.connection is connection:
+                connection.session.connection = None
+        return ws
+
+    async def handle_op(self, connection, op, data):
+        if op == 1:
+            await connection.send({'op': 11, 'd': None, 's': None, 't': None})
+        elif op == 2:
+            await self.identify(connection, data)
+        elif op == 3:
+            self.stats['presence_updates'] += 1
+        elif op == 6:
+            await self.resume(connection, data)
+        elif op == 8:
+            self.stats['chunk_requests'] += 1
+            asyncio.create_task(self.send_chunks(connection.session, data))
+        else:
+            self.stats[f'op_{op}'] += 1
+
+    async def identify(self, connection, data):
+        shard_id, shard_count = data.get('shard') or (0, 1)
+        if shard_count != self.args.shards:
+            await connection.ws.close(code=4010)  # Invalid shard
+            return
+        guilds = [g for g in self.guilds.values() if g.shard == shard_id]
+        session = Session(f'fake-{shard_id}-{snowflake()}', shard_id, data.get('intents', 0), guilds)
+        session.connection = connection
+        connection.session = session
+        self.sessions[session.id] = session
+        self.startup.setdefault(f'shard {shard_id} identify_s', round(self.elapsed(), 3))
+        await session.dispatch('READY', {
+            'v': 10, 'user': user_payload(BOT_ID, 'load-test-bot', bot=True), 'private_channels': [],
+            'guilds': [{'id': str(g.id), 'unavailable': True} for g in guilds], 'session_id': session.id,
+            'resume_gateway_url': self.gateway_url, 'shard': [shard_id, shard_count],
+            'application': {'id': str(BOT_ID), 'flags': 0}
+        })
+        asyncio.create_task(self.send_guild_creates(session))
+
+    async def send_guild_creates(self, session):
+        for i, guild in enumerate(session.guilds):
+            if guild.id not in self.guilds:
+                continue
+            await session.dispatch('GUILD_CREATE', guild.payload())
+            if i % 100 == 99:
+                await asyncio.sleep(0)
+        session.ready_at = time.perf_counter()
+        self.startup.setdefault(
+            f'shard {session.shard_id} guild_create_s', round(session.ready_at - session.identified_at, 3)
+        )
+        # discord.py chờ hết guild_ready_timeout sau GUILD_CREATE cuối mới phát on_ready
+        await asyncio.sleep(self.args.warmup)
+        session.traffic = asyncio.create_task(self.generate_traffic(session))
+
+    async def resume(self, connection, data):
+        session = self.sessions.get(data.get('session_id'))
+        if session is None:
+            await connection.send({'op': 9, 'd': False, 's': None, 't': None})
+            return
+        session.connection = connection
+        connection.session = session
+        self.stats['resumes'] += 1
+        started = self.reconnect_started.pop(session.id, None)
+        if started is not None:
+            self.reconnects.append(time.perf_counter() - started)
+        await session.dispatch('RESUMED', {})
+
+    async def send_chunks(self, session, data):
+        if session is None:
+            return
+        ids = data['guild_id'] if isinstance(data['guild_id'], list) else [data['guild_id']]
+        for gid in ids:
+            guild = self.guilds.get(int(gid))
+            if guild is None:
+                continue
+            if data.get('user_ids'):
+                wanted = [int(u) for u in data['user_ids']]
+                members = [guild.member(u - member_id(guild.index, 0)) for u in wanted
+                           if 0 <= u - member_id(guild.index, 0) < guild.member_count]
+                batches = [members]
+            elif data.get('query'):
+                batches = [[]]
+            else:
+                limit = data.get('limit') or guild.member_count
+                count = min(limit, guild.member_count)
+                batches = [range(start, min(start + CHUNK_SIZE, count)) for start in range(0, count, CHUNK_SIZE)] or [[]]
+            for index, batch in enumerate(batches):
+                members = [guild.member(i) if isinstance(i, int) else i for i in batch]
+                sent = await session.dispatch('GUILD_MEMBERS_CHUNK', {
+                    'guild_id': str(guild.id), 'members': members, 'chunk_index': index,
+                    'chunk_count': len(batches), 'nonce': data.get('nonce'), 'not_found': []
+                })
+                if not sent:
+                    return
+                self.stats['chunk_members'] += len(members)
+                await asyncio.sleep(0)
+        self.startup[f'shard {session.shard_id} last_chunk_s'] = round(self.elapsed(), 3)
+
+    # Sinh tin nhắn
+
+    def message_payload(self, guild, channel, author, content):
+        return {
+            'id': str(snowflake()), 'channel_id': str(channel), 'guild_id': str(guild.id),
+            'author': author['user'], 'member': {k: v for k, v in author.items() if k != 'user'},
+            'content': content, 'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [],
+            'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0
+        }
+
+    async def send_message(self, session, guild, content, author=None, command=None):
+        if not session.intents & GUILD_MESSAGES:
+            # Bot không xin intent tin nhắn server: Discord không gửi gì cả
+            self.stats['messages_filtered'] += 1
+            return
+        if author is None:
+            author = guild.member(random.randrange(1, guild.member_count) if guild.member_count > 1 else 0)
+        channel = channel_id(guild.index, random.randrange(guild.channels))
+        visible = content if session.intents & MESSAGE_CONTENT else ''
+        if await session.dispatch('MESSAGE_CREATE', self.message_payload(guild, channel, author, visible)):
+            self.stats['messages_sent'] += 1
+            if command is not None and visible:
+                self.stats['commands_sent'] += 1
+                self.pending.setdefault(channel, deque()).append((time.perf_counter(), command))
+
+    async def generate_traffic(self, session):
+        guilds = [g for g in session.guilds if g.id in self.guilds]
+        if not guilds:
+            return
+        rate = self.args.message_rate * len(guilds) / max(len(self.guilds), 1)
+        names, weights = list(self.mix), list(self.mix.values())
+        owner_guild = self.guilds.get(guild_id(0))
+        owner = owner_guild.member(0) if owner_guild is not None else None
+        script = self.script if session.shard_id == owner_guild.shard else []
+        started = time.perf_counter()
+        if script and self.script_started is None:
+            self.script_started = started
+        budget = 0.0
+        last = started
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            budget += (now - last) * rate
+            last = now
+            while script and now - self.script_started >= script[0][0]:
+                _, command = script.pop(0)
+                await self.send_message(session, owner_guild, self.args.prefix + command, owner, command.split()[0])
+            while budget >= 1:
+                budget -= 1
+                guild = random.choice(guilds)
+                if random.random() < self.args.command_ratio and names:
+                    name = random.choices(names, weights)[0]
+                    if name in OWNER_COMMANDS:
+                        if owner is not None:
+                            await self.send_message(session, owner_guild, self.args.prefix + name, owner, name)
+                        continue
+                    await self.send_message(session, guild, self.args.prefix + name, command=name)
+                else:
+                    await self.send_message(session, guild, random.choice(CHATTER))
+
+    async def reconnect_loop(self):
+        while True:
+            await asyncio.sleep(self.args.reconnect_every)
+            for session in list(self.sessions.values()):
+                if session.connection is None:
+                    continue
+                self.reconnect_started[session.id] = time.perf_counter()
+                self.stats['reconnects_requested'] += 1
+                try:
+                    await session.connection.send({'op': 7, 'd': None, 's': None, 't': None})
+                except ConnectionError:
+                    pass
+
+    # REST
+
+    def _route(self, request):
+        resource = request.match_info.route.resource
+        path = resource.canonical if resource is not None else request.path
+        return f'{request.method} {path[len("/api/v10"):]}'
+
+    def _rate_limit(self, route, major):
+        """Trả về (scope, retry_after) nếu request bị 429, ngược lại (None, headers bucket)."""
+        now = time.perf_counter()
+        args = self.args
+        if args.global_rate:
+            while self._global and now - self._global[0] > 1.0:
+                self._global.popleft()
+            if len(self._global) >= args.global_rate:
+                return 'global', 1.0 - (now - self._global[0])
+            self._global.append(now)
+        if args.error_rate and random.random() < args.error_rate:
+            return 'shared', round(random.uniform(0.1, 1.0), 3)
+        if not args.bucket_limit:
+            return None, {}
+        key = (route, major)
+        window = self._buckets.get(key)
+        if window is None or now - window[0] >= args.bucket_window:
+            window = self._buckets[key] = [now, 0]
+        reset_after = args.bucket_window - (now - window[0])
+        if window[1] >= args.bucket_limit:
+            return 'user', reset_after
+        window[1] += 1
+        return None, {
+            'X-RateLimit-Limit': str(args.bucket_limit),
+            'X-RateLimit-Remaining': str(args.bucket_limit - window[1]),
+            'X-RateLimit-Reset-After': f'{reset_after:.3f}',
+            'X-RateLimit-Bucket': f'{abs(hash(route)):x}',
+        }
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if not request.path.startswith('/api/'):
+            return await handler(request)
+        route = self._route(request)
+        self.rest[route] += 1
+        if self.args.latency_ms:
+            await asyncio.sleep(max(random.gauss(self.args.latency_ms, self.args.jitter_ms), 0) / 1000)
+        major = request.match_info.get('channel_id') or request.match_info.get('guild_id')
+        scope, extra = self._rate_limit(route, major)
+        if scope is not None:
+            self.rate_limited[scope] += 1
+            retry_after = round(max(extra, 0.001), 3)
+            headers = {
+                'Via': '1.1 google', 'Retry-After': str(max(int(retry_after), 1)), 'X-RateLimit-Scope': scope,
+                'X-RateLimit-Limit': str(self.args.bucket_limit or 1), 'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Reset-After': f'{retry_after:.3f}',
+            }
+            if scope == 'global':
+                headers['X-RateLimit-Global'] = 'true'
+            body = {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': scope == 'global'}
+            return web.json_response(body, status=429, headers=headers, content_type='application/json')
+        try:
+            response = await handler(request)
+        except ConnectionResetError:
+            # Bot ngắt kết nối giữa chừng (đang tắt/khởi động lại): không ai nhận phản hồi, chỉ đếm lại
+            self.stats['client_disconnects'] += 1
+            return web.Response(status=499)
+        response.headers.update(extra)
+        return response
+
+    @staticmethod
+    def json(data, status=200):
+        # discord.py chỉ parse JSON khi content-type đúng là application/json (không kèm charset)
+        return web.Response(body=json.dumps(data).encode(), status=status, headers={'Content-Type': 'application/json'})
+
+    async def get_gateway(self, request):
+        return self.json({'url': self.gateway_url})
+
+    async def get_gateway_bot(self, request):
+        return self.json({
+            'url': self.gateway_url, 'shards': self.args.shards,
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 16}
+        })
+
+    async def get_me(self, request):
+        return self.json(user_payload(BOT_ID, 'load-test-bot', bot=True))
+
+    async def get_application(self, request):
+        return self.json({
+            'id': str(BOT_ID), 'name': 'load-test-bot', 'icon': None, 'description': '', 'bot_public': False,
+            'bot_require_code_grant': False, 'owner': user_payload(OWNER_ID, 'owner'), 'team': None,
+            'verify_key': '0' * 64, 'flags': 0, 'summary': '', 'rpc_origins': []
+        })
+
+    async def get_user(self, request):
+        user = int(request.match_info['user_id'])
+        return self.json(user_payload(user, f'user{user % 10_000_000}'))
+
+    async def get_channel(self, request):
+        channel = int(request.match_info['channel_id'])
+        guild = self.guilds.get(guild_id(channel_guild(channel)))
+        if guild is None:
+            return self.json({'message': 'Unknown Channel', 'code': 10003}, status=404)
+        return self.json(guild.channel(channel % 100))
+
+    async def create_message(self, request):
+        channel = int(request.match_info['channel_id'])
+        payload = await request.json() if request.content_type == 'application/json' else {}
+        now = time.perf_counter()
+        queue = self.pending.get(channel)
+        if queue:
+            sent_at, command = queue.popleft()
+            histogram = self.latency.get(command)
+            if histogram is None:
+                histogram = self.latency[command] = Histogram()
+            histogram.observe(now - sent_at)
+            self.stats['replies'] += 1
+            if 'first_reply_s' not in self.startup:
+                self.startup['first_reply_s'] = round(self.elapsed(), 3)
+        else:
+            self.other_sends.append(now)
+            self.stats['other_sends'] += 1
+        guild = self.guilds.get(guild_id(channel_guild(channel)))
+        message = {
+            'id': str(snowflake()), 'channel_id': str(channel), 'author': user_payload(BOT_ID, 'load-test-bot', bot=True),
+            'content': payload.get('content') or '', 'embeds': payload.get('embeds') or [],
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'edited_timestamp': None,
+            'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+            'pinned': False, 'type': 0, 'components': payload.get('components') or []
+        }
+        if guild is not None:
+            message['guild_id'] = str(guild.id)
+        return self.json(message)
+
+    async def edit_message(self, request):
+        payload = await request.json() if request.content_type == 'application/json' else {}
+        return self.json({
+            'id': request.match_info['message_id'], 'channel_id': request.match_info['channel_id'],
+            'author': user_payload(BOT_ID, 'load-test-bot', bot=True), 'content': payload.get('content') or '',
+            'embeds': payload.get('embeds') or [], 'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [],
+            'attachments': [], 'pinned': False, 'type': 0, 'components': payload.get('components') or []
+        })
+
+    async def leave_guild(self, request):
+        guild = self.guilds.pop(int(request.match_info['guild_id']), None)
+        if guild is None:
+            return self.json({'message': 'Unknown Guild', 'code': 10004}, status=404)
+        for session in self.sessions.values():
+            if session.shard_id == guild.shard:
+                await session.dispatch('GUILD_DELETE', {'id': str(guild.id)})
+        return web.Response(status=204)
+
+    async def sync_commands(self, request):
+        commands = await request.json()
+        self.stats['command_syncs'] += 1
+        return self.json([
+            dict(command, id=str(snowflake()), application_id=str(BOT_ID), version=str(snowflake()))
+            for command in commands
+        ])
+
+    async def fallback(self, request):
+        self.stats['unhandled_routes'] += 1
+        return self.json({})
+
+    def make_app(self):
+        app = web.Application(middlewares=[self.middleware], client_max_size=64 * 1024 * 1024)
+        api = '/api/v10'
+        app.router.add_get('/gateway', self.handle_gateway)
+        app.router.add_get(f'{api}/gateway', self.get_gateway)
+        app.router.add_get(f'{api}/gateway/bot', self.get_gateway_bot)
+        app.router.add_get(f'{api}/users/@me', self.get_me)
+        app.router.add_get(f'{api}/oauth2/applications/@me', self.get_application)
+        app.router.add_get(f'{api}/users/{{user_id}}', self.get_user)
+        app.router.add_get(f'{api}/channels/{{channel_id}}', self.get_channel)
+        app.router.add_post(f'{api}/channels/{{channel_id}}/messages', self.create_message)
+        app.router.add_patch(f'{api}/channels/{{channel_id}}/messages/{{message_id}}', self.edit_message)
+        app.router.add_delete(f'{api}/users/@me/guilds/{{guild_id}}', self.leave_guild)
+        app.router.add_put(f'{api}/applications/{{application_id}}/commands', self.sync_commands)
+        app.router.add_route('*', f'{api}/{{tail:.*}}', self.fallback)
+        return app
+
+    # Báo cáo
+
+    def throughput(self, window=10.0):
+        now = time.perf_counter()
+        while self.other_sends and now - self.other_sends[0] > window:
+            self.other_sends.popleft()
+        return len(self.other_sends) / window
+
+    def progress_line(self):
+        replies = self.stats['replies']
+        all_latency = [v for h in self.latency.values() for v in h.samples]
+        all_latency.sort()
+        p = (lambda q: all_latency[min(int(q * len(all_latency)), len(all_latency) - 1)] * 1000) if all_latency else (lambda q: 0.0)
+        return (
+            f'[{self.elapsed():6.1f}s] tin nhắn {self.stats["messages_sent"]} · lệnh {self.stats["commands_sent"]} · '
+            f'trả lời {replies} (p50 {p(0.5):.0f}ms p99 {p(0.99):.0f}ms) · gửi khác {self.throughput():.1f}/s · '
+            f'429 {sum(self.rate_limited.values())} · gateway {self.stats["gateway_bytes"] / 1e6:.1f}MB'
+        )
+
+    def summary(self):
+        elapsed = self.elapsed()
+        unanswered = sum(len(queue) for queue in self.pending.values())
+        commands = {
+            name: {
+                'replies': h.count,
+                'p50_ms': round(h.percentile(0.5) * 1000, 1),
+                'p95_ms': round(h.percentile(0.95) * 1000, 1),
+                'p99_ms': round(h.percentile(0.99) * 1000, 1),
+            }
+            for name, h in sorted(self.latency.items())
+        }
+        reconnects = sorted(self.reconnects)
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'startup': self.startup,
+            'gateway': {
+                'connections': self.stats['gateway_connections'],
+                'bytes': self.stats['gateway_bytes'],
+                'events': dict(self.events.most_common()),
+                'messages_filtered_by_intents': self.stats['messages_filtered'],
+                'chunk_requests': self.stats['chunk_requests'],
+                'chunk_members': self.stats['chunk_members'],
+                'presence_updates': self.stats['presence_updates'],
+            },
+            'commands': {
+                'sent': self.stats['commands_sent'],
+                'replies': self.stats['replies'],
+                'unanswered': unanswered,
+                'replies_per_s': round(self.stats['replies'] / elapsed, 2) if elapsed else 0,
+                'by_command': commands,
+            },
+            'rest': {
+                'requests': dict(self.rest.most_common()),
+                'rate_limited': dict(self.rate_limited),
+                'other_sends': self.stats['other_sends'],
+                'command_syncs': self.stats['command_syncs'],
+                'unhandled': self.stats['unhandled_routes'],
+                'client_disconnects': self.stats['client_disconnects'],
+            },
+            'reconnects': {
+                'requested': self.stats['reconnects_requested'],
+                'resumed': self.stats['resumes'],
+                'p50_s': round(reconnects[len(reconnects) // 2], 3) if reconnects else None,
+                'max_s': round(reconnects[-1], 3) if reconnects else None,
+            },
+        }
+
+
+def start_bot(server, args, workdir):
+    env = dict(
+        os.environ,
+        DISCORD_TOKEN='fake-load-test-token',
+        OWNER_ID=str(OWNER_ID),
+        BOT_PREFIX=args.prefix,
+        DISCORD_API_BASE=server.api_base,
+        DISCORD_GATEWAY_URL=server.gateway_url,
+        STATS_DB=os.path.join(workdir, 'metrics.db'),
+        JOBS_DB=os.path.join(workdir, 'jobs.db'),
+        GUILD_SETTINGS_DB=os.path.join(workdir, 'guild_settings.db'),
+        APP_COMMANDS_HASH_FILE=os.path.join(workdir, 'app_commands.hash'),
+        LOG_FILE=os.path.join(workdir, 'bot.log'),
+        METRICS_PORT='',
+    )
+    if args.shards > 1:
+        env.update(SHARD_IDS=','.join(str(i) for i in range(args.shards)), SHARD_COUNT=str(args.shards))
+    output = open(os.path.join(workdir, 'bot.out'), 'w')
+    # Chạy trong thư mục tạm để bot không đọc .env thật của dự án
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'bot.py')], cwd=workdir, env=env, stdout=output, stderr=subprocess.STDOUT
+    )
+
+
+async def run(args):
+    server = FakeDiscord(args)
+    runner = web.AppRunner(server.make_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f'🧪 Discord giả lập: REST {server.api_base} · gateway {server.gateway_url}')
+    print(f'   {args.guilds} guild ({args.big_guilds} guild {args.big_members} thành viên), owner {OWNER_ID}')
+
+    tasks = []
+    if args.reconnect_every:
+        tasks.append(asyncio.create_task(server.reconnect_loop()))
+
+    process = None
+    if args.run_bot:
+        workdir = tempfile.mkdtemp(prefix='fake-discord-')
+        process = start_bot(server, args, workdir)
+        print(f'🤖 Đã chạy bot.py (pid {process.pid}), log trong {workdir}')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), args.report_interval)
+            except asyncio.TimeoutError:
+                pass
+            print(server.progress_line())
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if process is not None and process.poll() is not None:
+                print(f'❌ bot.py đã thoát (mã {process.returncode})')
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        for session in server.sessions.values():
+            if session.traffic is not None:
+                session.traffic.cancel()
+        if process is not None and process.poll() is None:
+            # SIGINT để bot chạy khối finally (ghi SQLite) như khi tắt thật
+            process.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(asyncio.to_thread(process.wait), 15)
+            except asyncio.TimeoutError:
+                process.kill()
+        for connection in list(server.connections):
+            await connection.ws.close()
+        await runner.cleanup()
+
+    summary = server.summary()
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f'💾 Đã lưu báo cáo vào {args.save}')
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--guilds', type=int, default=100, help='số guild')
+    parser.add_argument('--members', type=int, default=100, help='số thành viên mỗi guild')
+    parser.add_argument('--big-guilds', type=int, default=0, help='số guild lớn (đứng đầu danh sách)')
+    parser.add_argument('--big-members', type=int, default=100000, help='số thành viên mỗi guild lớn')
+    parser.add_argument('--channels', type=int, default=5, help='số kênh text mỗi guild (tối đa 99)')
+    parser.add_argument('--roles', type=int, default=5, help='số role mỗi guild, gồm @everyone (tối đa 99)')
+    parser.add_argument('--shards', type=int, default=1, help='số shard (>1 thì bot chạy AutoShardedBot)')
+    parser.add_argument('--message-rate', type=float, default=50, help='MESSAGE_CREATE mỗi giây (toàn bộ guild)')
+    parser.add_argument('--command-ratio', type=float, default=0.2, help='tỉ lệ tin nhắn là lệnh')
+    parser.add_argument('--mix', default='ping=5,help=2,userinfo=2,serverinfo=2,avatar=1,bot=1,uptime=1',
+                        help='trọng số các lệnh, lệnh owner được gửi bởi owner')
+    parser.add_argument('--script', default='', help='lệnh owner theo thời gian, ví dụ "10:stats,20:broadcast hi"')
+    parser.add_argument('--prefix', default='!')
+    parser.add_argument('--warmup', type=float, default=3.0, help='giây chờ sau GUILD_CREATE cuối trước khi sinh tin nhắn')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='độ trễ REST trung bình')
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--bucket-limit', type=int, default=5, help='request mỗi bucket (route + kênh/guild), 0 để tắt')
+    parser.add_argument('--bucket-window', type=float, default=5.0, help='giây mỗi cửa sổ bucket')
+    parser.add_argument('--global-rate', type=int, default=50, help='request/giây toàn cục trước khi trả 429 global, 0 để tắt')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='xác suất trả 429 ngẫu nhiên (scope shared)')
+    parser.add_argument('--heartbeat-ms', type=int, default=41250)
+    parser.add_argument('--reconnect-every', type=float, default=0, help='gửi op RECONNECT mỗi N giây')
+    parser.add_argument('--duration', type=float, default=0, help='dừng sau N giây (0 = tới khi Ctrl+C)')
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--run-bot', action='store_true', help='tự chạy bot.py trỏ vào server này')
+    parser.add_argument('--save', metavar='PATH', help='lưu báo cáo JSON')
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
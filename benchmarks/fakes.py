@@ -0,0 +1,134 @@
+"""Đối tượng giả lập Context/Guild/Member đủ để chạy các handler trong bot.py mà không cần Discord."""
+import datetime
+
+import discord
+
+CREATED_AT = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+        self.mention = f'<@&{role_id}>'
+
+
+class FakeUser:
+    def __init__(self, user_id, name='user', bot=False):
+        self.id = user_id
+        self.name = name
+        self.discriminator = '0001'
+        self.bot = bot
+        self.avatar = FakeAsset(f'https://cdn.example/avatars/{user_id}.png')
+        self.created_at = CREATED_AT
+        self.mention = f'<@{user_id}>'
+
+    def __str__(self):
+        return f'{self.name}#{self.discriminator}'
+
+
+class FakeMember(FakeUser):
+    def __init__(self, user_id, guild, roles, name='member', bot=False):
+        super().__init__(user_id, name=name, bot=bot)
+        self.guild = guild
+        self.roles = roles
+        self.top_role = roles[-1]
+        self.color = discord.Colour.blurple()
+        self.joined_at = CREATED_AT
+
+
+class FakeMessage:
+    def __init__(self, channel, embed=None):
+        self.channel = channel
+        self.embed = embed
+
+    async def edit(self, embed=None, **kwargs):
+        self.embed = embed
+
+
+class FakeGuild:
+    def __init__(self, guild_id, member_count, name=None, cached_members=True, bot_ratio=0.05,
+                 roles=20, text_channels=30, voice_channels=10, categories=5, emojis=50):
+        self.id = guild_id
+        self.name = name or f'Guild {guild_id}'
+        self.icon = None
+        self.preferred_locale = discord.Locale.vietnamese
+        self.created_at = CREATED_AT
+        self.verification_level = discord.VerificationLevel.medium
+        self.member_count = member_count
+        self.roles = [FakeRole(guild_id + i, '@everyone' if i == 0 else f'role-{i}') for i in range(roles)]
+        # Kênh thật nhưng không khởi tạo (đủ cho isinstance khi đếm theo loại)
+        self.text_channels = [discord.TextChannel.__new__(discord.TextChannel) for _ in range(text_channels)]
+        self.voice_channels = [discord.VoiceChannel.__new__(discord.VoiceChannel) for _ in range(voice_channels)]
+        self.categories = [discord.CategoryChannel.__new__(discord.CategoryChannel) for _ in range(categories)]
+        self.channels = self.text_channels + self.voice_channels + self.categories
+        self._channels = dict(enumerate(self.channels))
+        self._roles = {role.id: role for role in self.roles}
+        self.emojis = [object()] * emojis
+        self.system_channel = None
+
+        bots_every = max(int(1 / bot_ratio), 1) if bot_ratio else 0
+        if cached_members:
+            self.members = [
+                FakeMember(
+                    guild_id * 1_000_000 + i, self, self.roles[:3],
+                    bot=bool(bots_every) and i % bots_every == 0
+                )
+                for i in range(member_count)
+            ]
+        else:
+            self.members = []
+        self._members = {m.id: m for m in self.members}
+        self.owner = self.members[0] if self.members else FakeUser(guild_id, name='owner')
+        self.owner_id = self.owner.id
+        self.me = None
+
+    @property
+    def chunked(self):
+        return len(self._members) == self.member_count
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    async def chunk(self, cache=True):
+        return self.members
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content=None, embed=None, **kwargs):
+        self.sent += 1
+        return FakeMessage(self, embed)
+
+
+class FakeContext:
+    """Context tối giản: ``send`` chỉ giữ lại embed cuối cùng, không gọi mạng."""
+
+    def __init__(self, author, guild, command=None, channel=None):
+        self.author = author
+        self.guild = guild
+        self.channel = channel or FakeChannel()
+        self.command = command
+        self.command_failed = False
+        self.interaction = None
+        self.prefix = '?'
+        self.clean_prefix = '?'
+        self.last_embed = None
+
+    async def send(self, content=None, embed=None, **kwargs):
+        self.last_embed = embed
+        return await self.channel.send(content, embed=embed)
+
+    async def reply(self, content=None, embed=None, **kwargs):
+        return await self.send(content, embed=embed)
+
+    async def defer(self, **kwargs):
+        pass
@@ -1,661 +1,399 @@
 import discord
 from discord.ext import commands
-import datetime
 import asyncio
+import datetime
 import os
-from dotenv import load_dotenv
-
-# Load biến môi trường từ .env file
-load_dotenv()
+import signal
 
-# Lấy cấu hình từ biến môi trường
-TOKEN = os.getenv('DISCORD_TOKEN')
-OWNER_ID = int(os.getenv('OWNER_ID'))
-PREFIX = os.getenv('BOT_PREFIX', '?')  # Mặc định là '?' nếu không có trong .env
+from core import config
+from core.admission import AdmissionController
+from core.cache import RestCache
+from core.cluster import ClusterClient
+from core.cluster_ops import cluster_totals, register_ipc_handlers
+from core.counters import MemberCounters
+from core.error_throttle import ErrorReplyThrottle
+from core.guild_index import GuildEntry, GuildIndex
+from core.guild_settings import GuildSettingStore
+from core.guild_snapshot import GuildSnapshots
+from core.http_stats import HttpStats
+from core.intents import EventVolume, command_intents, enabled_flags, resolve_intents
+from core.jobs import JobManager
+from core.members import LazyMemberCache
+from core.memory import AllocationTracer, format_bytes, rss_bytes
+from core.metrics import CommandMetrics, start_metrics_server
+from core.presence import PresenceUpdater
+from core.runtime import apply_profile, describe, use_endpoints
+from core.slash import sync_app_commands
+from core.templates import EmbedTemplates
+from core.timeseries import TimeSeriesStore
+from core.watchdog import LoopWatchdog
 
 # Validate cấu hình
-if not TOKEN:
+if not config.TOKEN:
     raise ValueError("❌ DISCORD_TOKEN không được tìm thấy trong file .env")
 
-# Cấu hình intents
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
+# Các module lệnh, nạp lại được bằng lệnh reload mà không ngắt kết nối gateway
+EXTENSIONS = ('cogs.general', 'cogs.owner', 'cogs.errors')
+
+# Intents tính từ các lệnh đang bật, lệnh cần intent không được cấp sẽ bị tắt
+intents, unavailable_commands = resolve_intents(
+    config.INTENTS_MODE, command_intents(EXTENSIONS), config.DISABLED_COMMANDS
+)
+
+# Prefix riêng từng server: tra trong dict cho mỗi tin nhắn, ghi xuống SQLite theo lô
+prefix_store = GuildSettingStore(config.GUILD_SETTINGS_DB, 'guild_prefixes', 'prefix', default=config.PREFIX)
+
+# Server có thể tắt tin nhắn báo "lệnh không tồn tại"
+unknown_command_replies = GuildSettingStore(
+    config.GUILD_SETTINGS_DB, 'guild_unknown_command_replies', 'enabled', default=1, column_type='INTEGER'
+)
 
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+guild_settings = (prefix_store, unknown_command_replies)
+
+def get_prefix(bot, message):
+    prefix = prefix_store.default if message.guild is None else prefix_store.get(message.guild.id)
+    if not intents.message_content:
+        # Không có message_content thì chỉ đọc được nội dung tin nhắn mention bot (và DM)
+        return commands.when_mentioned_or(prefix)(bot, message)
+    return prefix
+
+# Connection pool HTTP theo cấu hình và số liệu rate limit theo route (đo qua aiohttp trace)
+http_stats = HttpStats(
+    limit=config.HTTP_POOL_LIMIT,
+    limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+    keepalive=config.HTTP_KEEPALIVE
+)
+
+bot_options = dict(
+    command_prefix=get_prefix,
+    intents=intents,
+    help_command=None,
+    http_trace=http_stats.trace_config(),
+    chunk_guilds_at_startup=config.MEMBER_CACHE_MODE != 'lazy' and intents.members
+)
+
+if config.SHARD_IDS:
+    bot = commands.AutoShardedBot(shard_ids=config.SHARD_IDS, shard_count=config.SHARD_COUNT, **bot_options)
+else:
+    bot = commands.Bot(**bot_options)
+
+# Kết nối IPC tới các tiến trình cluster khác (None khi chạy một tiến trình)
+cluster = None
+if config.CLUSTER_ID is not None:
+    cluster = ClusterClient(config.CLUSTER_SOCKET, int(config.CLUSTER_ID), config.SHARD_IDS, config.SHARD_COUNT)
 
 # Biến thời gian bắt đầu
 start_time = datetime.datetime.now()
 
+# Bộ đếm thành viên/bot, cập nhật theo sự kiện thay vì duyệt cache
+member_stats = MemberCounters()
+
+# Chỉ mục guild sắp xếp sẵn cho lệnh servers
+guild_index = GuildIndex()
+
+# Snapshot thông tin server cho serverinfo, bị xóa bởi các sự kiện làm nó thay đổi
+guild_snapshots = GuildSnapshots()
+
+def on_guild_chunked(guild):
+    member_stats.add_guild(guild)
+    guild_snapshots.invalidate(guild.id)
+
+# Cache member theo yêu cầu; sau khi chunk một guild thì đếm lại bot của guild đó
+member_cache = LazyMemberCache(
+    bot,
+    mode=config.MEMBER_CACHE_MODE,
+    max_guilds=config.MEMBER_CACHE_MAX_GUILDS,
+    on_chunked=on_guild_chunked
+)
+
+# Cache cho các lệnh gọi REST ít thay đổi (owner, kênh...)
+rest_cache = RestCache(bot, ttl=config.REST_CACHE_TTL)
+
+# Số liệu độ trễ/lưu lượng theo lệnh, gồm cả thời gian chờ HTTP của Discord
+command_metrics = CommandMetrics()
+command_metrics.instrument_http(bot.http)
+http_stats.instrument(bot.http)
+
+# Kiểm soát lượng lệnh nhận vào để giữ độ trễ ổn định khi bị spam
+admission = AdmissionController(
+    user=config.ADMISSION_USER,
+    guild=config.ADMISSION_GUILD,
+    global_=config.ADMISSION_GLOBAL,
+    costs=config.COMMAND_COSTS,
+    max_wait=config.ADMISSION_MAX_WAIT,
+    concurrency=config.COMMAND_CONCURRENCY,
+    queue_limit=config.ADMISSION_QUEUE_LIMIT
+)
+
+# Gộp/giới hạn tin nhắn báo lỗi để không tốn quota gửi tin khi bị spam
+error_throttle = ErrorReplyThrottle(user_window=config.ERROR_USER_WINDOW, channel_window=config.ERROR_CHANNEL_WINDOW)
+
+# Embed dựng sẵn cho các lệnh tĩnh, các cog đăng ký template khi được nạp
+embed_templates = EmbedTemplates()
+
+# Presence hiển thị số server, gom các lần thay đổi để không vượt giới hạn của Discord
+async def render_presence():
+    totals = await cluster_totals(bot)
+    return discord.Activity(
+        type=discord.ActivityType.watching,
+        name=f"{config.PREFIX}help | {totals['guilds']} servers"
+    )
+
+presence = PresenceUpdater(bot, render_presence, min_interval=config.PRESENCE_INTERVAL)
+
+# Đo độ trễ event loop, log stack của đoạn code chặn loop quá ngưỡng
+watchdog = LoopWatchdog(interval=config.LOOP_WATCHDOG_INTERVAL, threshold=config.LOOP_LAG_THRESHOLD)
+
+# Lịch sử số liệu (lấy mẫu định kỳ, lưu SQLite) cho xu hướng trong lệnh stats
+last_command_calls = 0
+
+def sample_metrics():
+    global last_command_calls
+    calls = sum(stats.calls for stats in command_metrics.commands.values())
+    rate = (calls - last_command_calls) * 60 / config.STATS_SAMPLE_INTERVAL
+    last_command_calls = calls
+    return {
+        'latency_ms': bot.latency * 1000,
+        'guilds': len(bot.guilds),
+        'members': member_stats.total,
+        'commands_per_min': rate,
+        'loop_lag_ms': watchdog.pop_max_lag() * 1000
+    }
+
+metrics_history = TimeSeriesStore(
+    config.STATS_DB, sample_metrics,
+    cluster=cluster.cluster_id if cluster is not None else 0,
+    summed=('guilds', 'members', 'commands_per_min'),
+    interval=config.STATS_SAMPLE_INTERVAL
+)
+
+# Job nền cho lệnh owner chạy lâu, checkpoint lưu SQLite để chạy tiếp sau khi khởi động lại
+jobs = JobManager(bot, config.JOBS_DB, owner=cluster.cluster_id if cluster is not None else 0)
+
+# Snapshot tracemalloc theo yêu cầu của owner (tắt mặc định vì làm chậm cấp phát)
+memory_tracer = AllocationTracer(frames=config.TRACEMALLOC_FRAMES)
+
+# Gắn trạng thái dùng chung lên bot: các cog đọc qua self.bot nên bộ đếm/cache giữ nguyên khi reload
+bot.cluster = cluster
+bot.start_time = start_time
+bot.member_stats = member_stats
+bot.guild_index = guild_index
+bot.guild_snapshots = guild_snapshots
+bot.member_cache = member_cache
+bot.rest_cache = rest_cache
+bot.command_metrics = command_metrics
+bot.admission = admission
+bot.error_throttle = error_throttle
+bot.embed_templates = embed_templates
+bot.presence = presence
+bot.metrics_history = metrics_history
+bot.jobs = jobs
+bot.watchdog = watchdog
+bot.http_stats = http_stats
+bot.memory_tracer = memory_tracer
+bot.prefix_store = prefix_store
+bot.unknown_command_replies = unknown_command_replies
+bot.disabled_commands = set(config.DISABLED_COMMANDS) | set(unavailable_commands)
+
+# Đếm sự kiện gateway từ lúc kết nối tới INTENTS_SAMPLE_SECONDS sau READY để thấy lưu lượng thực tế
+event_volume = EventVolume()
+
+async def count_gateway_event(event_type):
+    event_volume.add(event_type)
+
+bot.add_listener(count_gateway_event, 'on_socket_event_type')
+
 # ==================== LOGGING CONFIGURATION ====================
 import logging
 
+from core.logpipe import start_logging
+
 def setup_logging():
-    """Cấu hình hệ thống logging"""
-    logging.basicConfig(
+    """Cấu hình hệ thống logging (ghi file/console trên thread riêng)"""
+    global log_queue_handler, log_listener
+    log_queue_handler, log_listener = start_logging(
+        path=config.LOG_FILE,
         level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('bot.log', encoding='utf-8'),
-            logging.StreamHandler()
-        ]
+        max_bytes=config.LOG_MAX_BYTES,
+        backup_count=config.LOG_BACKUP_COUNT,
+        when=config.LOG_ROTATE_WHEN or None,
+        json_lines=config.LOG_JSON,
+        queue_size=config.LOG_QUEUE_SIZE
     )
     return logging.getLogger(__name__)
 
 logger = setup_logging()
 
-# Sự kiện khi bot sẵn sàng
+logger.info(f'📡 Intents ({config.INTENTS_MODE}): {", ".join(enabled_flags(intents))}')
+if bot.disabled_commands:
+    logger.info(f'🚫 Lệnh bị tắt: {", ".join(sorted(bot.disabled_commands))}')
+
 @bot.event
-async def on_ready():
-    print(f'✅ {bot.user} đã đăng nhập!')
-    print(f'📊 Đang hoạt động trên {len(bot.guilds)} server')
-    print(f'👥 Tổng số người dùng: {sum(g.member_count for g in bot.guilds)}')
-    
-    # Log thông tin cấu hình (ẩn token)
-    logger.info(f'🔄 Prefix: {PREFIX}')
-    logger.info(f'👑 Owner ID: {OWNER_ID}')
-    
-    # Trạng thái bot
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name=f"{PREFIX}help | {len(bot.guilds)} servers"
-        )
-    )
+async def setup_hook():
+    watchdog.start()
+    for store in guild_settings:
+        await store.load()
+        store.start()
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+    await sync_app_commands(bot)
+    metrics_history.start()
+    # Sau khi nạp cog để các loại job đã được đăng ký
+    await jobs.load()
+    if cluster is not None:
+        register_ipc_handlers(bot)
+        cluster.start()
+    if config.METRICS_PORT:
+        await start_metrics_server(render_metrics, port=int(config.METRICS_PORT))
+        logger.info(f'📈 Endpoint metrics: http://127.0.0.1:{config.METRICS_PORT}/metrics')
 
-# ==================== COMMANDS FOR ALL MEMBERS ====================
-# Lệnh help cho member
-@bot.command(name='help')
-async def help_command(ctx):
-    embed = discord.Embed(
-        title="📖 HƯỚNG DẪN SỬ DỤNG BOT",
-        description="Danh sách lệnh dành cho thành viên",
-        color=discord.Color.blue(),
-        timestamp=datetime.datetime.now()
+def render_metrics():
+    return (
+        command_metrics.render_prometheus()
+        + error_throttle.render_prometheus()
+        + admission.render_prometheus()
+        + presence.render_prometheus()
+        + watchdog.render_prometheus()
+        + http_stats.render_prometheus()
     )
-    
-    embed.add_field(
-        name="🎮 Lệnh cơ bản",
-        value=(
-            f"`{PREFIX}help` - Hiển thị hướng dẫn này\n"
-            f"`{PREFIX}ping` - Kiểm tra độ trễ của bot\n"
-            f"`{PREFIX}userinfo [@user]` - Xem thông tin người dùng\n"
-            f"`{PREFIX}serverinfo` - Xem thông tin server\n"
-            f"`{PREFIX}avatar [@user]` - Xem avatar người dùng"
-        ),
-        inline=False
-    )
-    
-    embed.add_field(
-        name="ℹ️ Thông tin",
-        value=(
-            f"`{PREFIX}bot` - Xem thông tin bot\n"
-            f"`{PREFIX}uptime` - Xem thời gian hoạt động của bot"
-        ),
-        inline=False
-    )
-    
-    embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
-    
-    await ctx.send(embed=embed)
 
-# Lệnh ping
-@bot.command()
-async def ping(ctx):
-    latency = round(bot.latency * 1000)
-    
-    embed = discord.Embed(
-        title="🏓 Pong!",
-        description=f"Độ trễ: **{latency}ms**",
-        color=discord.Color.green()
-    )
-    
-    await ctx.send(embed=embed)
-
-# Lệnh xem thông tin bot
-@bot.command(name='bot')
-async def bot_info(ctx):
-    # Tính toán thời gian hoạt động
-    uptime = datetime.datetime.now() - start_time
-    days = uptime.days
-    hours, remainder = divmod(uptime.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    
-    embed = discord.Embed(
-        title="🤖 THÔNG TIN BOT",
-        description="Thông tin chi tiết về bot",
-        color=discord.Color.purple()
-    )
-    
-    # Thông tin bot
-    embed.add_field(name="👤 Tên bot", value=bot.user.name, inline=True)
-    embed.add_field(name="#️⃣ ID", value=bot.user.id, inline=True)
-    embed.add_field(name="📅 Ngày tạo", value=bot.user.created_at.strftime("%d/%m/%Y"), inline=True)
-    
-    # Thống kê
-    embed.add_field(name="📊 Số server", value=len(bot.guilds), inline=True)
-    embed.add_field(name="👥 Tổng thành viên", value=sum(g.member_count for g in bot.guilds), inline=True)
-    embed.add_field(name="🏓 Ping", value=f"{round(bot.latency * 1000)}ms", inline=True)
-    
-    # Thời gian hoạt động
-    embed.add_field(
-        name="⏰ Uptime", 
-        value=f"{days} ngày, {hours} giờ, {minutes} phút, {seconds} giây",
-        inline=False
-    )
-    
-    # Chủ sở hữu
-    owner = await bot.fetch_user(OWNER_ID)
-    embed.add_field(name="👑 Chủ sở hữu", value=f"{owner.name}#{owner.discriminator}", inline=True)
-    
-    # Ngôn ngữ & Thư viện
-    embed.add_field(name="💻 Ngôn ngữ", value="Python", inline=True)
-    embed.add_field(name="📚 Thư viện", value="discord.py", inline=True)
-    
-    embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
-    embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    
-    await ctx.send(embed=embed)
+# Giới hạn token cho mọi lệnh (owner không bị giới hạn)
+@bot.check
+async def admission_check(ctx):
+    if ctx.author.id != config.OWNER_ID:
+        # Lệnh nặng có thể phải chờ token/lượt chạy lâu hơn hạn 3 giây của slash command
+        if ctx.interaction is not None and admission.cost(ctx.command.qualified_name) > 1:
+            await ctx.defer()
+        await admission.admit(ctx.command.qualified_name, ctx.author.id, ctx.guild.id if ctx.guild else None)
+    return True
 
-# Lệnh userinfo
-@bot.command()
-async def userinfo(ctx, member: discord.Member = None):
-    member = member or ctx.author
-    
-    roles = [role.mention for role in member.roles if role.name != "@everyone"]
-    
-    embed = discord.Embed(
-        title=f"👤 THÔNG TIN {member.name}",
-        color=member.color,
-        timestamp=datetime.datetime.now()
-    )
-    
-    embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
-    
-    # Thông tin cơ bản
-    embed.add_field(name="Tên đầy đủ", value=f"{member.name}#{member.discriminator}", inline=True)
-    embed.add_field(name="ID", value=member.id, inline=True)
-    embed.add_field(name="Bot?", value="✅" if member.bot else "❌", inline=True)
-    
-    # Thông tin tham gia
-    embed.add_field(name="Tham gia server", value=member.joined_at.strftime("%d/%m/%Y %H:%M"), inline=True)
-    embed.add_field(name="Tạo tài khoản", value=member.created_at.strftime("%d/%m/%Y %H:%M"), inline=True)
-    
-    # Vai trò
-    embed.add_field(name="Vai trò cao nhất", value=member.top_role.mention, inline=True)
-    embed.add_field(
-        name=f"Vai trò ({len(roles)})", 
-        value=" ".join(roles) if roles else "Không có vai trò",
-        inline=False
-    )
-    
-    embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    
-    await ctx.send(embed=embed)
+# Đo thời gian mọi lệnh
+@bot.before_invoke
+async def before_any_command(ctx):
+    # Giữ lượt chạy cho lệnh nặng trước khi bắt đầu đo, để thời gian chờ không tính vào độ trễ
+    ctx.admission_slot = await admission.enter(ctx.command.qualified_name)
+    ctx.metrics_token = command_metrics.start()
+    watchdog.label(f'lệnh {ctx.command.qualified_name}')
 
-# Lệnh serverinfo
-@bot.command()
-async def serverinfo(ctx):
-    guild = ctx.guild
-    
-    embed = discord.Embed(
-        title=f"📊 THÔNG TIN SERVER: {guild.name}",
-        color=discord.Color.gold(),
-        timestamp=datetime.datetime.now()
-    )
-    
-    if guild.icon:
-        embed.set_thumbnail(url=guild.icon.url)
-    
-    # Thông tin cơ bản
-    embed.add_field(name="👑 Chủ sở hữu", value=guild.owner.mention, inline=True)
-    embed.add_field(name="#️⃣ ID", value=guild.id, inline=True)
-    embed.add_field(name="🌐 Khu vực", value=str(guild.preferred_locale).title(), inline=True)
-    
-    # Thống kê
-    embed.add_field(name="📅 Ngày tạo", value=guild.created_at.strftime("%d/%m/%Y"), inline=True)
-    embed.add_field(name="👥 Thành viên", value=guild.member_count, inline=True)
-    embed.add_field(name="📈 Số lượng bot", value=sum(member.bot for member in guild.members), inline=True)
-    
-    # Kênh
-    embed.add_field(name="💬 Kênh văn bản", value=len(guild.text_channels), inline=True)
-    embed.add_field(name="🎤 Kênh thoại", value=len(guild.voice_channels), inline=True)
-    embed.add_field(name="📁 Danh mục", value=len(guild.categories), inline=True)
-    
-    # Vai trò và emoji
-    embed.add_field(name="🎭 Số vai trò", value=len(guild.roles), inline=True)
-    embed.add_field(name="😀 Số emoji", value=len(guild.emojis), inline=True)
-    
-    # Tính xác minh
-    verification_levels = {
-        discord.VerificationLevel.none: "Không",
-        discord.VerificationLevel.low: "Thấp",
-        discord.VerificationLevel.medium: "Trung bình",
-        discord.VerificationLevel.high: "Cao",
-        discord.VerificationLevel.highest: "Rất cao"
-    }
-    
-    embed.add_field(
-        name="🛡️ Mức xác minh", 
-        value=verification_levels.get(guild.verification_level, "Không xác định"),
-        inline=True
-    )
-    
-    embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    
-    await ctx.send(embed=embed)
+@bot.after_invoke
+async def after_any_command(ctx):
+    watchdog.unlabel()
+    command_metrics.finish(ctx.command.qualified_name, ctx.metrics_token, ctx.command_failed)
+    if ctx.admission_slot:
+        admission.leave(ctx.command.qualified_name)
 
-# Lệnh avatar
-@bot.command()
-async def avatar(ctx, member: discord.Member = None):
-    member = member or ctx.author
-    
-    embed = discord.Embed(
-        title=f"🖼️ Avatar của {member.name}",
-        color=member.color
-    )
-    
-    if member.avatar:
-        embed.set_image(url=member.avatar.url)
-        embed.description = f"[Link avatar]({member.avatar.url})"
-    else:
-        embed.description = "Người dùng này không có avatar"
-    
-    embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    
-    await ctx.send(embed=embed)
-
-# Lệnh uptime
-@bot.command()
-async def uptime(ctx):
-    uptime_duration = datetime.datetime.now() - start_time
-    days = uptime_duration.days
-    hours, remainder = divmod(uptime_duration.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    
-    embed = discord.Embed(
-        title="⏰ THỜI GIAN HOẠT ĐỘNG",
-        description=(
-            f"**Bot đã hoạt động được:**\n"
-            f"```{days} ngày, {hours} giờ, {minutes} phút, {seconds} giây```"
-        ),
-        color=discord.Color.green()
-    )
-    
-    embed.set_footer(text=f"Bot khởi động lúc: {start_time.strftime('%d/%m/%Y %H:%M:%S')}")
-    
-    await ctx.send(embed=embed)
+# Sự kiện khi bot sẵn sàng
+startup_reported = False
 
-# Lệnh kiểm tra env
-@bot.command(name='env')
-async def check_env(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    embed = discord.Embed(
-        title="⚙️ KIỂM TRA .ENV",
-        color=discord.Color.blue()
-    )
-    
-    token_display = f"✅ Đã cấu hình ({TOKEN[:10]}...)" if TOKEN else "❌ Chưa cấu hình"
-    
-    embed.add_field(name="Token", value=token_display, inline=False)
-    embed.add_field(name="Owner ID", value=OWNER_ID, inline=True)
-    embed.add_field(name="Prefix", value=PREFIX, inline=True)
-    embed.add_field(name="Python", value=os.sys.version.split()[0], inline=True)
-    
-    if os.path.exists('.env'):
-        embed.add_field(name="File .env", value="✅ Tồn tại", inline=True)
-    else:
-        embed.add_field(name="File .env", value="❌ Không tồn tại", inline=True)
+@bot.event
+async def on_ready():
+    global startup_reported
     
-    embed.set_footer(text="Lệnh chỉ dành cho Owner")
-    await ctx.send(embed=embed)
-
-# Lệnh reload env
-@bot.command(name='reloadenv')
-async def reload_env(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
+    member_stats.seed(bot.guilds)
+    guild_index.seed(GuildEntry.from_guild(g) for g in bot.guilds)
+    guild_snapshots.clear()
     
-    try:
-        old_prefix = PREFIX
-        old_owner = OWNER_ID
-        
-        load_dotenv(override=True)
-        
-        global TOKEN, OWNER_ID, PREFIX
-        TOKEN = os.getenv('DISCORD_TOKEN')
-        OWNER_ID = int(os.getenv('OWNER_ID'))
-        PREFIX = os.getenv('BOT_PREFIX', '?')
-        
-        bot.command_prefix = PREFIX
-        
-        embed = discord.Embed(
-            title="🔄 ĐÃ TẢI LẠI .ENV",
-            color=discord.Color.green()
-        )
-        
-        changes = []
-        if old_prefix != PREFIX:
-            changes.append(f"Prefix: `{old_prefix}` → `{PREFIX}`")
-        if old_owner != OWNER_ID:
-            changes.append(f"Owner ID: `{old_owner}` → `{OWNER_ID}`")
-        
-        if changes:
-            embed.add_field(name="Thay đổi", value="\n".join(changes), inline=False)
-        else:
-            embed.description = "Không có thay đổi nào"
-        
-    except Exception as e:
-        embed = discord.Embed(
-            title="❌ LỖI TẢI LẠI .ENV",
-            description=f"```{str(e)}```",
-            color=discord.Color.red()
-        )
+    # Số server có thể đã đổi trong lúc mất kết nối
+    presence.mark_dirty()
     
-    await ctx.send(embed=embed)
-
-# ==================== OWNER-ONLY COMMANDS ====================
-# Lệnh help cho owner
-@bot.command(name='helpp')
-async def owner_help(ctx):
-    # Kiểm tra owner
-    if ctx.author.id != OWNER_ID:
-        embed = discord.Embed(
-            title="❌ LỖI",
-            description="Bạn không có quyền sử dụng lệnh này!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+    # READY chạy lại mỗi lần kết nối lại, chỉ in thông tin khởi động một lần
+    if startup_reported:
         return
+    startup_reported = True
     
-    embed = discord.Embed(
-        title="🔑 HƯỚNG DẪN LỆNH OWNER",
-        description="Các lệnh dành riêng cho chủ sở hữu",
-        color=discord.Color.gold(),
-        timestamp=datetime.datetime.now()
+    startup_seconds = (datetime.datetime.now() - start_time).total_seconds()
+    logger.info(
+        f'⏱️ READY sau {startup_seconds:.1f}s, RSS {format_bytes(rss_bytes())} '
+        f'(member cache: {config.MEMBER_CACHE_MODE})'
     )
     
-    embed.add_field(
-        name="⚙️ Quản lý bot",
-        value=(
-            f"`{PREFIX}helpp` - Hiển thị hướng dẫn này\n"
-            f"`{PREFIX}shutdown` - Tắt bot\n"
-            f"`{PREFIX}reload` - Khởi động lại bot\n"
-            f"`{PREFIX}servers` - Hiển thị danh sách server\n"
-            f"`{PREFIX}leave [server_id]` - Rời khỏi server\n"
-            f"`{PREFIX}status [trạng thái]` - Đổi trạng thái bot"
-        ),
-        inline=False
-    )
+    logger.info(f'📡 Sự kiện gateway tới READY: {event_volume.summary()}')
+    asyncio.get_running_loop().call_later(config.INTENTS_SAMPLE_SECONDS, report_event_volume)
     
-    embed.add_field(
-        name="📊 Thống kê",
-        value=(
-            f"`{PREFIX}stats` - Thống kê chi tiết\n"
-            f"`{PREFIX}broadcast [tin nhắn]` - Gửi tin nhắn đến tất cả server"
-        ),
-        inline=False
-    )
+    print(f'✅ {bot.user} đã đăng nhập!')
+    totals = await cluster_totals(bot)
     
-    embed.set_footer(text=f"Chủ sở hữu: {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+    if cluster is not None:
+        print(f'🧩 Cluster {cluster.cluster_id} (shard {config.SHARD_IDS}/{config.SHARD_COUNT})')
+    print(f'📊 Đang hoạt động trên {totals["guilds"]} server')
+    approx = '' if bot.intents.members else ' (ước tính)'
+    print(f'👥 Tổng số người dùng: {totals["members"]}{approx}')
     
-    await ctx.send(embed=embed)
+    # Log thông tin cấu hình (ẩn token)
+    logger.info(f'🔄 Prefix: {config.PREFIX}')
+    logger.info(f'👑 Owner ID: {config.OWNER_ID}')
 
-# Lệnh tắt bot
-@bot.command()
-async def shutdown(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    embed = discord.Embed(
-        title="🔌 ĐANG TẮT BOT...",
-        description="Bot sẽ ngừng hoạt động sau 3 giây",
-        color=discord.Color.red()
-    )
-    
-    await ctx.send(embed=embed)
-    await asyncio.sleep(3)
-    await bot.close()
-
-# Lệnh khởi động lại bot
-@bot.command()
-async def reload(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    embed = discord.Embed(
-        title="🔄 ĐANG KHỞI ĐỘNG LẠI...",
-        description="Bot sẽ khởi động lại sau 3 giây",
-        color=discord.Color.orange()
-    )
-    
-    await ctx.send(embed=embed)
-    await asyncio.sleep(3)
-    
-    # Có thể thêm code để reload extensions ở đây
-    embed2 = discord.Embed(
-        title="✅ KHỞI ĐỘNG LẠI THÀNH CÔNG",
-        color=discord.Color.green()
-    )
-    
-    await ctx.send(embed=embed2)
+def report_event_volume():
+    bot.remove_listener(count_gateway_event, 'on_socket_event_type')
+    logger.info(f'📡 Sự kiện gateway từ lúc khởi động: {event_volume.summary()}, RSS {format_bytes(rss_bytes())}')
 
-# Lệnh hiển thị servers
-@bot.command()
-async def servers(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    embed = discord.Embed(
-        title="🌐 DANH SÁCH SERVER",
-        description=f"Bot đang ở trong {len(bot.guilds)} server",
-        color=discord.Color.blue()
-    )
-    
-    for i, guild in enumerate(bot.guilds, 1):
-        embed.add_field(
-            name=f"{i}. {guild.name}",
-            value=f"ID: {guild.id}\nThành viên: {guild.member_count}",
-            inline=False
-        )
-    
-    await ctx.send(embed=embed)
+# Cập nhật bộ đếm thành viên và chỉ mục guild
+@bot.event
+async def on_guild_join(guild):
+    member_stats.add_guild(guild)
+    guild_index.add(GuildEntry.from_guild(guild))
+    presence.mark_dirty()
 
-# Lệnh rời server
-@bot.command()
-async def leave(ctx, server_id: int = None):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    if not server_id:
-        await ctx.send(f"❌ Vui lòng cung cấp ID server! Ví dụ: `{PREFIX}leave 1234567890`")
-        return
-    
-    guild = bot.get_guild(server_id)
-    if not guild:
-        await ctx.send("❌ Không tìm thấy server với ID này!")
-        return
-    
-    try:
-        await guild.leave()
-        embed = discord.Embed(
-            title="✅ ĐÃ RỜI SERVER",
-            description=f"Đã rời khỏi server: **{guild.name}**",
-            color=discord.Color.green()
-        )
-        await ctx.send(embed=embed)
-    except Exception as e:
-        embed = discord.Embed(
-            title="❌ LỖI",
-            description=f"Không thể rời server: {str(e)}",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-
-# Lệnh đổi trạng thái
-@bot.command()
-async def status(ctx, *, status_type=None):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    if not status_type:
-        await ctx.send(f"❌ Vui lòng chọn trạng thái! Ví dụ: `{PREFIX}status playing game`")
-        return
-    
-    # Phân loại trạng thái
-    if status_type.startswith("playing"):
-        activity = discord.Activity(type=discord.ActivityType.playing, name=status_type[8:])
-    elif status_type.startswith("watching"):
-        activity = discord.Activity(type=discord.ActivityType.watching, name=status_type[9:])
-    elif status_type.startswith("listening"):
-        activity = discord.Activity(type=discord.ActivityType.listening, name=status_type[10:])
-    elif status_type.startswith("streaming"):
-        activity = discord.Activity(type=discord.ActivityType.streaming, name=status_type[10:])
-    else:
-        activity = discord.Activity(type=discord.ActivityType.playing, name=status_type)
-    
-    await bot.change_presence(activity=activity)
-    
-    embed = discord.Embed(
-        title="✅ ĐÃ ĐỔI TRẠNG THÁI",
-        description=f"Trạng thái mới: **{status_type}**",
-        color=discord.Color.green()
-    )
-    
-    await ctx.send(embed=embed)
+@bot.event
+async def on_guild_remove(guild):
+    member_stats.remove_guild(guild.id)
+    member_cache.forget(guild.id)
+    guild_index.remove(guild.id)
+    guild_snapshots.invalidate(guild.id)
+    presence.mark_dirty()
 
-# Lệnh thống kê chi tiết
-@bot.command()
-async def stats(ctx):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    total_members = sum(g.member_count for g in bot.guilds)
-    total_bots = sum(sum(1 for m in g.members if m.bot) for g in bot.guilds)
-    total_humans = total_members - total_bots
-    
-    embed = discord.Embed(
-        title="📈 THỐNG KÊ CHI TIẾT",
-        description="Thống kê toàn bộ hoạt động của bot",
-        color=discord.Color.purple(),
-        timestamp=datetime.datetime.now()
-    )
-    
-    # Tổng quan
-    embed.add_field(name="📊 Tổng số server", value=len(bot.guilds), inline=True)
-    embed.add_field(name="👥 Tổng thành viên", value=total_members, inline=True)
-    embed.add_field(name="🤖 Tổng bot", value=total_bots, inline=True)
-    embed.add_field(name="👤 Tổng người dùng", value=total_humans, inline=True)
-    
-    # Ping
-    embed.add_field(name="🏓 Ping", value=f"{round(bot.latency * 1000)}ms", inline=True)
-    
-    # Uptime
-    uptime_duration = datetime.datetime.now() - start_time
-    days = uptime_duration.days
-    hours, remainder = divmod(uptime_duration.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    embed.add_field(
-        name="⏰ Uptime", 
-        value=f"{days}d {hours}h {minutes}m {seconds}s",
-        inline=True
-    )
-    
-    # Thông tin bot
-    embed.add_field(name="💻 Python version", value="3.8+", inline=True)
-    embed.add_field(name="📚 Discord.py", value=discord.__version__, inline=True)
-    
-    embed.set_footer(text=f"Chủ sở hữu: {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
-    
-    await ctx.send(embed=embed)
+@bot.event
+async def on_guild_update(before, after):
+    guild_snapshots.invalidate(after.id)
+    # Không có intent members thì không có join/leave, đồng bộ lại tổng theo member_count
+    if not bot.intents.members:
+        member_stats.refresh_total(after)
+    if before.name != after.name:
+        guild_index.update(after.id, name=after.name)
 
-# Lệnh broadcast
-@bot.command()
-async def broadcast(ctx, *, message=None):
-    if ctx.author.id != OWNER_ID:
-        await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
-        return
-    
-    if not message:
-        await ctx.send(f"❌ Vui lòng nhập tin nhắn! Ví dụ: `{PREFIX}broadcast Xin chào mọi người!`")
-        return
-    
-    embed = discord.Embed(
-        title="📢 THÔNG BÁO TỪ CHỦ SỞ HỮU",
-        description=message,
-        color=discord.Color.blue(),
-        timestamp=datetime.datetime.now()
-    )
-    
-    embed.set_footer(text=f"Bot: {bot.user.name}", icon_url=bot.user.avatar.url if bot.user.avatar else None)
-    
-    sent = 0
-    failed = 0
-    
-    for guild in bot.guilds:
-        try:
-            # Tìm kênh đầu tiên bot có quyền gửi
-            channel = guild.system_channel or guild.text_channels[0]
-            await channel.send(embed=embed)
-            sent += 1
-        except:
-            failed += 1
-        await asyncio.sleep(0.5)  # Tránh rate limit
-    
-    result_embed = discord.Embed(
-        title="📤 KẾT QUẢ BROADCAST",
-        color=discord.Color.green()
-    )
-    
-    result_embed.add_field(name="✅ Gửi thành công", value=sent, inline=True)
-    result_embed.add_field(name="❌ Gửi thất bại", value=failed, inline=True)
-    result_embed.add_field(name="📊 Tổng server", value=len(bot.guilds), inline=True)
-    
-    await ctx.send(embed=result_embed)
+@bot.event
+async def on_member_join(member):
+    member_stats.member_joined(member.guild.id, member.bot)
+    guild_snapshots.invalidate(member.guild.id)
+    guild_index.update(member.guild.id, member_count=member.guild.member_count)
 
-# Xử lý lỗi
 @bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        embed = discord.Embed(
-            title="❌ LỆNH KHÔNG TỒN TẠI",
-            description=f"Sử dụng `{PREFIX}help` để xem danh sách lệnh",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-    elif isinstance(error, commands.MissingPermissions):
-        embed = discord.Embed(
-            title="❌ THIẾU QUYỀN",
-            description="Bạn không có quyền sử dụng lệnh này!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-    else:
-        embed = discord.Embed(
-            title="❌ LỖI KHÔNG XÁC ĐỊNH",
-            description=f"```{str(error)}```",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+async def on_raw_member_remove(payload):
+    # Dùng sự kiện raw để vẫn đếm đúng khi member không có trong cache
+    member_stats.member_left(payload.guild_id, payload.user.bot)
+    guild_snapshots.invalidate(payload.guild_id)
+    guild = bot.get_guild(payload.guild_id)
+    if guild is not None:
+        guild_index.update(guild.id, member_count=guild.member_count)
+
+# Số kênh/vai trò/emoji trong snapshot của serverinfo
+@bot.event
+async def on_guild_channel_create(channel):
+    guild_snapshots.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    guild_snapshots.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_role_create(role):
+    guild_snapshots.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role):
+    guild_snapshots.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_emojis_update(guild, before, after):
+    guild_snapshots.invalidate(guild.id)
 
 # Chạy bot
 if __name__ == "__main__":
     print("="*50)
     print("🚀 Đang khởi động bot Discord...")
     print(f"📁 Thư mục làm việc: {os.getcwd()}")
-    print(f"🔧 Prefix: {PREFIX}")
-    print(f"👑 Owner ID: {OWNER_ID}")
+    print(f"🔧 Prefix: {config.PREFIX}")
+    print(f"👑 Owner ID: {config.OWNER_ID}")
     
     # Kiểm tra file .env
     if not os.path.exists('.env'):
@@ -666,10 +404,27 @@ if __name__ == "__main__":
     
     print("="*50)
     
+    # Phải cài trước bot.run vì run() tạo event loop mới
+    runtime = apply_profile(config.RUNTIME_PROFILE)
+    logger.info(f'⚡ Runtime profile {config.RUNTIME_PROFILE}: {describe(runtime)}')
+    if config.DISCORD_API_BASE or config.DISCORD_GATEWAY_URL:
+        use_endpoints(config.DISCORD_API_BASE, config.DISCORD_GATEWAY_URL)
+        logger.warning(f'🧪 Dùng Discord giả lập: REST {config.DISCORD_API_BASE or "mặc định"}, gateway {config.DISCORD_GATEWAY_URL or "mặc định"}')
+    
+    # Launcher/systemd dừng bot bằng SIGTERM: xử lý như Ctrl+C để bot đóng hẳn và khối finally ghi nốt dữ liệu
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
     try:
-        bot.run(TOKEN)
+        # log_handler=None để log của discord.py cũng đi qua queue thay vì handler mặc định
+        bot.run(config.TOKEN, log_handler=None)
     except discord.LoginFailure:
         print("❌ LỖI: Token không hợp lệ!")
         print("ℹ️  Kiểm tra file .env và đảm bảo DISCORD_TOKEN là hợp lệ")
     except Exception as e:
-        print(f"❌ LỖI KHỞI ĐỘNG: {str(e)}")
\ No newline at end of file
+        print(f"❌ LỖI KHỞI ĐỘNG: {str(e)}")
+    finally:
+        # Ghi nốt cài đặt server, lịch sử số liệu và checkpoint job chưa kịp ghi xuống đĩa
+        for store in guild_settings:
+            store.flush_sync()
+        metrics_history.flush_sync()
+        jobs.flush_sync()
\ No newline at end of file
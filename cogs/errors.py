@@ -0,0 +1,84 @@
+"""Trả lời lỗi lệnh, có gộp/giới hạn để không tốn quota gửi tin khi bị spam."""
+import logging
+
+import discord
+from discord.ext import commands
+
+from core.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+class Errors(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        bot = self.bot
+        
+        # Lỗi trước khi lệnh chạy (check, chuyển đổi tham số) không đi qua after_invoke
+        if ctx.command is not None and not hasattr(ctx, 'metrics_token'):
+            stats = bot.command_metrics.get(ctx.command.qualified_name)
+            stats.calls += 1
+            stats.errors += 1
+        # Slash command lỗi khi đang chạy: discord.py bỏ qua after_invoke, phải tự gọi để trả lượt và ghi số liệu
+        elif ctx.interaction is not None:
+            await ctx.command.call_after_hooks(ctx)
+        
+        if isinstance(error, commands.CommandNotFound):
+            kind = 'not_found'
+        elif isinstance(error, commands.MissingPermissions):
+            kind = 'missing_permissions'
+        elif isinstance(error, AdmissionRejected):
+            kind = 'rate_limited'
+        else:
+            kind = 'other'
+        
+        # Server đã tắt trả lời lệnh không tồn tại (ví dụ dùng chung prefix với bot khác)
+        if kind == 'not_found' and ctx.guild is not None and not bot.unknown_command_replies.get(ctx.guild.id):
+            bot.error_throttle.suppress(kind)
+            return
+        
+        coalesced = bot.error_throttle.check(ctx.author.id, ctx.channel.id, kind)
+        if coalesced is None:
+            return
+        
+        if kind == 'not_found':
+            embed = discord.Embed(
+                title="❌ LỆNH KHÔNG TỒN TẠI",
+                description=f"Sử dụng `{ctx.clean_prefix}help` để xem danh sách lệnh",
+                color=discord.Color.red()
+            )
+        elif kind == 'rate_limited':
+            retry = f" Thử lại sau {error.retry_after:.1f} giây." if error.retry_after else ""
+            embed = discord.Embed(
+                title="⏳ QUÁ NHIỀU YÊU CẦU",
+                description=f"Bạn đang dùng lệnh quá nhanh.{retry}",
+                color=discord.Color.orange()
+            )
+        elif kind == 'missing_permissions':
+            embed = discord.Embed(
+                title="❌ THIẾU QUYỀN",
+                description="Bạn không có quyền sử dụng lệnh này!",
+                color=discord.Color.red()
+            )
+        else:
+            embed = discord.Embed(
+                title="❌ LỖI KHÔNG XÁC ĐỊNH",
+                description=f"```{str(error)}```",
+                color=discord.Color.red()
+            )
+        
+        if coalesced:
+            embed.set_footer(text=f"Đã gộp {coalesced} lỗi khác trong kênh này")
+        
+        try:
+            await ctx.send(embed=embed)
+        except discord.HTTPException as e:
+            # Bị 429/thiếu quyền gửi thì bỏ qua: log traceback cho từng lỗi lúc bị spam còn tốn hơn lỗi gốc
+            logger.debug('Không gửi được thông báo lỗi trong kênh %s: %s', ctx.channel.id, e)
+
+
+async def setup(bot):
+    await bot.add_cog(Errors(bot))
@@ -0,0 +1,334 @@
+"""Lệnh dành cho mọi thành viên."""
+import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core import config
+from core.cluster_ops import cluster_totals
+from core.intents import drop_disabled_commands
+
+MAX_PREFIX_LENGTH = 5
+
+
+class General(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        bot.embed_templates.register('help')(self.build_help_embed)
+
+    # Lệnh help cho member
+    def build_help_embed(self, prefix):
+        embed = discord.Embed(
+            title="📖 HƯỚNG DẪN SỬ DỤNG BOT",
+            description="Danh sách lệnh dành cho thành viên",
+            color=discord.Color.blue()
+        )
+        
+        embed.add_field(
+            name="🎮 Lệnh cơ bản",
+            value=(
+                f"`{prefix}help` - Hiển thị hướng dẫn này\n"
+                f"`{prefix}ping` - Kiểm tra độ trễ của bot\n"
+                f"`{prefix}userinfo [@user]` - Xem thông tin người dùng\n"
+                f"`{prefix}serverinfo` - Xem thông tin server\n"
+                f"`{prefix}avatar [@user]` - Xem avatar người dùng\n"
+                f"`{prefix}prefix [prefix mới]` - Xem/đổi prefix của server\n"
+                f"`{prefix}notfound [on|off]` - Bật/tắt báo lệnh không tồn tại"
+            ),
+            inline=False
+        )
+        
+        embed.add_field(
+            name="ℹ️ Thông tin",
+            value=(
+                f"`{prefix}bot` - Xem thông tin bot\n"
+                f"`{prefix}uptime` - Xem thời gian hoạt động của bot"
+            ),
+            inline=False
+        )
+        
+        return embed
+
+    @commands.hybrid_command(name='help', description="Hiển thị hướng dẫn sử dụng bot")
+    async def help_command(self, ctx):
+        embed = self.bot.embed_templates.render(
+            'help',
+            prefix=ctx.clean_prefix,
+            footer=f"Yêu cầu bởi {ctx.author}",
+            footer_icon=ctx.author.avatar.url if ctx.author.avatar else None,
+            thumbnail=self.bot.user.avatar.url if self.bot.user.avatar else None,
+            timestamp=True
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh ping
+    @commands.hybrid_command(description="Kiểm tra độ trễ của bot")
+    async def ping(self, ctx):
+        latency = round(self.bot.latency * 1000)
+        loop = self.bot.watchdog.summary()
+        
+        embed = discord.Embed(
+            title="🏓 Pong!",
+            description=(
+                f"Độ trễ: **{latency}ms**\n"
+                f"Event loop: p50 **{loop['p50'] * 1000:.1f}ms** · p99 **{loop['p99'] * 1000:.1f}ms**"
+            ),
+            color=discord.Color.green()
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh xem thông tin bot
+    @commands.hybrid_command(name='bot', description="Xem thông tin bot")
+    async def about(self, ctx):
+        bot = self.bot
+        
+        # Tính toán thời gian hoạt động
+        uptime = datetime.datetime.now() - bot.start_time
+        days = uptime.days
+        hours, remainder = divmod(uptime.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        
+        embed = discord.Embed(
+            title="🤖 THÔNG TIN BOT",
+            description="Thông tin chi tiết về bot",
+            color=discord.Color.purple()
+        )
+        
+        # Thông tin bot
+        embed.add_field(name="👤 Tên bot", value=bot.user.name, inline=True)
+        embed.add_field(name="#️⃣ ID", value=bot.user.id, inline=True)
+        embed.add_field(name="📅 Ngày tạo", value=bot.user.created_at.strftime("%d/%m/%Y"), inline=True)
+        
+        # Thống kê
+        totals = await cluster_totals(bot)
+        embed.add_field(name="📊 Số server", value=totals['guilds'], inline=True)
+        # Không có intent members thì bộ đếm không nhận join/leave
+        approx = "" if bot.intents.members else " (ước tính)"
+        embed.add_field(name="👥 Tổng thành viên", value=f"{totals['members']}{approx}", inline=True)
+        embed.add_field(name="🏓 Ping", value=f"{round(bot.latency * 1000)}ms", inline=True)
+        
+        # Thời gian hoạt động
+        embed.add_field(
+            name="⏰ Uptime", 
+            value=f"{days} ngày, {hours} giờ, {minutes} phút, {seconds} giây",
+            inline=False
+        )
+        
+        # Chủ sở hữu
+        owner = await bot.rest_cache.user(config.OWNER_ID)
+        embed.add_field(name="👑 Chủ sở hữu", value=f"{owner.name}#{owner.discriminator}", inline=True)
+        
+        # Ngôn ngữ & Thư viện
+        embed.add_field(name="💻 Ngôn ngữ", value="Python", inline=True)
+        embed.add_field(name="📚 Thư viện", value="discord.py", inline=True)
+        
+        embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
+        embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh userinfo
+    @commands.hybrid_command(description="Xem thông tin người dùng")
+    @app_commands.describe(member="Thành viên cần xem (mặc định là bạn)")
+    async def userinfo(self, ctx, member: discord.Member = None):
+        # MemberConverter đã tự query member khi không có trong cache, chỉ cần đánh dấu guild vừa dùng
+        self.bot.member_cache.touch(ctx.guild)
+        member = member or ctx.author
+        
+        roles = [role.mention for role in member.roles if role.name != "@everyone"]
+        
+        embed = discord.Embed(
+            title=f"👤 THÔNG TIN {member.name}",
+            color=member.color,
+            timestamp=datetime.datetime.now()
+        )
+        
+        embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
+        
+        # Thông tin cơ bản
+        embed.add_field(name="Tên đầy đủ", value=f"{member.name}#{member.discriminator}", inline=True)
+        embed.add_field(name="ID", value=member.id, inline=True)
+        embed.add_field(name="Bot?", value="✅" if member.bot else "❌", inline=True)
+        
+        # Thông tin tham gia
+        embed.add_field(name="Tham gia server", value=member.joined_at.strftime("%d/%m/%Y %H:%M"), inline=True)
+        embed.add_field(name="Tạo tài khoản", value=member.created_at.strftime("%d/%m/%Y %H:%M"), inline=True)
+        
+        # Vai trò
+        embed.add_field(name="Vai trò cao nhất", value=member.top_role.mention, inline=True)
+        embed.add_field(
+            name=f"Vai trò ({len(roles)})", 
+            value=" ".join(roles) if roles else "Không có vai trò",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh serverinfo (đếm bot cần chunk member, số emoji cần sự kiện cập nhật emoji)
+    @commands.hybrid_command(description="Xem thông tin server", extras={'intents': ('members', 'emojis_and_stickers')})
+    async def serverinfo(self, ctx):
+        guild = ctx.guild
+        
+        # Số bot cần danh sách member đầy đủ nên chunk guild nếu chưa có
+        await self.bot.member_cache.ensure_chunked(guild)
+        
+        # Giá trị tính sẵn, chỉ dựng lại khi có sự kiện làm thay đổi server
+        info = self.bot.guild_snapshots.get(guild, self.bot.member_stats.get(guild.id).bots)
+        
+        embed = discord.Embed(
+            title=f"📊 THÔNG TIN SERVER: {info.name}",
+            color=discord.Color.gold(),
+            timestamp=datetime.datetime.now()
+        )
+        
+        if info.icon_url:
+            embed.set_thumbnail(url=info.icon_url)
+        
+        # Thông tin cơ bản
+        embed.add_field(name="👑 Chủ sở hữu", value=f"<@{info.owner_id}>", inline=True)
+        embed.add_field(name="#️⃣ ID", value=guild.id, inline=True)
+        embed.add_field(name="🌐 Khu vực", value=info.locale, inline=True)
+        
+        # Thống kê
+        embed.add_field(name="📅 Ngày tạo", value=info.created, inline=True)
+        embed.add_field(name="👥 Thành viên", value=info.member_count, inline=True)
+        embed.add_field(name="📈 Số lượng bot", value=info.bots, inline=True)
+        
+        # Kênh
+        embed.add_field(name="💬 Kênh văn bản", value=info.text_channels, inline=True)
+        embed.add_field(name="🎤 Kênh thoại", value=info.voice_channels, inline=True)
+        embed.add_field(name="📁 Danh mục", value=info.categories, inline=True)
+        
+        # Vai trò và emoji
+        embed.add_field(name="🎭 Số vai trò", value=info.roles, inline=True)
+        embed.add_field(name="😀 Số emoji", value=info.emojis, inline=True)
+        
+        # Tính xác minh
+        embed.add_field(name="🛡️ Mức xác minh", value=info.verification, inline=True)
+        
+        embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh avatar
+    @commands.hybrid_command(description="Xem avatar người dùng")
+    @app_commands.describe(member="Thành viên cần xem (mặc định là bạn)")
+    async def avatar(self, ctx, member: discord.Member = None):
+        self.bot.member_cache.touch(ctx.guild)
+        member = member or ctx.author
+        
+        embed = discord.Embed(
+            title=f"🖼️ Avatar của {member.name}",
+            color=member.color
+        )
+        
+        if member.avatar:
+            embed.set_image(url=member.avatar.url)
+            embed.description = f"[Link avatar]({member.avatar.url})"
+        else:
+            embed.description = "Người dùng này không có avatar"
+        
+        embed.set_footer(text=f"Yêu cầu bởi {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh uptime
+    @commands.hybrid_command(description="Xem thời gian hoạt động của bot")
+    async def uptime(self, ctx):
+        start_time = self.bot.start_time
+        uptime_duration = datetime.datetime.now() - start_time
+        days = uptime_duration.days
+        hours, remainder = divmod(uptime_duration.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        
+        embed = discord.Embed(
+            title="⏰ THỜI GIAN HOẠT ĐỘNG",
+            description=(
+                f"**Bot đã hoạt động được:**\n"
+                f"```{days} ngày, {hours} giờ, {minutes} phút, {seconds} giây```"
+            ),
+            color=discord.Color.green()
+        )
+        
+        embed.set_footer(text=f"Bot khởi động lúc: {start_time.strftime('%d/%m/%Y %H:%M:%S')}")
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh xem/đổi prefix của server
+    @commands.command(name='prefix')
+    @commands.guild_only()
+    async def prefix_command(self, ctx, new_prefix: str = None):
+        prefix_store = self.bot.prefix_store
+        
+        if new_prefix is None:
+            embed = discord.Embed(
+                title="🔧 PREFIX CỦA SERVER",
+                description=f"Prefix hiện tại: `{prefix_store.get(ctx.guild.id)}`",
+                color=discord.Color.blue()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        # Chỉ người có quyền Quản lý server (hoặc owner bot) mới được đổi prefix
+        if not ctx.author.guild_permissions.manage_guild and ctx.author.id != config.OWNER_ID:
+            raise commands.MissingPermissions(['manage_guild'])
+        
+        if len(new_prefix) > MAX_PREFIX_LENGTH:
+            await ctx.send(f"❌ Prefix tối đa {MAX_PREFIX_LENGTH} ký tự!")
+            return
+        
+        if new_prefix == 'reset':
+            prefix_store.reset(ctx.guild.id)
+        else:
+            prefix_store.set(ctx.guild.id, new_prefix)
+        
+        embed = discord.Embed(
+            title="✅ ĐÃ ĐỔI PREFIX",
+            description=f"Prefix mới của server: `{prefix_store.get(ctx.guild.id)}`",
+            color=discord.Color.green()
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh bật/tắt trả lời lệnh không tồn tại
+    @commands.command(name='notfound')
+    @commands.guild_only()
+    async def notfound_command(self, ctx, mode: str = None):
+        unknown_command_replies = self.bot.unknown_command_replies
+        
+        if mode is None:
+            state = "bật" if unknown_command_replies.get(ctx.guild.id) else "tắt"
+            await ctx.send(f"ℹ️ Trả lời lệnh không tồn tại đang **{state}**. Dùng `{ctx.clean_prefix}notfound on|off` để đổi")
+            return
+        
+        if not ctx.author.guild_permissions.manage_guild and ctx.author.id != config.OWNER_ID:
+            raise commands.MissingPermissions(['manage_guild'])
+        
+        if mode not in ('on', 'off'):
+            await ctx.send(f"❌ Ví dụ: `{ctx.clean_prefix}notfound off`")
+            return
+        
+        if mode == 'on':
+            unknown_command_replies.reset(ctx.guild.id)
+        else:
+            unknown_command_replies.set(ctx.guild.id, 0)
+        
+        embed = discord.Embed(
+            title="✅ ĐÃ CẬP NHẬT",
+            description=f"Trả lời lệnh không tồn tại: **{'bật' if mode == 'on' else 'tắt'}**",
+            color=discord.Color.green()
+        )
+        
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(General(bot))
+    drop_disabled_commands(bot)
+    # Dựng lại template để dùng builder của phiên bản module vừa nạp
+    bot.embed_templates.rebuild(config.PREFIX)
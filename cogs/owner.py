@@ -0,0 +1,891 @@
+"""Lệnh dành riêng cho chủ sở hữu bot."""
+import asyncio
+import datetime
+import io
+import os
+import time
+from collections import Counter
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core import config
+from core.cluster_ops import broadcast_local, cluster_broadcast, cluster_guild_index, cluster_totals, leave_guild
+from core.guild_index import SORTS
+from core.intents import drop_disabled_commands
+from core.memory import cache_sizes, format_bytes, rss_bytes
+from core.paginator import Paginator
+from core.slash import sync_app_commands
+
+SERVERS_PER_PAGE = 10
+MEMORY_TOP_GUILDS = 5
+MEMORY_REPORT_LINES = 50
+MEMORY_EMBED_LIMIT = 4000
+SORT_LABELS = {'members': "số thành viên", 'name': "tên", 'joined': "ngày tham gia"}
+
+# Xu hướng trong lệnh stats: (số liệu, nhãn, cách tóm tắt)
+TREND_METRICS = (
+    ('latency_ms', "🏓 Ping (ms)", 'avg'),
+    ('loop_lag_ms', "🐢 Trễ event loop tối đa (ms)", 'max'),
+    ('commands_per_min', "⌨️ Lệnh/phút", 'avg'),
+    ('guilds', "📊 Server", 'delta'),
+    ('members', "👥 Thành viên", 'delta'),
+)
+
+
+def format_trend(summary, kind):
+    if summary is None:
+        return "-"
+    if kind == 'delta':
+        return f"{summary['last'] - summary['first']:+.0f}"
+    if kind == 'max':
+        return f"{summary['max']:.0f}"
+    return f"{summary['avg']:.1f}" if summary['avg'] < 10 else f"{summary['avg']:.0f}"
+
+
+class Owner(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        bot.embed_templates.register('env')(self.build_env_embed)
+        bot.embed_templates.register('helpp')(self.build_owner_help_embed)
+        bot.jobs.register('broadcast', self.run_broadcast_job, self.broadcast_job_embed)
+        # Slash command của owner mặc định chỉ hiện với quản trị viên server (vẫn kiểm tra OWNER_ID khi chạy)
+        for command in self.get_commands():
+            command.app_command.default_permissions = discord.Permissions.none()
+
+    # Lệnh kiểm tra env
+    def build_env_embed(self, prefix):
+        embed = discord.Embed(
+            title="⚙️ KIỂM TRA .ENV",
+            color=discord.Color.blue()
+        )
+        
+        token_display = f"✅ Đã cấu hình ({config.TOKEN[:10]}...)" if config.TOKEN else "❌ Chưa cấu hình"
+        
+        embed.add_field(name="Token", value=token_display, inline=False)
+        embed.add_field(name="Owner ID", value=config.OWNER_ID, inline=True)
+        embed.add_field(name="Prefix", value=prefix, inline=True)
+        embed.add_field(name="Python", value=os.sys.version.split()[0], inline=True)
+        
+        return embed
+
+    @commands.hybrid_command(name='env', description="Kiểm tra cấu hình .env")
+    async def check_env(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        embed = self.bot.embed_templates.render('env', footer="Lệnh chỉ dành cho Owner")
+        
+        # Số server có prefix riêng thay đổi khi dùng lệnh prefix, không để trong template dựng sẵn
+        embed.add_field(name="Prefix riêng", value=f"{len(self.bot.prefix_store)} server", inline=True)
+        
+        # File .env có thể bị xóa/tạo lại bất kỳ lúc nào nên vẫn kiểm tra mỗi lần gọi
+        if os.path.exists('.env'):
+            embed.add_field(name="File .env", value="✅ Tồn tại", inline=True)
+        else:
+            embed.add_field(name="File .env", value="❌ Không tồn tại", inline=True)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh reload env
+    @commands.hybrid_command(name='reloadenv', description="Tải lại file .env")
+    async def reload_env(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        try:
+            # Đọc file trên thread riêng để không chặn event loop
+            changed = await asyncio.to_thread(config.reload)
+            
+            self.bot.prefix_store.default = config.PREFIX
+            self.bot.embed_templates.rebuild(config.PREFIX)
+            if 'PREFIX' in changed:
+                self.bot.presence.mark_dirty()
+            
+            embed = discord.Embed(
+                title="🔄 ĐÃ TẢI LẠI .ENV",
+                color=discord.Color.green()
+            )
+            
+            changes = []
+            if 'PREFIX' in changed:
+                changes.append("Prefix: `{}` → `{}`".format(*changed['PREFIX']))
+            if 'OWNER_ID' in changed:
+                old_owner, new_owner = changed['OWNER_ID']
+                changes.append(f"Owner ID: `{old_owner}` → `{new_owner}`")
+                self.bot.rest_cache.invalidate_user(old_owner)
+                self.bot.rest_cache.invalidate_user(new_owner)
+            
+            if changes:
+                embed.add_field(name="Thay đổi", value="\n".join(changes), inline=False)
+            else:
+                embed.description = "Không có thay đổi nào"
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="❌ LỖI TẢI LẠI .ENV",
+                description=f"```{str(e)}```",
+                color=discord.Color.red()
+            )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh help cho owner
+    def build_owner_help_embed(self, prefix):
+        embed = discord.Embed(
+            title="🔑 HƯỚNG DẪN LỆNH OWNER",
+            description="Các lệnh dành riêng cho chủ sở hữu",
+            color=discord.Color.gold()
+        )
+        
+        embed.add_field(
+            name="⚙️ Quản lý bot",
+            value=(
+                f"`{prefix}helpp` - Hiển thị hướng dẫn này\n"
+                f"`{prefix}shutdown` - Tắt bot\n"
+                f"`{prefix}reload [module|all]` - Nạp lại code lệnh, không ngắt kết nối\n"
+                f"`{prefix}servers [sắp xếp] [tên]` - Hiển thị danh sách server\n"
+                f"`{prefix}leave [server_id]` - Rời khỏi server\n"
+                f"`{prefix}status [trạng thái|auto]` - Đổi trạng thái bot"
+            ),
+            inline=False
+        )
+        
+        embed.add_field(
+            name="📊 Thống kê",
+            value=(
+                f"`{prefix}stats` - Thống kê chi tiết\n"
+                f"`{prefix}metrics` - Độ trễ và lưu lượng theo lệnh\n"
+                f"`{prefix}http` - Connection pool và rate limit theo route\n"
+                f"`{prefix}memory [guilds|start|snapshot|diff|stop]` - Bộ nhớ, cache và snapshot tracemalloc\n"
+                f"`{prefix}broadcast [tin nhắn]` - Gửi tin nhắn đến tất cả server (job nền)\n"
+                f"`{prefix}jobs` - Xem các job nền\n"
+                f"`{prefix}cancel [mã job]` - Hủy job đang chạy"
+            ),
+            inline=False
+        )
+        
+        return embed
+
+    @commands.hybrid_command(name='helpp', description="Hướng dẫn lệnh owner")
+    async def owner_help(self, ctx):
+        # Kiểm tra owner
+        if ctx.author.id != config.OWNER_ID:
+            embed = discord.Embed(
+                title="❌ LỖI",
+                description="Bạn không có quyền sử dụng lệnh này!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        embed = self.bot.embed_templates.render(
+            'helpp',
+            prefix=ctx.clean_prefix,
+            footer=f"Chủ sở hữu: {ctx.author}",
+            footer_icon=ctx.author.avatar.url if ctx.author.avatar else None,
+            timestamp=True
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh tắt bot
+    @commands.hybrid_command(description="Tắt bot")
+    async def shutdown(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        embed = discord.Embed(
+            title="🔌 ĐANG TẮT BOT...",
+            description="Bot đang ngừng hoạt động",
+            color=discord.Color.red()
+        )
+        
+        running = self.bot.jobs.running
+        if running:
+            # Job đang chạy được lưu checkpoint khi tắt và chạy tiếp ở lần khởi động sau
+            embed.add_field(
+                name="📋 Job đang chạy",
+                value=", ".join(f"`{job.id}` {job.kind}" for job in running) + "\nSẽ chạy tiếp khi bot khởi động lại",
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+        await self.bot.close()
+
+    # Lệnh nạp lại code lệnh (extension) mà không khởi động lại tiến trình
+    @commands.hybrid_command(description="Nạp lại code lệnh, không ngắt kết nối")
+    @app_commands.describe(extension="Tên module (general, owner, errors) hoặc all")
+    async def reload(self, ctx, extension: str = 'all'):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        # Nạp lại module rồi sync slash command nếu cây lệnh đổi
+        await ctx.defer()
+        
+        if extension == 'all':
+            names = list(self.bot.extensions)
+        else:
+            names = [extension if '.' in extension else f'cogs.{extension}']
+        
+        # Trạng thái (bộ đếm, cache, kết nối gateway) nằm trên bot và trong core/ nên không bị mất.
+        # reload_extension tự khôi phục module cũ nếu bản mới lỗi khi import/setup.
+        lines = []
+        failed = False
+        for name in names:
+            started = time.perf_counter()
+            try:
+                await self.bot.reload_extension(name)
+            except commands.ExtensionError as e:
+                failed = True
+                cause = e.__cause__ or e
+                lines.append(f"❌ `{name}`: {type(cause).__name__}: {cause}")
+            else:
+                lines.append(f"✅ `{name}` ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        
+        # Tham số/mô tả lệnh có thể đã đổi; chỉ gọi API khi hash cây lệnh khác lần sync trước
+        synced = await sync_app_commands(self.bot)
+        if synced is not None:
+            lines.append(f"🔁 Đã sync {synced} slash command")
+        
+        embed = discord.Embed(
+            title="⚠️ NẠP LẠI CÓ LỖI (đã giữ bản cũ)" if failed else "✅ ĐÃ NẠP LẠI",
+            description="\n".join(lines) or "Không có module nào",
+            color=discord.Color.orange() if failed else discord.Color.green()
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh hiển thị servers
+    @commands.hybrid_command(description="Danh sách server của bot")
+    @app_commands.describe(sort="Sắp xếp theo members, name hoặc joined", name_filter="Lọc theo tên server")
+    async def servers(self, ctx, sort: str = 'members', *, name_filter: str = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        # Gom danh sách server từ cả cluster có thể lâu hơn hạn 3 giây của slash command
+        await ctx.defer()
+        
+        # Cho phép bỏ qua kiểu sắp xếp: `servers abc` lọc theo tên "abc"
+        if sort not in SORTS:
+            name_filter = f"{sort} {name_filter}" if name_filter else sort
+            sort = 'members'
+        
+        index = await cluster_guild_index(self.bot)
+        # Chụp lại entry ngay lúc gọi: bot có thể rời server trong lúc trang vẫn đang mở
+        entries = [index.get(guild_id) for guild_id in index.query(sort, name_filter)]
+        page_count = (len(entries) + SERVERS_PER_PAGE - 1) // SERVERS_PER_PAGE
+        
+        description = f"Bot đang ở trong {len(index)} server · sắp xếp theo {SORT_LABELS[sort]}"
+        if name_filter:
+            description += f"\n🔍 Lọc `{name_filter}`: {len(entries)} kết quả"
+        
+        def render(page):
+            embed = discord.Embed(
+                title="🌐 DANH SÁCH SERVER",
+                description=description,
+                color=discord.Color.blue()
+            )
+            
+            start = page * SERVERS_PER_PAGE
+            for i, entry in enumerate(entries[start:start + SERVERS_PER_PAGE], start + 1):
+                embed.add_field(
+                    name=f"{i}. {entry.name or '(không khả dụng)'}",
+                    value=f"ID: {entry.id}\nThành viên: {entry.member_count}",
+                    inline=False
+                )
+            
+            embed.set_footer(text=f"Trang {page + 1}/{max(page_count, 1)} · {ctx.clean_prefix}servers [members|name|joined] [tên]")
+            return embed
+        
+        await Paginator(render, page_count, ctx.author.id).start(ctx)
+
+    # Lệnh rời server
+    @commands.hybrid_command(description="Rời khỏi server")
+    @app_commands.describe(server_id="ID server cần rời")
+    async def leave(self, ctx, server_id: str = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        # Nhận chuỗi vì ID server vượt giới hạn số nguyên của slash command
+        if not server_id or not server_id.isdigit():
+            await ctx.send(f"❌ Vui lòng cung cấp ID server! Ví dụ: `{ctx.clean_prefix}leave 1234567890`")
+            return
+        server_id = int(server_id)
+        
+        cluster = self.bot.cluster
+        try:
+            if cluster is None:
+                guild_name = await leave_guild(self.bot, server_id)
+            else:
+                # Chuyển lệnh tới tiến trình sở hữu shard của server này
+                results = await cluster.request('leave', {'guild_id': server_id}, target={'guild': server_id})
+                guild_name = None
+                for result in results:
+                    if not result['ok']:
+                        raise RuntimeError(result['error'])
+                    guild_name = result['data']
+            
+            if not guild_name:
+                await ctx.send("❌ Không tìm thấy server với ID này!")
+                return
+            
+            embed = discord.Embed(
+                title="✅ ĐÃ RỜI SERVER",
+                description=f"Đã rời khỏi server: **{guild_name}**",
+                color=discord.Color.green()
+            )
+            await ctx.send(embed=embed)
+        except Exception as e:
+            embed = discord.Embed(
+                title="❌ LỖI",
+                description=f"Không thể rời server: {str(e)}",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+
+    def _presence_eta(self):
+        # Presence được gửi cách nhau ít nhất PRESENCE_INTERVAL giây để tránh rate limit
+        delay = self.bot.presence.next_update_in()
+        return "áp dụng ngay" if delay < 1 else f"áp dụng sau khoảng {delay:.0f} giây"
+
+    # Lệnh đổi trạng thái
+    @commands.hybrid_command(description="Đổi trạng thái bot")
+    @app_commands.describe(status_type="Nội dung trạng thái, hoặc auto để hiển thị số server")
+    async def status(self, ctx, *, status_type: str = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        if not status_type:
+            await ctx.send(f"❌ Vui lòng chọn trạng thái! Ví dụ: `{ctx.clean_prefix}status playing game`")
+            return
+        
+        # Trả về trạng thái tự động (số server)
+        if status_type == 'auto':
+            self.bot.presence.clear_override()
+            await ctx.send(f"✅ Đã chuyển về trạng thái tự động, {self._presence_eta()}")
+            return
+        
+        # Phân loại trạng thái
+        if status_type.startswith("playing"):
+            activity = discord.Activity(type=discord.ActivityType.playing, name=status_type[8:])
+        elif status_type.startswith("watching"):
+            activity = discord.Activity(type=discord.ActivityType.watching, name=status_type[9:])
+        elif status_type.startswith("listening"):
+            activity = discord.Activity(type=discord.ActivityType.listening, name=status_type[10:])
+        elif status_type.startswith("streaming"):
+            activity = discord.Activity(type=discord.ActivityType.streaming, name=status_type[10:])
+        else:
+            activity = discord.Activity(type=discord.ActivityType.playing, name=status_type)
+        
+        # Giữ trạng thái này cho tới khi gọi `status auto`, cập nhật số server không ghi đè lên nó
+        presence = self.bot.presence
+        eta = "trạng thái này đang được hiển thị" if presence.is_showing(activity) else self._presence_eta()
+        presence.set_override(activity)
+        
+        embed = discord.Embed(
+            title="✅ ĐÃ ĐỔI TRẠNG THÁI",
+            description=(
+                f"Trạng thái mới: **{status_type}** ({eta})\n"
+                f"Dùng `{ctx.clean_prefix}status auto` để trở về trạng thái tự động"
+            ),
+            color=discord.Color.green()
+        )
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh thống kê chi tiết
+    @commands.hybrid_command(description="Thống kê chi tiết")
+    async def stats(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        # Slash command phải trả lời trong 3 giây; lệnh này gọi cluster và SQLite nên defer trước
+        await ctx.defer()
+        
+        bot = self.bot
+        totals = await cluster_totals(bot)
+        total_members = totals['members']
+        total_bots = totals['bots']
+        total_humans = totals['humans']
+        
+        embed = discord.Embed(
+            title="📈 THỐNG KÊ CHI TIẾT",
+            description="Thống kê toàn bộ hoạt động của bot",
+            color=discord.Color.purple(),
+            timestamp=datetime.datetime.now()
+        )
+        
+        # Tổng quan
+        embed.add_field(name="📊 Tổng số server", value=totals['guilds'], inline=True)
+        # Không có intent members (unprivileged/slash, serverinfo bị tắt) thì bộ đếm không nhận join/leave
+        total_approx = "" if bot.intents.members else " (ước tính)"
+        embed.add_field(name="👥 Tổng thành viên", value=f"{total_members}{total_approx}", inline=True)
+        # Ở chế độ lazy chỉ các guild đã chunk mới có số bot chính xác
+        approx = " (ước tính)" if bot.member_cache.lazy or not bot.intents.members else ""
+        embed.add_field(name="🤖 Tổng bot", value=f"{total_bots}{approx}", inline=True)
+        embed.add_field(name="👤 Tổng người dùng", value=f"{total_humans}{approx}", inline=True)
+        
+        # Ping
+        embed.add_field(name="🏓 Ping", value=f"{round(bot.latency * 1000)}ms", inline=True)
+        
+        # Event loop (khác với ping gateway): độ trễ gần đây và lần bị chặn gần nhất
+        loop = bot.watchdog.summary()
+        loop_text = (
+            f"p50 {loop['p50'] * 1000:.1f}ms · p99 {loop['p99'] * 1000:.1f}ms · max {loop['max'] * 1000:.0f}ms\n"
+            f"Bị chặn: {loop['stalls']} lần"
+        )
+        if loop['last_stall']:
+            at, duration, label = loop['last_stall']
+            loop_text += f" · gần nhất {duration * 1000:.0f}ms ({label}, {datetime.datetime.fromtimestamp(at).strftime('%d/%m %H:%M')})"
+        embed.add_field(name="🐢 Event loop", value=loop_text, inline=False)
+        
+        # Uptime
+        uptime_duration = datetime.datetime.now() - bot.start_time
+        days = uptime_duration.days
+        hours, remainder = divmod(uptime_duration.seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        embed.add_field(
+            name="⏰ Uptime", 
+            value=f"{days}d {hours}h {minutes}m {seconds}s",
+            inline=True
+        )
+        
+        # Thông tin bot
+        embed.add_field(name="💻 Python version", value="3.8+", inline=True)
+        embed.add_field(name="📚 Discord.py", value=discord.__version__, inline=True)
+        
+        # Xu hướng từ lịch sử số liệu (mỗi cửa sổ đọc từ tầng đã gộp sẵn)
+        windows = ('1h', '24h', '7d')
+        trends = await bot.metrics_history.trends(windows)
+        embed.add_field(
+            name="📉 Xu hướng (1h · 24h · 7d)",
+            value="\n".join(
+                f"{label}: " + " · ".join(format_trend(trends[w].get(metric), kind) for w in windows)
+                for metric, label, kind in TREND_METRICS
+            ),
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Chủ sở hữu: {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh xem số liệu theo lệnh
+    @commands.hybrid_command(description="Độ trễ và lưu lượng theo lệnh")
+    async def metrics(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        admission = self.bot.admission
+        error_throttle = self.bot.error_throttle
+        
+        embed = discord.Embed(
+            title="📈 SỐ LIỆU THEO LỆNH",
+            description="Sắp xếp theo số lần gọi (độ trễ tính bằng ms)",
+            color=discord.Color.purple(),
+            timestamp=datetime.datetime.now()
+        )
+        
+        top = self.bot.command_metrics.top(limit=15)
+        if not top:
+            embed.description = "Chưa có lệnh nào được gọi"
+        
+        for name, stats in top:
+            latency = stats.latency
+            http_avg = stats.http_seconds / stats.calls * 1000 if stats.calls else 0
+            embed.add_field(
+                name=f"{ctx.clean_prefix}{name}",
+                value=(
+                    f"Gọi: **{stats.calls}** · Lỗi: **{stats.errors}**\n"
+                    f"p50 {latency.percentile(0.5) * 1000:.0f} · "
+                    f"p95 {latency.percentile(0.95) * 1000:.0f} · "
+                    f"p99 {latency.percentile(0.99) * 1000:.0f}\n"
+                    f"HTTP TB: {http_avg:.0f}ms ({stats.http_calls} request)"
+                ),
+                inline=True
+            )
+        
+        embed.add_field(
+            name="🚦 Giới hạn lệnh",
+            value=(
+                f"Nhận: **{admission.admitted}** · "
+                f"Chờ: **{sum(admission.queued.values())}** · "
+                f"Từ chối: **{sum(admission.shed.values())}**"
+            ),
+            inline=False
+        )
+        
+        if error_throttle.suppressed:
+            embed.add_field(
+                name="🔇 Lỗi không trả lời",
+                value="\n".join(f"`{kind}`: {count}" for kind, count in error_throttle.suppressed.most_common()),
+                inline=False
+            )
+        
+        embed.set_footer(text=f"Chủ sở hữu: {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh xem HTTP tới Discord: thời gian request thật so với thời gian chờ rate limit
+    @commands.hybrid_command(name='http', description="Connection pool và rate limit theo route")
+    async def http_stats(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        stats = self.bot.http_stats
+        totals = stats.totals()
+        
+        embed = discord.Embed(
+            title="🌐 HTTP DISCORD",
+            description="Chờ = thời gian nằm đợi bucket/global reset và ngủ sau 429 (không tính thời gian mạng)",
+            color=discord.Color.purple(),
+            timestamp=datetime.datetime.now()
+        )
+        
+        limit = stats.limit or "không giới hạn"
+        per_host = stats.limit_per_host or "không giới hạn"
+        embed.add_field(
+            name="🔌 Connection pool",
+            value=(
+                f"Giới hạn: **{limit}** · Mỗi host: **{per_host}** · Keep-alive: **{stats.keepalive:g}s**\n"
+                f"Tạo mới: **{stats.connections_created}** · Dùng lại: **{stats.connections_reused}**\n"
+                f"Chờ pool: **{stats.pool_waits}** lần ({stats.pool_wait_seconds:.2f}s)"
+            ),
+            inline=False
+        )
+        
+        scopes = ", ".join(f"{scope}: {count}" for scope, count in stats.rate_limit_scopes.items())
+        embed.add_field(
+            name="📊 Tổng",
+            value=(
+                f"Lời gọi: **{totals['requests']}** · Request thật: **{totals['attempts']}**\n"
+                f"HTTP: **{totals['http_seconds']:.2f}s** · Chờ rate limit: **{totals['wait_seconds']:.2f}s**\n"
+                f"429: **{totals['rate_limited']}**" + (f" ({scopes})" if scopes else "")
+            ),
+            inline=False
+        )
+        
+        for route, route_stats in stats.top(limit=10):
+            if route_stats.remaining is not None:
+                bucket = f"{route_stats.remaining:g}/{route_stats.limit:g}, reset {route_stats.reset_after or 0:.1f}s"
+            else:
+                bucket = "không có header"
+            http_avg = route_stats.http_seconds / route_stats.attempts * 1000 if route_stats.attempts else 0
+            embed.add_field(
+                name=route[:256],
+                value=(
+                    f"Gọi: **{route_stats.requests}** · 429: **{route_stats.rate_limited}** · Lỗi: **{route_stats.errors}**\n"
+                    f"HTTP TB: {http_avg:.0f}ms · Chờ: {route_stats.wait_seconds:.2f}s\n"
+                    f"Bucket: {bucket} · Hết lượt: {route_stats.exhausted}"
+                ),
+                inline=True
+            )
+        
+        if not stats.routes:
+            embed.add_field(name="Route", value="Chưa có request nào", inline=False)
+        
+        embed.set_footer(text=f"Chủ sở hữu: {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh xem bộ nhớ: cache gateway, message cache và snapshot tracemalloc
+    async def send_report(self, ctx, title, lines, filename, color):
+        """Gửi báo cáo dạng văn bản; quá giới hạn embed thì embed chỉ giữ các dòng đầu, bản đầy đủ gửi thành file."""
+        text = "\n".join(lines) or "(trống)"
+        if len(text) + 8 <= MEMORY_EMBED_LIMIT:
+            await ctx.send(embed=discord.Embed(title=title, description=f"```\n{text}\n```", color=color))
+            return
+        shown, size = [], 0
+        for line in lines:
+            size += len(line) + 1
+            if size + 8 > MEMORY_EMBED_LIMIT - 100:
+                break
+            shown.append(line)
+        embed = discord.Embed(
+            title=title,
+            description="```\n{}\n```\nĐủ {} dòng trong file đính kèm".format("\n".join(shown), len(lines)),
+            color=color
+        )
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(text.encode('utf-8')), filename=filename))
+
+    def build_memory_embed(self):
+        bot = self.bot
+        sizes = cache_sizes(bot)
+        tracer = bot.memory_tracer
+        
+        embed = discord.Embed(
+            title="🧠 BỘ NHỚ",
+            description=f"RSS: **{format_bytes(rss_bytes())}**",
+            color=discord.Color.purple(),
+            timestamp=datetime.datetime.now()
+        )
+        embed.add_field(
+            name="📦 Cache gateway",
+            value=(
+                f"Server: **{len(sizes['guilds'])}** · User: **{sizes['users']}**\n"
+                f"Thành viên: **{sizes['members']}** · Kênh: **{sizes['channels']}**\n"
+                f"Role: **{sizes['roles']}** · Emoji: **{sizes['emojis']}**\n"
+                f"Tin nhắn: **{sizes['messages']}**/{sizes['max_messages']}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="🗂️ Cache của bot",
+            value=(
+                f"Bộ đếm thành viên: **{bot.member_stats.guild_count}** server\n"
+                f"Chỉ mục server: **{len(bot.guild_index)}** · Snapshot serverinfo: **{len(bot.guild_snapshots)}**\n"
+                f"REST cache: **{len(bot.rest_cache.users)}** user · **{len(bot.rest_cache.channels)}** kênh"
+            ),
+            inline=False
+        )
+        
+        top = sizes['guilds'][:MEMORY_TOP_GUILDS]
+        if top:
+            embed.add_field(
+                name=f"🏆 Top {len(top)} server theo thành viên đã cache",
+                value="\n".join(
+                    f"**{guild.name[:30]}**: {members} tv · {channels} kênh · {roles} role · {emojis} emoji"
+                    for guild, members, channels, roles, emojis in top
+                ),
+                inline=False
+            )
+        
+        if tracer.tracing:
+            current, peak = tracer.traced()
+            ids = ", ".join(f"#{i}" for i in tracer.snapshots) or "chưa có"
+            trace_text = f"Đang bật · theo dõi {format_bytes(current)} (đỉnh {format_bytes(peak)})\nSnapshot: {ids}"
+        else:
+            trace_text = "Đang tắt"
+        embed.add_field(name="🔬 tracemalloc", value=trace_text, inline=False)
+        return embed
+
+    @commands.hybrid_command(description="Bộ nhớ, cache và snapshot tracemalloc")
+    @app_commands.describe(action="guilds, start, snapshot, diff hoặc stop", first="Snapshot cũ (diff)", second="Snapshot mới (diff)")
+    async def memory(self, ctx, action: str = None, first: int = None, second: int = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        # Chụp snapshot tracemalloc có thể mất vài giây
+        await ctx.defer()
+        
+        tracer = self.bot.memory_tracer
+        action = (action or '').lower()
+        
+        if not action:
+            await ctx.send(embed=self.build_memory_embed())
+        
+        elif action == 'guilds':
+            lines = [f"{'thành viên':>10} {'kênh':>6} {'role':>6} {'emoji':>6}  server"]
+            lines += [
+                f"{members:>10} {channels:>6} {roles:>6} {emojis:>6}  {guild.name} ({guild.id})"
+                for guild, members, channels, roles, emojis in cache_sizes(self.bot)['guilds']
+            ]
+            await self.send_report(ctx, "📦 CACHE THEO SERVER", lines, 'guild_caches.txt', discord.Color.purple())
+        
+        elif action == 'start':
+            started = tracer.start()
+            await ctx.send(
+                f"🔬 Đã bật tracemalloc ({tracer.frames} frame). Dùng `{ctx.clean_prefix}memory snapshot` để chụp."
+                if started else "ℹ️ tracemalloc đang bật rồi"
+            )
+        
+        elif action == 'stop':
+            stopped = tracer.stop()
+            await ctx.send("🔬 Đã tắt tracemalloc và xóa các snapshot" if stopped else "ℹ️ tracemalloc đang tắt")
+        
+        elif action == 'snapshot':
+            if not tracer.tracing:
+                await ctx.send(f"❌ tracemalloc đang tắt, dùng `{ctx.clean_prefix}memory start` trước")
+                return
+            # Chụp và thống kê trên thread riêng để không chặn event loop quá lâu
+            snapshot_id = await asyncio.to_thread(tracer.take)
+            lines, total = await asyncio.to_thread(tracer.top, snapshot_id, MEMORY_REPORT_LINES)
+            lines.insert(0, f"Tổng: {format_bytes(total)}")
+            await self.send_report(
+                ctx, f"🔬 SNAPSHOT #{snapshot_id}: CẤP PHÁT LỚN NHẤT", lines,
+                f'snapshot_{snapshot_id}.txt', discord.Color.blue()
+            )
+        
+        elif action == 'diff':
+            ids = list(tracer.snapshots)
+            if first is None and second is None and len(ids) >= 2:
+                first, second = ids[-2], ids[-1]
+            elif second is None and first is not None and ids:
+                second = ids[-1]
+            if first not in tracer.snapshots or second not in tracer.snapshots:
+                await ctx.send(f"❌ Cần hai snapshot có sẵn (hiện có: {', '.join(f'#{i}' for i in ids) or 'không có'})")
+                return
+            lines, total = await asyncio.to_thread(tracer.diff, first, second, MEMORY_REPORT_LINES)
+            lines.insert(0, f"Thay đổi tổng: {'+' if total >= 0 else '-'}{format_bytes(abs(total))}")
+            await self.send_report(
+                ctx, f"🔬 SO SÁNH SNAPSHOT #{first} → #{second}", lines,
+                f'snapshot_{first}_{second}.txt', discord.Color.blue()
+            )
+        
+        else:
+            await ctx.send(f"❌ Dùng: `{ctx.clean_prefix}memory [guilds|start|snapshot|diff [a] [b]|stop]`")
+
+    # Lệnh broadcast (chạy như job nền, có checkpoint để chạy tiếp sau khi khởi động lại)
+    def broadcast_job_embed(self, job):
+        state = job.checkpoint
+        finished = job.finished
+        titles = {
+            'running': "📤 ĐANG BROADCAST...",
+            'done': "📤 KẾT QUẢ BROADCAST",
+            'failed': "❌ BROADCAST LỖI",
+            'cancelled': "⏹️ ĐÃ HỦY BROADCAST"
+        }
+        progress = discord.Embed(
+            title=titles[job.state],
+            color=discord.Color.green() if job.state == 'done' else discord.Color.orange()
+        )
+        done = state.get('sent', 0) + state.get('failed', 0) + state.get('skipped', 0)
+        progress.add_field(name="✅ Gửi thành công", value=state.get('sent', 0), inline=True)
+        progress.add_field(name="❌ Gửi thất bại", value=state.get('failed', 0), inline=True)
+        progress.add_field(name="⏭️ Bỏ qua", value=state.get('skipped', 0), inline=True)
+        progress.add_field(name="📊 Tổng server", value=f"{done}/{state.get('total', '?')}", inline=True)
+        progress.add_field(name="⏱️ Thời gian", value=f"{time.time() - job.created:.1f}s", inline=True)
+        reasons = Counter(state.get('reasons', {}))
+        if finished and reasons:
+            progress.add_field(
+                name="📋 Lý do",
+                value="\n".join(f"`{reason}`: {count}" for reason, count in reasons.most_common(5)),
+                inline=False
+            )
+        if job.error:
+            progress.add_field(name="⚠️ Lỗi", value=f"```{job.error}```", inline=False)
+        progress.set_footer(text=f"Job {job.id} · {config.PREFIX}cancel {job.id} để hủy" if not finished else f"Job {job.id}")
+        return progress
+
+    async def run_broadcast_job(self, job):
+        bot = self.bot
+        embed = discord.Embed.from_dict(job.payload['embed'])
+        state = job.checkpoint
+        for key in ('sent', 'failed', 'skipped'):
+            state.setdefault(key, 0)
+        state.setdefault('reasons', {})
+        done = state.setdefault('done', [])
+        handled = set(done)
+        
+        def record(guild_id, outcome, reason):
+            # Một kết quả có thể tới hai lần nếu cluster không nhận được xác nhận của lần báo trước
+            if guild_id in handled:
+                return
+            handled.add(guild_id)
+            done.append(guild_id)
+            state[outcome] += 1
+            if reason:
+                state['reasons'][reason] = state['reasons'].get(reason, 0) + 1
+        
+        if bot.cluster is None:
+            state.setdefault('total', len(bot.guilds))
+            
+            async def on_progress(result):
+                await bot.jobs.report(job)
+            
+            await broadcast_local(
+                bot,
+                embed,
+                on_progress=on_progress,
+                exclude=done,
+                on_result=lambda guild, outcome, reason: record(guild.id, outcome, reason)
+            )
+            return
+        
+        # Mỗi cluster gửi tới các server của mình và báo dần kết quả về đây,
+        # nên tiến độ và checkpoint được cập nhật trong lúc chạy
+        if 'total' not in state:
+            state['total'] = (await cluster_totals(bot))['guilds']
+        
+        async def on_results(results):
+            for guild_id, outcome, reason in results:
+                record(guild_id, outcome, reason)
+            await bot.jobs.report(job)
+        
+        for cluster_id, error in await cluster_broadcast(bot, job.id, embed, done, on_results):
+            reason = f"cluster {cluster_id}: {error}"
+            state['reasons'][reason] = state['reasons'].get(reason, 0) + 1
+
+    @commands.hybrid_command(description="Gửi tin nhắn đến tất cả server (job nền)")
+    @app_commands.describe(message="Nội dung tin nhắn")
+    async def broadcast(self, ctx, *, message: str = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        if not message:
+            await ctx.send(f"❌ Vui lòng nhập tin nhắn! Ví dụ: `{ctx.clean_prefix}broadcast Xin chào mọi người!`")
+            return
+        
+        bot = self.bot
+        embed = discord.Embed(
+            title="📢 THÔNG BÁO TỪ CHỦ SỞ HỮU",
+            description=message,
+            color=discord.Color.blue(),
+            timestamp=datetime.datetime.now()
+        )
+        
+        embed.set_footer(text=f"Bot: {bot.user.name}", icon_url=bot.user.avatar.url if bot.user.avatar else None)
+        
+        # Trả về ngay; tiến độ được cập nhật trên tin nhắn trạng thái của job (với slash đây là câu trả lời interaction)
+        await bot.jobs.submit('broadcast', {'embed': embed.to_dict()}, ctx.send)
+
+    # Lệnh xem job nền
+    @commands.hybrid_command(description="Xem các job nền")
+    async def jobs(self, ctx):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        icons = {'running': "⏳", 'done': "✅", 'failed': "❌", 'cancelled': "⏹️"}
+        recent = sorted(self.bot.jobs.jobs.values(), key=lambda job: job.created, reverse=True)[:10]
+        
+        embed = discord.Embed(
+            title="📋 JOB NỀN",
+            description="\n".join(
+                f"{icons[job.state]} `{job.id}` {job.kind} · {job.state} · "
+                f"{datetime.datetime.fromtimestamp(job.created).strftime('%d/%m %H:%M')}"
+                for job in recent
+            ) or "Chưa có job nào",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"{ctx.clean_prefix}cancel [mã job] để hủy job đang chạy")
+        
+        await ctx.send(embed=embed)
+
+    # Lệnh hủy job nền
+    @commands.hybrid_command(description="Hủy job đang chạy")
+    @app_commands.describe(job_id="Mã job")
+    async def cancel(self, ctx, job_id: str = None):
+        if ctx.author.id != config.OWNER_ID:
+            await ctx.send("❌ Bạn không có quyền sử dụng lệnh này!")
+            return
+        
+        if not job_id:
+            await ctx.send(f"❌ Vui lòng cung cấp mã job! Xem bằng `{ctx.clean_prefix}jobs`")
+            return
+        
+        job = self.bot.jobs.cancel(job_id)
+        if job is None:
+            await ctx.send("❌ Không có job đang chạy với mã này!")
+            return
+        
+        await ctx.send(f"⏹️ Đã hủy job `{job.id}` ({job.kind})")
+
+async def setup(bot):
+    await bot.add_cog(Owner(bot))
+    drop_disabled_commands(bot)
+    bot.embed_templates.rebuild(config.PREFIX)
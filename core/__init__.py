@@ -0,0 +1 @@
+"""Các thành phần dùng chung của bot (lập lịch gửi, bộ đếm, cache...)."""
@@ -0,0 +1,148 @@
+"""Kiểm soát lượng lệnh được nhận (admission control).
+
+Mỗi lệnh tốn một số token (theo trọng số của lệnh) từ ba bucket: người dùng,
+server và toàn cục. Nếu thiếu token nhưng chỉ cần chờ ngắn (<= ``max_wait``)
+thì lệnh được xếp hàng chờ; chờ lâu hơn thì lệnh bị từ chối. Các lệnh nặng còn
+bị giới hạn số lượt chạy đồng thời, với hàng chờ có giới hạn.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from discord.ext import commands
+
+
+class AdmissionRejected(commands.CommandError):
+    """Lệnh bị từ chối vì vượt giới hạn; ``retry_after`` là số giây nên chờ (nếu biết)."""
+
+    def __init__(self, scope, retry_after=None):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f'Vượt giới hạn {scope}')
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        """Số giây cần chờ để có đủ ``cost`` token (0 nếu đủ ngay)."""
+        self.refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        if cost > self.capacity:
+            return float('inf')
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    def __init__(self, user=(1.0, 5), guild=(5.0, 20), global_=(50.0, 100), costs=None, default_cost=1,
+                 max_wait=2.0, concurrency=None, queue_limit=20, max_keys=10000):
+        self.limits = {'user': user, 'guild': guild, 'global': global_}
+        self.costs = costs or {}
+        self.default_cost = default_cost
+        self.max_wait = max_wait
+        self.queue_limit = queue_limit
+        self.max_keys = max_keys
+        self._buckets = {'user': {}, 'guild': {}, 'global': {}}
+        self._slots = {name: asyncio.Semaphore(limit) for name, limit in (concurrency or {}).items()}
+        self._waiting = Counter()
+        self.admitted = 0
+        self.queued = Counter()
+        self.shed = Counter()
+
+    def cost(self, name):
+        return self.costs.get(name, self.default_cost)
+
+    def _bucket(self, scope, key, now):
+        buckets = self._buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.max_keys:
+                self._prune(buckets, now)
+            rate, capacity = self.limits[scope]
+            bucket = buckets[key] = TokenBucket(rate, capacity, now)
+        return bucket
+
+    @staticmethod
+    def _prune(buckets, now):
+        # Bucket đã đầy lại giống hệt bucket mới nên có thể bỏ
+        stale = []
+        for key, bucket in buckets.items():
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                stale.append(key)
+        for key in stale:
+            del buckets[key]
+
+    async def admit(self, name, user_id, guild_id):
+        """Lấy token cho một lệnh; chờ nếu ngắn, ngược lại raise ``AdmissionRejected``."""
+        cost = self.cost(name)
+        waited = False
+        while True:
+            now = time.monotonic()
+            buckets = [('user', self._bucket('user', user_id, now)), ('global', self._bucket('global', None, now))]
+            if guild_id is not None:
+                buckets.insert(1, ('guild', self._bucket('guild', guild_id, now)))
+
+            scope, wait = max(((scope, bucket.wait_time(cost, now)) for scope, bucket in buckets), key=lambda x: x[1])
+            if wait == 0:
+                for _, bucket in buckets:
+                    bucket.tokens -= cost
+                self.admitted += 1
+                return
+            if wait > self.max_wait:
+                self.shed[scope] += 1
+                raise AdmissionRejected(scope, wait)
+            if not waited:
+                self.queued[scope] += 1
+                waited = True
+            await asyncio.sleep(wait)
+
+    async def enter(self, name):
+        """Giữ một lượt chạy cho lệnh nặng; trả về True nếu cần gọi ``leave``."""
+        slots = self._slots.get(name)
+        if slots is None:
+            return False
+        if slots.locked():
+            if self._waiting[name] >= self.queue_limit:
+                self.shed['concurrency'] += 1
+                raise AdmissionRejected('concurrency')
+            self.queued['concurrency'] += 1
+        self._waiting[name] += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.shed['concurrency'] += 1
+            raise AdmissionRejected('concurrency') from None
+        finally:
+            self._waiting[name] -= 1
+        return True
+
+    def leave(self, name):
+        self._slots[name].release()
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP bot_admission_admitted_total Số lệnh được nhận.',
+            '# TYPE bot_admission_admitted_total counter',
+            f'bot_admission_admitted_total {self.admitted}',
+            '# HELP bot_admission_queued_total Số lệnh phải chờ trước khi được nhận.',
+            '# TYPE bot_admission_queued_total counter',
+        ]
+        lines += [f'bot_admission_queued_total{{scope="{scope}"}} {count}' for scope, count in self.queued.items()]
+        lines += [
+            '# HELP bot_admission_shed_total Số lệnh bị từ chối.',
+            '# TYPE bot_admission_shed_total counter',
+        ]
+        lines += [f'bot_admission_shed_total{{scope="{scope}"}} {count}' for scope, count in self.shed.items()]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,104 @@
+"""Cache bất đồng bộ cho các lệnh gọi REST (fetch_user, fetch_channel...).
+
+Mỗi entry có TTL, cache bị giới hạn kích thước theo LRU và các lần miss đồng
+thời cho cùng một key chỉ tạo ra đúng một request (single-flight).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class AsyncTTLCache:
+    def __init__(self, maxsize=1024, ttl=600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        """Trả về giá trị trong cache, hoặc gọi ``await fetch()`` một lần duy nhất cho mọi lần miss đồng thời."""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Tránh cảnh báo "exception was never retrieved" khi không có ai chờ
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+
+class RestCache:
+    """Tra cứu user/kênh: cache gateway trước, sau đó cache TTL, cuối cùng mới gọi REST."""
+
+    def __init__(self, bot, maxsize=1024, ttl=600.0):
+        self.bot = bot
+        self.users = AsyncTTLCache(maxsize, ttl)
+        self.channels = AsyncTTLCache(maxsize, ttl)
+
+    async def user(self, user_id):
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+        return await self.users.get_or_fetch(user_id, lambda: self.bot.fetch_user(user_id))
+
+    async def channel(self, channel_id):
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            return channel
+        return await self.channels.get_or_fetch(channel_id, lambda: self.bot.fetch_channel(channel_id))
+
+    def invalidate_user(self, user_id):
+        self.users.invalidate(user_id)
+
+    def clear(self):
+        self.users.clear()
+        self.channels.clear()
@@ -0,0 +1,237 @@
+"""IPC giữa các tiến trình cluster qua Unix socket.
+
+Launcher chạy ``ClusterHub``; mỗi tiến trình bot kết nối bằng ``ClusterClient``.
+Giao thức là JSON theo từng dòng:
+
+- ``hello``: client báo cluster_id và các shard mình sở hữu.
+- ``request``: gửi tới hub kèm ``target`` là ``"all"``, một cluster_id, hoặc
+  ``{"guild": id}`` để hub chuyển tới cluster sở hữu guild đó.
+- ``reply``: câu trả lời của một cluster cho một request được hub chuyển tới.
+- ``response``: hub gom mọi reply và trả về cho bên gửi.
+"""
+import asyncio
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dòng JSON có thể rất dài (danh sách hàng nghìn guild)
+STREAM_LIMIT = 2 ** 24
+
+
+def shard_ranges(shard_count, cluster_count):
+    """Chia ``shard_count`` shard thành ``cluster_count`` dải liên tiếp."""
+    per_cluster, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for i in range(cluster_count):
+        size = per_cluster + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def shard_for_guild(guild_id, shard_count):
+    return (guild_id >> 22) % shard_count
+
+
+async def _write(writer, message):
+    writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+    await writer.drain()
+
+
+class ClusterHub:
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._server = None
+        self._clusters = {}  # cluster_id -> (writer, shard_ids, shard_count)
+        self._pending = {}
+        self._ids = itertools.count()
+
+    async def start(self):
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=STREAM_LIMIT)
+        logger.info('Cluster hub đang lắng nghe tại %s', self.path)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer, _, _ in list(self._clusters.values()):
+                writer.close()
+            await self._server.wait_closed()
+
+    def _targets(self, target):
+        if target == 'all':
+            return list(self._clusters)
+        if isinstance(target, dict) and 'guild' in target:
+            for cluster_id, (_, shard_ids, shard_count) in self._clusters.items():
+                if shard_for_guild(int(target['guild']), shard_count) in shard_ids:
+                    return [cluster_id]
+            return []
+        return [target] if target in self._clusters else []
+
+    async def _handle(self, reader, writer):
+        cluster_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                op = message.get('op')
+                if op == 'hello':
+                    cluster_id = message['cluster_id']
+                    self._clusters[cluster_id] = (writer, set(message['shard_ids']), message['shard_count'])
+                    logger.info('Cluster %s đã kết nối (shard %s)', cluster_id, message['shard_ids'])
+                elif op == 'request':
+                    asyncio.create_task(self._dispatch(writer, message))
+                elif op == 'reply':
+                    future = self._pending.get(message['id'])
+                    if future is not None and not future.done():
+                        future.set_result(message)
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
+            # ValueError gồm cả JSON hỏng và dòng dài quá STREAM_LIMIT (readline đã bỏ dở luồng)
+            logger.warning('Mất kết nối với cluster %s: %r', cluster_id, e)
+        finally:
+            if cluster_id is not None and self._clusters.get(cluster_id, (None,))[0] is writer:
+                del self._clusters[cluster_id]
+                logger.info('Cluster %s đã ngắt kết nối', cluster_id)
+            writer.close()
+
+    async def _ask(self, cluster_id, message, timeout):
+        writer = self._clusters[cluster_id][0]
+        sub_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[sub_id] = future
+        try:
+            await _write(writer, {**message, 'id': sub_id})
+            reply = await asyncio.wait_for(future, timeout)
+            return {'cluster_id': cluster_id, 'ok': reply['ok'], 'data': reply.get('data'), 'error': reply.get('error')}
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            return {'cluster_id': cluster_id, 'ok': False, 'data': None, 'error': type(e).__name__}
+        finally:
+            self._pending.pop(sub_id, None)
+
+    async def _dispatch(self, writer, message):
+        targets = self._targets(message.get('target', 'all'))
+        forward = {'op': 'request', 'action': message['action'], 'data': message.get('data')}
+        timeout = message.get('timeout') or self.timeout
+        results = await asyncio.gather(*(self._ask(cluster_id, forward, timeout) for cluster_id in targets))
+        try:
+            await _write(writer, {'op': 'response', 'id': message['id'], 'results': results})
+        except ConnectionError:
+            pass
+
+
+class ClusterClient:
+    def __init__(self, path, cluster_id, shard_ids, shard_count, timeout=15.0):
+        self.path = path
+        self.cluster_id = cluster_id
+        self.shard_ids = list(shard_ids)
+        self.shard_count = shard_count
+        self.timeout = timeout
+        self._handlers = {}
+        self._pending = {}
+        self._ids = itertools.count()
+        self._writer = None
+        self._connected = asyncio.Event()
+        self._task = None
+
+    def handler(self, action):
+        """Decorator đăng ký ``async def handler(data)`` cho một action."""
+        def decorator(func):
+            self._handlers[action] = func
+            return func
+        return decorator
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=STREAM_LIMIT)
+            except OSError as e:
+                logger.warning('Không kết nối được cluster hub (%s), thử lại sau %.0fs', e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            delay = 1.0
+            self._writer = writer
+            await _write(writer, {
+                'op': 'hello',
+                'cluster_id': self.cluster_id,
+                'shard_ids': self.shard_ids,
+                'shard_count': self.shard_count
+            })
+            self._connected.set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    message = json.loads(line)
+                    if message['op'] == 'request':
+                        asyncio.create_task(self._answer(writer, message))
+                    elif message['op'] == 'response':
+                        future = self._pending.get(message['id'])
+                        if future is not None and not future.done():
+                            future.set_result(message['results'])
+            except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
+                # Dòng dài quá STREAM_LIMIT hay JSON hỏng: coi như mất kết nối và kết nối lại
+                logger.warning('Mất kết nối cluster hub: %r', e)
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError('cluster hub disconnected'))
+
+    async def _answer(self, writer, message):
+        handler = self._handlers.get(message['action'])
+        try:
+            if handler is None:
+                raise LookupError(f"không có handler cho action {message['action']!r}")
+            reply = {'op': 'reply', 'id': message['id'], 'ok': True, 'data': await handler(message.get('data'))}
+        except Exception as e:
+            logger.exception('Lỗi khi xử lý IPC action %s', message['action'])
+            reply = {'op': 'reply', 'id': message['id'], 'ok': False, 'error': str(e)}
+        try:
+            await _write(writer, reply)
+        except ConnectionError:
+            pass
+
+    async def request(self, action, data=None, target='all', timeout=None):
+        """Gửi request qua hub và trả về list kết quả ``{cluster_id, ok, data, error}``.
+
+        ``timeout`` là thời gian chờ mỗi cluster trả lời (mặc định theo hub).
+        """
+        await asyncio.wait_for(self._connected.wait(), self.timeout)
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await _write(self._writer, {
+                'op': 'request', 'id': request_id, 'action': action, 'data': data,
+                'target': target, 'timeout': timeout
+            })
+            # Chờ thêm một khoảng để hub kịp gom kết quả sau khi các cluster hết hạn
+            return await asyncio.wait_for(future, (timeout or self.timeout) + 5)
+        finally:
+            self._pending.pop(request_id, None)
@@ -0,0 +1,255 @@
+"""Các thao tác gộp kết quả từ mọi tiến trình cluster (thống kê, danh sách server, broadcast).
+
+Module này không nằm trong các cog nên không bị reload; mọi hàm nhận ``bot`` và
+dùng trạng thái gắn trên bot (``member_stats``, ``guild_index``, ``cluster``).
+"""
+import asyncio
+import logging
+
+import discord
+
+from core import config
+from core.fanout import SkipTarget, fan_out
+from core.guild_index import GuildEntry, GuildIndex
+
+logger = logging.getLogger(__name__)
+
+
+def local_totals(bot):
+    return {
+        'guilds': len(bot.guilds),
+        'members': bot.member_stats.total,
+        'bots': bot.member_stats.bots,
+        'humans': bot.member_stats.humans
+    }
+
+
+async def cluster_totals(bot):
+    """Tổng số server/thành viên trên mọi tiến trình (chỉ tiến trình này khi không chạy cluster)"""
+    if bot.cluster is None:
+        return local_totals(bot)
+
+    totals = {'guilds': 0, 'members': 0, 'bots': 0, 'humans': 0}
+    try:
+        results = await bot.cluster.request('stats')
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        logger.warning(f'⚠️ Không lấy được thống kê cluster: {e}')
+        return local_totals(bot)
+
+    for result in results:
+        if result['ok']:
+            for key in totals:
+                totals[key] += result['data'][key]
+    return totals
+
+
+async def cluster_guild_index(bot):
+    """Chỉ mục server của mọi tiến trình (chỉ mục sẵn có khi không chạy cluster)"""
+    if bot.cluster is None:
+        return bot.guild_index
+
+    entries = []
+    for result in await bot.cluster.request('guilds'):
+        if result['ok']:
+            entries.extend(GuildEntry(*g) for g in result['data'])
+    return GuildIndex.from_entries(entries)
+
+
+async def leave_guild(bot, guild_id):
+    """Rời server trên tiến trình này, trả về tên server hoặc None nếu không tìm thấy"""
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        return None
+    await guild.leave()
+    return guild.name
+
+
+def broadcast_channel(guild):
+    # Ưu tiên kênh hệ thống, sau đó là kênh văn bản đầu tiên bot có quyền gửi embed
+    me = guild.me
+    candidates = [guild.system_channel] if guild.system_channel else []
+    candidates.extend(guild.text_channels)
+    for channel in candidates:
+        perms = channel.permissions_for(me)
+        if perms.send_messages and perms.embed_links:
+            return channel
+    return None
+
+
+async def broadcast_local(bot, embed, on_progress=None, exclude=(), on_result=None):
+    """Gửi embed tới mọi server mà tiến trình này quản lý, trừ các server trong ``exclude``"""
+    async def send_to_guild(guild):
+        channel = broadcast_channel(guild)
+        if channel is None:
+            raise SkipTarget("không có kênh gửi được")
+        await channel.send(embed=embed)
+
+    exclude = set(exclude)
+    result = await fan_out(
+        [guild for guild in bot.guilds if guild.id not in exclude],
+        send_to_guild,
+        concurrency=config.BROADCAST_CONCURRENCY,
+        on_progress=on_progress,
+        progress_interval=5.0,
+        on_result=on_result
+    )
+    logger.info(
+        f"📢 Broadcast xong: {result.sent} gửi, {result.failed} lỗi, "
+        f"{result.skipped} bỏ qua trong {result.elapsed:.1f}s"
+    )
+    return result
+
+
+class BroadcastRun:
+    """Lần broadcast của một job đang chạy trên tiến trình này (phía cluster nhận lệnh)."""
+    __slots__ = ('task', 'done', 'unreported')
+
+    def __init__(self):
+        self.task = None
+        self.done = set()  # server đã xử lý xong trong job này
+        self.unreported = []  # [guild_id, kết quả, lý do] chưa báo về cluster điều phối
+
+    async def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.wait([self.task])
+
+
+async def cluster_broadcast(bot, job_id, embed, exclude, on_results):
+    """Broadcast qua mọi cluster, mỗi cluster gửi dần kết quả về đây trong lúc chạy.
+
+    ``on_results(results)`` (async) nhận list ``[guild_id, kết quả, lý do]`` để ghi
+    checkpoint; ``exclude`` được đọc lại mỗi lần gửi lệnh nên có thể là chính list
+    ``done`` của checkpoint. Khi bị hủy (lệnh cancel hoặc bot tắt), các cluster được
+    báo dừng và trả nốt kết quả chưa báo. Trả về list ``(cluster_id, lỗi)`` của cluster không chạy xong.
+    """
+    cluster = bot.cluster
+    bot.broadcast_listeners[job_id] = on_results
+    try:
+        while True:
+            try:
+                parts = await cluster.request(
+                    'broadcast',
+                    {'job_id': job_id, 'origin': cluster.cluster_id, 'embed': embed.to_dict(), 'exclude': list(exclude)},
+                    timeout=config.BROADCAST_TIMEOUT
+                )
+                break
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                if bot.is_closed():
+                    # Bot đang tắt và hub ngắt trước khi task job bị hủy: giữ job để chạy tiếp lần sau
+                    raise asyncio.CancelledError from e
+                # Mất hub giữa chừng: gửi lại khi kết nối lại, cluster nào còn đang gửi sẽ tự nối tiếp lần trước
+                logger.warning(f'⚠️ Mất kết nối cluster hub khi broadcast {job_id} ({e!r}), thử lại')
+                await asyncio.sleep(1)
+    except asyncio.CancelledError:
+        if cluster.connected:
+            try:
+                for part in await cluster.request('broadcast_cancel', {'job_id': job_id}, timeout=10):
+                    if part['ok']:
+                        await on_results(part['data'])
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                logger.warning(f'⚠️ Không dừng được broadcast {job_id} trên các cluster: {e!r}')
+        raise
+    finally:
+        bot.broadcast_listeners.pop(job_id, None)
+
+    errors = []
+    for part in parts:
+        if part['ok']:
+            await on_results(part['data'])
+        else:
+            errors.append((part['cluster_id'], part['error']))
+    return errors
+
+
+def register_ipc_handlers(bot):
+    """Đăng ký các action IPC mà tiến trình khác có thể gọi tới tiến trình này"""
+    cluster = bot.cluster
+    bot.broadcast_listeners = {}  # job_id -> on_results của job broadcast do tiến trình này điều phối
+    runs = {}  # job_id -> BroadcastRun đang gửi trên tiến trình này
+
+    @cluster.handler('stats')
+    async def ipc_stats(data):
+        return local_totals(bot)
+
+    @cluster.handler('guilds')
+    async def ipc_guilds(data):
+        return [GuildEntry.from_guild(g).to_tuple() for g in bot.guilds]
+
+    @cluster.handler('leave')
+    async def ipc_leave(data):
+        return await leave_guild(bot, data['guild_id'])
+
+    @cluster.handler('broadcast')
+    async def ipc_broadcast(data):
+        job_id, origin = data['job_id'], data['origin']
+        run = BroadcastRun()
+        previous = runs.get(job_id)
+        if previous is not None:
+            # Cluster điều phối khởi động lại và chạy tiếp job trong khi lần trước vẫn đang gửi:
+            # dừng lần trước, giữ kết quả chưa báo và không gửi lại các server đã xử lý
+            await previous.stop()
+            run.done, run.unreported, previous.unreported = previous.done, previous.unreported, []
+        runs[job_id] = run
+        # Server đã xử lý ở lần chạy trước mà cluster điều phối có thể chưa nhận (bị tắt cùng lúc)
+        exclude = set(data.get('exclude', ()))
+        for guild_id, outcome, reason in await bot.jobs.load_targets(job_id):
+            if guild_id not in run.done and guild_id not in exclude:
+                run.done.add(guild_id)
+                run.unreported.append([guild_id, outcome, reason])
+
+        async def report_progress(result):
+            await bot.jobs.flush_targets()
+            batch = run.unreported[:]
+            if not batch:
+                return
+            try:
+                parts = await cluster.request(
+                    'broadcast_progress', {'job_id': job_id, 'results': batch}, target=origin, timeout=10
+                )
+            except (asyncio.TimeoutError, ConnectionError):
+                return
+            # Chỉ bỏ khỏi hàng chờ khi cluster điều phối đã nhận (nếu không sẽ gửi lại ở lần sau)
+            if any(part['ok'] and part['data'] for part in parts):
+                del run.unreported[:len(batch)]
+
+        def on_result(guild, outcome, reason):
+            run.done.add(guild.id)
+            run.unreported.append([guild.id, outcome, reason])
+            bot.jobs.add_target(job_id, guild.id, outcome, reason)
+
+        run.task = asyncio.ensure_future(broadcast_local(
+            bot,
+            discord.Embed.from_dict(data['embed']),
+            on_progress=report_progress,
+            exclude=exclude | run.done,
+            on_result=on_result
+        ))
+        try:
+            # Bị broadcast_cancel dừng thì kết thúc bình thường, kết quả đã trả qua broadcast_cancel
+            await asyncio.wait([run.task])
+            if not run.task.cancelled():
+                run.task.result()
+        finally:
+            if runs.get(job_id) is run:
+                del runs[job_id]
+        await bot.jobs.flush_targets()
+        results, run.unreported = run.unreported, []
+        return results
+
+    @cluster.handler('broadcast_progress')
+    async def ipc_broadcast_progress(data):
+        listener = bot.broadcast_listeners.get(data['job_id'])
+        if listener is None:
+            return False
+        await listener(data['results'])
+        return True
+
+    @cluster.handler('broadcast_cancel')
+    async def ipc_broadcast_cancel(data):
+        run = runs.pop(data['job_id'], None)
+        if run is None:
+            return []
+        await run.stop()
+        results, run.unreported = run.unreported, []
+        return results
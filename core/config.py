@@ -0,0 +1,101 @@
+"""Cấu hình đọc từ biến môi trường / file .env.
+
+Module này không bị reload cùng các cog, nên lệnh ``reloadenv`` gọi
+``reload()`` để đọc lại .env và cập nhật giá trị tại chỗ.
+"""
+import os
+
+from dotenv import load_dotenv
+
+# Load biến môi trường từ .env file
+load_dotenv()
+
+# Lấy cấu hình từ biến môi trường
+TOKEN = os.getenv('DISCORD_TOKEN')
+OWNER_ID = int(os.getenv('OWNER_ID'))
+PREFIX = os.getenv('BOT_PREFIX', '?')  # Mặc định là '?' nếu không có trong .env
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '5'))  # Số server gửi đồng thời khi broadcast
+BROADCAST_TIMEOUT = 3600  # Thời gian tối đa chờ mỗi cluster broadcast xong
+JOBS_DB = os.getenv('JOBS_DB', 'jobs.db')  # File SQLite lưu checkpoint của job nền (broadcast...)
+REST_CACHE_TTL = float(os.getenv('REST_CACHE_TTL', '600'))  # Số giây giữ kết quả fetch_user/fetch_channel
+MEMBER_CACHE_MODE = os.getenv('MEMBER_CACHE_MODE', 'full').lower()  # 'full' chunk mọi guild lúc khởi động, 'lazy' chỉ chunk khi cần
+MEMBER_CACHE_MAX_GUILDS = int(os.getenv('MEMBER_CACHE_MAX_GUILDS', '100'))  # Số guild tối đa giữ member ở chế độ lazy
+GUILD_SETTINGS_DB = os.getenv('GUILD_SETTINGS_DB', 'guild_settings.db')  # File SQLite lưu cài đặt riêng của từng server
+ERROR_USER_WINDOW = float(os.getenv('ERROR_USER_WINDOW', '10'))  # Số giây không trả lời lỗi lặp lại của cùng một người
+ERROR_CHANNEL_WINDOW = float(os.getenv('ERROR_CHANNEL_WINDOW', '5'))  # Số giây không trả lời lỗi lặp lại trong cùng một kênh
+
+# Giới hạn lượng lệnh nhận vào: token/giây và sức chứa bucket theo người dùng, server, toàn cục
+ADMISSION_USER = (float(os.getenv('ADMISSION_USER_RATE', '1')), int(os.getenv('ADMISSION_USER_BURST', '5')))
+ADMISSION_GUILD = (float(os.getenv('ADMISSION_GUILD_RATE', '5')), int(os.getenv('ADMISSION_GUILD_BURST', '20')))
+ADMISSION_GLOBAL = (float(os.getenv('ADMISSION_GLOBAL_RATE', '50')), int(os.getenv('ADMISSION_GLOBAL_BURST', '100')))
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', '2'))  # Chờ tối đa bao lâu trước khi từ chối lệnh
+ADMISSION_QUEUE_LIMIT = int(os.getenv('ADMISSION_QUEUE_LIMIT', '20'))  # Số lệnh nặng tối đa được xếp hàng chờ
+
+# Trọng số token của các lệnh tốn kém (mặc định 1)
+COMMAND_COSTS = {'serverinfo': 3, 'stats': 3, 'servers': 3, 'userinfo': 2, 'broadcast': 5}
+# Số lượt chạy đồng thời tối đa của các lệnh nặng
+COMMAND_CONCURRENCY = {'serverinfo': 4, 'stats': 2, 'userinfo': 8}
+
+PRESENCE_INTERVAL = float(os.getenv('PRESENCE_INTERVAL', '20'))  # Số giây tối thiểu giữa hai lần đổi presence
+
+RUNTIME_PROFILE = os.getenv('RUNTIME_PROFILE', 'default').lower()  # 'fast' dùng uvloop/JSON nhanh nếu đã cài
+
+# Intents: 'auto' chỉ xin intent mà các lệnh đang bật cần, 'unprivileged' không dùng intent đặc quyền,
+# 'slash' bỏ message_content và tin nhắn server (chỉ dùng slash command), 'full' bật hết như cũ
+INTENTS_MODE = os.getenv('INTENTS_MODE', 'auto').lower()
+DISABLED_COMMANDS = [c.strip() for c in os.getenv('DISABLED_COMMANDS', '').split(',') if c.strip()]
+INTENTS_SAMPLE_SECONDS = float(os.getenv('INTENTS_SAMPLE_SECONDS', '60'))  # Thời gian đếm sự kiện gateway sau READY
+
+# Slash command: chỉ sync khi cây lệnh đổi (hash lưu trong file)
+APP_COMMANDS_SYNC = os.getenv('APP_COMMANDS_SYNC', 'true').lower() in ('1', 'true', 'yes', 'on')
+APP_COMMANDS_HASH_FILE = os.getenv('APP_COMMANDS_HASH_FILE', 'app_commands.hash')
+
+STATS_DB = os.getenv('STATS_DB', 'metrics.db')  # File SQLite lưu lịch sử số liệu cho lệnh stats
+STATS_SAMPLE_INTERVAL = float(os.getenv('STATS_SAMPLE_INTERVAL', '60'))  # Số giây giữa hai lần lấy mẫu
+
+LOOP_WATCHDOG_INTERVAL = float(os.getenv('LOOP_WATCHDOG_INTERVAL', '0.1'))  # Chu kỳ đo độ trễ event loop (giây)
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', '0.25'))  # Loop đứng quá số giây này thì log stack
+TRACEMALLOC_FRAMES = int(os.getenv('TRACEMALLOC_FRAMES', '10'))  # Số frame lưu cho mỗi cấp phát khi bật lệnh memory start
+# Connection pool HTTP tới Discord: 0 = không giới hạn (mặc định của discord.py), keep-alive tính bằng giây
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '0'))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '0'))
+HTTP_KEEPALIVE = float(os.getenv('HTTP_KEEPALIVE', '15'))
+
+METRICS_PORT = os.getenv('METRICS_PORT', '')  # Cổng endpoint /metrics (Prometheus) trên 127.0.0.1, bỏ trống để tắt
+
+# Trỏ REST/gateway tới server khác, chỉ dùng khi load test với benchmarks/fake_discord.py
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', '')  # Ví dụ http://127.0.0.1:8800/api/v10
+DISCORD_GATEWAY_URL = os.getenv('DISCORD_GATEWAY_URL', '')  # Ví dụ ws://127.0.0.1:8800/gateway
+
+# Cấu hình cluster, do launcher.py truyền vào cho từng tiến trình
+CLUSTER_ID = os.getenv('CLUSTER_ID')
+SHARD_IDS = [int(i) for i in os.getenv('SHARD_IDS', '').split(',') if i.strip()]
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '1'))
+CLUSTER_SOCKET = os.getenv('CLUSTER_SOCKET', 'cluster.sock')
+
+# Logging
+LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+if CLUSTER_ID is not None:
+    # Mỗi tiến trình cluster ghi file riêng (bot.0.log, bot.1.log...): nhiều tiến trình cùng xoay một file sẽ mất/lẫn dòng
+    _root, _ext = os.path.splitext(LOG_FILE)
+    LOG_FILE = f'{_root}.{CLUSTER_ID}{_ext}'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # Xoay file khi vượt quá kích thước này
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')  # Ví dụ 'midnight' để xoay theo thời gian thay vì kích thước
+LOG_JSON = os.getenv('LOG_JSON', '0') == '1'  # Ghi file log dạng JSON lines
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+
+def reload():
+    """Đọc lại .env và cập nhật TOKEN/OWNER_ID/PREFIX, trả về dict các giá trị đã đổi ``{tên: (cũ, mới)}``."""
+    global TOKEN, OWNER_ID, PREFIX
+
+    load_dotenv(override=True)
+
+    old = {'TOKEN': TOKEN, 'OWNER_ID': OWNER_ID, 'PREFIX': PREFIX}
+    TOKEN = os.getenv('DISCORD_TOKEN')
+    OWNER_ID = int(os.getenv('OWNER_ID'))
+    PREFIX = os.getenv('BOT_PREFIX', '?')
+    new = {'TOKEN': TOKEN, 'OWNER_ID': OWNER_ID, 'PREFIX': PREFIX}
+
+    return {name: (old[name], new[name]) for name in old if old[name] != new[name]}
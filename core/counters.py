@@ -0,0 +1,92 @@
+"""Bộ đếm thành viên/bot được cập nhật dần theo sự kiện gateway.
+
+Thay vì duyệt toàn bộ ``guild.members`` mỗi lần gọi lệnh, bộ đếm được seed một
+lần khi READY rồi cập nhật từ các sự kiện join/leave của member và guild, nên
+mọi truy vấn đều là O(1).
+"""
+
+
+class GuildCounts:
+    __slots__ = ('total', 'bots')
+
+    def __init__(self, total=0, bots=0):
+        self.total = total
+        self.bots = bots
+
+    @property
+    def humans(self):
+        return max(self.total - self.bots, 0)
+
+
+class MemberCounters:
+    """Số thành viên/bot/người dùng theo từng guild và tổng toàn bot."""
+
+    def __init__(self):
+        self._guilds = {}
+        self.total = 0
+        self.bots = 0
+
+    @property
+    def humans(self):
+        return max(self.total - self.bots, 0)
+
+    @property
+    def guild_count(self):
+        return len(self._guilds)
+
+    def get(self, guild_id):
+        return self._guilds.get(guild_id) or GuildCounts()
+
+    def seed(self, guilds):
+        """Đếm lại từ đầu (chỉ gọi khi READY)."""
+        self._guilds.clear()
+        self.total = 0
+        self.bots = 0
+        for guild in guilds:
+            self.add_guild(guild)
+
+    def add_guild(self, guild):
+        # Tránh đếm trùng nếu GUILD_CREATE đến lại sau khi reconnect
+        self.remove_guild(guild.id)
+        counts = GuildCounts(
+            total=guild.member_count or 0,
+            bots=sum(1 for member in guild.members if member.bot)
+        )
+        self._guilds[guild.id] = counts
+        self.total += counts.total
+        self.bots += counts.bots
+
+    def remove_guild(self, guild_id):
+        counts = self._guilds.pop(guild_id, None)
+        if counts is not None:
+            self.total -= counts.total
+            self.bots -= counts.bots
+
+    def refresh_total(self, guild):
+        """Lấy lại tổng thành viên từ ``guild.member_count`` (dùng khi không có sự kiện join/leave)."""
+        counts = self._guilds.get(guild.id)
+        if counts is None or guild.member_count is None:
+            return
+        self.total += guild.member_count - counts.total
+        counts.total = guild.member_count
+
+    def member_joined(self, guild_id, is_bot):
+        counts = self._guilds.get(guild_id)
+        if counts is None:
+            return
+        counts.total += 1
+        self.total += 1
+        if is_bot:
+            counts.bots += 1
+            self.bots += 1
+
+    def member_left(self, guild_id, is_bot):
+        counts = self._guilds.get(guild_id)
+        if counts is None:
+            return
+        if counts.total > 0:
+            counts.total -= 1
+            self.total -= 1
+        if is_bot and counts.bots > 0:
+            counts.bots -= 1
+            self.bots -= 1
@@ -0,0 +1,58 @@
+"""Gộp và giới hạn tin nhắn báo lỗi của on_command_error.
+
+Mỗi người dùng và mỗi kênh có một cửa sổ im lặng: trong cửa sổ đó các lỗi tiếp
+theo không được trả lời mà chỉ được đếm, và lần trả lời kế tiếp trong kênh sẽ
+ghi kèm số lỗi đã được gộp.
+"""
+import time
+from collections import Counter
+
+
+class ErrorReplyThrottle:
+    def __init__(self, user_window=10.0, channel_window=5.0, max_keys=10000):
+        self.user_window = user_window
+        self.channel_window = channel_window
+        self.max_keys = max_keys
+        self._users = {}
+        self._channels = {}
+        self._coalesced = Counter()  # channel_id -> số lỗi bị gộp từ lần trả lời trước
+        self.replied = Counter()
+        self.suppressed = Counter()
+
+    def suppress(self, kind, channel_id=None):
+        self.suppressed[kind] += 1
+        if channel_id is not None:
+            self._coalesced[channel_id] += 1
+
+    def check(self, user_id, channel_id, kind):
+        """Trả về None nếu không nên trả lời, ngược lại là số lỗi đã gộp trong kênh kể từ lần trước."""
+        now = time.monotonic()
+        if (now - self._users.get(user_id, -self.user_window) < self.user_window
+                or now - self._channels.get(channel_id, -self.channel_window) < self.channel_window):
+            self.suppress(kind, channel_id)
+            return None
+
+        self._users[user_id] = now
+        self._channels[channel_id] = now
+        self.replied[kind] += 1
+        if len(self._users) > self.max_keys or len(self._channels) > self.max_keys:
+            self._prune(now)
+        return self._coalesced.pop(channel_id, 0)
+
+    def _prune(self, now):
+        self._users = {k: t for k, t in self._users.items() if now - t < self.user_window}
+        self._channels = {k: t for k, t in self._channels.items() if now - t < self.channel_window}
+        self._coalesced = Counter({k: n for k, n in self._coalesced.items() if k in self._channels})
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP bot_error_replies_total Số tin nhắn báo lỗi đã gửi.',
+            '# TYPE bot_error_replies_total counter',
+        ]
+        lines += [f'bot_error_replies_total{{kind="{kind}"}} {count}' for kind, count in self.replied.items()]
+        lines += [
+            '# HELP bot_error_replies_suppressed_total Số lỗi không trả lời do bị gộp/tắt.',
+            '# TYPE bot_error_replies_suppressed_total counter',
+        ]
+        lines += [f'bot_error_replies_suppressed_total{{kind="{kind}"}} {count}' for kind, count in self.suppressed.items()]
+        return '\n'.join(lines) + '\n'
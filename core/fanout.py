@@ -0,0 +1,155 @@
+"""Bộ lập lịch gửi song song (fan-out) cho các lệnh như broadcast.
+
+Bucket rate limit theo route và global của Discord đã được HTTPClient của
+discord.py theo dõi (mỗi kênh là một bucket riêng), nên ở đây không ngủ cố
+định giữa các lần gửi. Module chỉ giới hạn số request đồng thời, thử lại các
+lỗi tạm thời (429, 5xx, lỗi mạng) với backoff và đếm kết quả.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class SkipTarget(Exception):
+    """Raise trong hàm gửi để bỏ qua một đích (ví dụ: không có kênh gửi được)."""
+
+
+class FanoutResult:
+    """Kết quả (cập nhật dần) của một lượt fan-out."""
+
+    def __init__(self, total):
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.reasons = Counter()
+        self.started_at = time.monotonic()
+
+    @property
+    def done(self):
+        return self.sent + self.failed + self.skipped
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def top_reasons(self, limit=5):
+        return self.reasons.most_common(limit)
+
+
+def _retry_delay(error, attempt, base_delay):
+    """Trả về số giây cần chờ nếu lỗi là tạm thời, ngược lại trả về None."""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException):
+        if error.status != 429 and error.status < 500:
+            return None
+        retry_after = getattr(error.response, 'headers', {}).get('Retry-After')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+    elif not isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError)):
+        return None
+    # Backoff lũy thừa có jitter để các worker không thử lại cùng lúc
+    return base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _describe(error):
+    if isinstance(error, discord.HTTPException):
+        return f'{type(error).__name__} {error.status} (code {error.code})'
+    return type(error).__name__
+
+
+async def fan_out(targets, send, *, concurrency=5, max_retries=3, base_delay=1.0,
+                  on_progress=None, progress_interval=2.0, on_result=None):
+    """Gọi ``await send(target)`` cho từng đích với tối đa ``concurrency`` request đồng thời.
+
+    ``on_progress(result)`` được gọi tối đa mỗi ``progress_interval`` giây và
+    một lần cuối khi hoàn tất. ``on_result(target, outcome, reason)`` được gọi
+    khi một đích có kết quả cuối cùng (``'sent'``, ``'skipped'`` hoặc ``'failed'``).
+    """
+    targets = list(targets)
+    result = FanoutResult(len(targets))
+    pending = iter(targets)
+    last_report = time.monotonic()
+    report_lock = asyncio.Lock()
+
+    async def report(force=False):
+        nonlocal last_report
+        if on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - last_report < progress_interval:
+            return
+        if not force and report_lock.locked():
+            return
+        async with report_lock:
+            last_report = now
+            try:
+                await on_progress(result)
+            except Exception:
+                logger.exception('Lỗi khi báo cáo tiến độ fan-out')
+
+    def record(target, outcome, reason):
+        # Lỗi trong on_result không được làm gửi lại hay dừng cả lượt fan-out
+        if on_result is None:
+            return
+        try:
+            on_result(target, outcome, reason)
+        except Exception:
+            logger.exception('Lỗi khi ghi nhận kết quả fan-out tới %r', target)
+
+    async def deliver(target):
+        for attempt in range(max_retries + 1):
+            try:
+                await send(target)
+            except SkipTarget as e:
+                reason = f'skip: {e}' if str(e) else 'skip'
+                result.skipped += 1
+                result.reasons[reason] += 1
+                record(target, 'skipped', reason)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = _retry_delay(e, attempt, base_delay)
+                if delay is None or attempt == max_retries:
+                    reason = _describe(e)
+                    result.failed += 1
+                    result.reasons[reason] += 1
+                    logger.warning('Fan-out tới %r thất bại: %s', target, e)
+                    record(target, 'failed', reason)
+                    return
+                result.retries += 1
+                logger.info('Fan-out tới %r lỗi tạm thời (%s), thử lại sau %.2fs', target, _describe(e), delay)
+                await asyncio.sleep(delay)
+            else:
+                result.sent += 1
+                record(target, 'sent', None)
+                return
+
+    async def worker():
+        # Các worker cùng lấy từ một iterator; an toàn vì chỉ chạy trên một event loop
+        for target in pending:
+            await deliver(target)
+            await report()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(targets))))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    await report(force=True)
+    return result
@@ -0,0 +1,106 @@
+"""Chỉ mục guild được giữ sắp xếp sẵn (theo số thành viên, tên, ngày tham gia).
+
+Thứ tự theo tên và ngày tham gia được cập nhật bằng bisect khi guild được
+thêm/xóa. Số thành viên thay đổi liên tục nên thứ tự đó chỉ bị đánh dấu bẩn và
+được sắp xếp lại (gần như đã có thứ tự nên rất rẻ) khi có người xem.
+"""
+import bisect
+
+SORTS = {
+    'members': lambda e: (-e.member_count, e.id),
+    # Guild chưa khả dụng (unavailable) không có tên
+    'name': lambda e: ((e.name or '').casefold(), e.id),
+    'joined': lambda e: (e.joined_at, e.id),
+}
+
+
+class GuildEntry:
+    __slots__ = ('id', 'name', 'member_count', 'joined_at')
+
+    def __init__(self, guild_id, name, member_count, joined_at=0.0):
+        self.id = guild_id
+        self.name = name
+        self.member_count = member_count or 0
+        self.joined_at = joined_at or 0.0
+
+    @classmethod
+    def from_guild(cls, guild):
+        me = guild.me
+        joined_at = me.joined_at.timestamp() if me is not None and me.joined_at else 0.0
+        return cls(guild.id, guild.name, guild.member_count, joined_at)
+
+    def to_tuple(self):
+        return (self.id, self.name, self.member_count, self.joined_at)
+
+
+class GuildIndex:
+    def __init__(self):
+        self._entries = {}
+        self._orders = {sort: [] for sort in SORTS}
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_entries(cls, entries):
+        index = cls()
+        index.seed(entries)
+        return index
+
+    def seed(self, entries):
+        self._entries = {entry.id: entry for entry in entries}
+        for sort, key in SORTS.items():
+            self._orders[sort] = sorted((key(entry), entry.id) for entry in self._entries.values())
+        self._dirty.clear()
+
+    def add(self, entry):
+        self.remove(entry.id)
+        self._entries[entry.id] = entry
+        for sort, key in SORTS.items():
+            if sort not in self._dirty:
+                bisect.insort(self._orders[sort], (key(entry), entry.id))
+
+    def remove(self, guild_id):
+        entry = self._entries.pop(guild_id, None)
+        if entry is None:
+            return
+        for sort, key in SORTS.items():
+            if sort in self._dirty:
+                continue
+            order = self._orders[sort]
+            position = bisect.bisect_left(order, (key(entry), entry.id))
+            if position < len(order) and order[position][1] == guild_id:
+                del order[position]
+
+    def update(self, guild_id, name=None, member_count=None):
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            return
+        if name is not None and name != entry.name:
+            # Tên đổi rất hiếm nên xóa rồi thêm lại ngay
+            self.remove(guild_id)
+            entry.name = name
+            self.add(entry)
+        if member_count is not None and member_count != entry.member_count:
+            # Số thành viên đổi liên tục: chỉ đánh dấu, sắp xếp lại khi có người xem
+            self._dirty.add('members')
+            entry.member_count = member_count
+
+    def _order(self, sort):
+        if sort in self._dirty:
+            key = SORTS[sort]
+            self._orders[sort] = sorted((key(entry), entry.id) for entry in self._entries.values())
+            self._dirty.discard(sort)
+        return self._orders[sort]
+
+    def query(self, sort='members', name=None):
+        """Trả về list id guild theo thứ tự ``sort``, lọc theo chuỗi con trong tên nếu có."""
+        order = self._order(sort)
+        if not name:
+            return [guild_id for _, guild_id in order]
+        needle = name.casefold()
+        return [guild_id for _, guild_id in order if needle in (self._entries[guild_id].name or '').casefold()]
+
+    def get(self, guild_id):
+        return self._entries.get(guild_id)
@@ -0,0 +1,95 @@
+"""Cài đặt riêng cho từng server (prefix, bật/tắt trả lời lệnh không tồn tại...), lưu trong SQLite.
+
+Toàn bộ bảng được nạp vào dict một lần khi khởi động; tra cài đặt cho mỗi tin
+nhắn chỉ là một lần tra dict. Thay đổi được gom lại và ghi xuống đĩa theo lô
+trên thread riêng, nên đường nóng không bao giờ chạm tới đĩa.
+"""
+import asyncio
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+
+class GuildSettingStore:
+    def __init__(self, path, table, column, default, column_type='TEXT', flush_interval=5.0):
+        self.path = path
+        self.table = table
+        self.column = column
+        self.column_type = column_type
+        self.default = default
+        self.flush_interval = flush_interval
+        self._values = {}
+        self._pending = {}  # guild_id -> giá trị, hoặc None để xóa
+        self._task = None
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, guild_id):
+        return self._values.get(guild_id, self.default)
+
+    def set(self, guild_id, value):
+        self._values[guild_id] = value
+        self._pending[guild_id] = value
+
+    def reset(self, guild_id):
+        self._values.pop(guild_id, None)
+        self._pending[guild_id] = None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} '
+            f'(guild_id INTEGER PRIMARY KEY, {self.column} {self.column_type} NOT NULL)'
+        )
+        return connection
+
+    def _load(self):
+        with self._connect() as connection:
+            return dict(connection.execute(f'SELECT guild_id, {self.column} FROM {self.table}'))
+
+    def _write(self, changes):
+        upserts = [(guild_id, value) for guild_id, value in changes.items() if value is not None]
+        deletes = [(guild_id,) for guild_id, value in changes.items() if value is None]
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    f'INSERT INTO {self.table} (guild_id, {self.column}) VALUES (?, ?) '
+                    f'ON CONFLICT(guild_id) DO UPDATE SET {self.column} = excluded.{self.column}',
+                    upserts
+                )
+                connection.executemany(f'DELETE FROM {self.table} WHERE guild_id = ?', deletes)
+        finally:
+            connection.close()
+
+    async def load(self):
+        self._values = await asyncio.to_thread(self._load)
+        logger.info('Đã nạp %s giá trị %s từ %s', len(self._values), self.table, self.path)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        changes, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self._write, changes)
+        except sqlite3.Error:
+            logger.exception('Không ghi được %s xuống %s, sẽ thử lại', self.table, self.path)
+            # Giữ lại thay đổi chưa ghi, thay đổi mới hơn được ưu tiên
+            self._pending = {**changes, **self._pending}
+
+    def flush_sync(self):
+        """Ghi nốt thay đổi còn lại khi tắt bot (sau khi event loop đã dừng)."""
+        if self._pending:
+            changes, self._pending = self._pending, {}
+            self._write(changes)
@@ -0,0 +1,76 @@
+"""Snapshot thông tin server cho lệnh serverinfo.
+
+Snapshot của mỗi guild được dựng lần đầu khi cần rồi giữ lại cho tới khi một
+sự kiện làm nó lỗi thời (kênh, vai trò, emoji, member, cập nhật guild), nên các
+lần gọi lặp lại chỉ đọc lại giá trị đã tính.
+"""
+import discord
+
+VERIFICATION_LEVELS = {
+    discord.VerificationLevel.none: "Không",
+    discord.VerificationLevel.low: "Thấp",
+    discord.VerificationLevel.medium: "Trung bình",
+    discord.VerificationLevel.high: "Cao",
+    discord.VerificationLevel.highest: "Rất cao"
+}
+
+
+class GuildSnapshot:
+    __slots__ = (
+        'name', 'icon_url', 'owner_id', 'locale', 'created', 'member_count', 'bots',
+        'text_channels', 'voice_channels', 'categories', 'roles', 'emojis', 'verification'
+    )
+
+    def __init__(self, guild, bots):
+        self.name = guild.name
+        self.icon_url = guild.icon.url if guild.icon else None
+        self.owner_id = guild.owner_id
+        self.locale = str(guild.preferred_locale).title()
+        self.created = guild.created_at.strftime("%d/%m/%Y")
+        self.member_count = guild.member_count
+        self.bots = bots
+        # Đếm theo loại thay vì dùng guild.text_channels/voice_channels (các property này sắp xếp lại mỗi lần gọi)
+        text = voice = categories = 0
+        for channel in guild.channels:
+            if isinstance(channel, discord.TextChannel):
+                text += 1
+            elif isinstance(channel, discord.VoiceChannel):
+                voice += 1
+            elif isinstance(channel, discord.CategoryChannel):
+                categories += 1
+        self.text_channels = text
+        self.voice_channels = voice
+        self.categories = categories
+        self.roles = len(guild.roles)
+        self.emojis = len(guild.emojis)
+        self.verification = VERIFICATION_LEVELS.get(guild.verification_level, "Không xác định")
+
+
+class GuildSnapshots:
+    def __init__(self, max_guilds=10000):
+        self.max_guilds = max_guilds
+        self._snapshots = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(self, guild, bots):
+        snapshot = self._snapshots.get(guild.id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        snapshot = self._snapshots[guild.id] = GuildSnapshot(guild, bots)
+        if len(self._snapshots) > self.max_guilds:
+            # Bỏ snapshot cũ nhất (dict giữ thứ tự thêm vào)
+            del self._snapshots[next(iter(self._snapshots))]
+        return snapshot
+
+    def invalidate(self, guild_id):
+        self._snapshots.pop(guild_id, None)
+
+    def clear(self):
+        self._snapshots.clear()
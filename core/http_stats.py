@@ -0,0 +1,209 @@
+"""Connection pool HTTP tới Discord và số liệu rate limit theo route.
+
+discord.py tự xếp hàng theo bucket rate limit trước khi gửi và tự ngủ khi gặp
+429, nên thời gian một lệnh chờ Discord gồm hai phần: thời gian request thật
+trên mạng và thời gian nằm chờ bucket/global reset. Module này tách hai phần đó
+cho từng route:
+
+- ``instrument(http)`` bọc ``HTTPClient.request`` để biết route đang gọi và
+  tổng thời gian của cả lời gọi (gồm chờ bucket và các lần thử lại sau 429).
+- ``trace_config()`` là TraceConfig của aiohttp (truyền qua ``http_trace``),
+  đo thời gian request thật, đọc header ``X-RateLimit-*`` và đếm 429, cùng với
+  số lần phải chờ lấy connection trong pool.
+"""
+import contextvars
+import socket
+import time
+
+import aiohttp
+from discord.utils import MISSING
+
+# (route, giây HTTP thật) của lời gọi ``HTTPClient.request`` đang chạy trong task hiện tại
+_current = contextvars.ContextVar('http_route', default=None)
+
+OTHER_ROUTE = 'khác'  # request không qua HTTPClient.request (gateway, CDN...)
+
+
+class RouteStats:
+    __slots__ = (
+        'requests', 'attempts', 'errors', 'rate_limited', 'http_seconds', 'wait_seconds',
+        'bucket', 'limit', 'remaining', 'reset_after', 'exhausted'
+    )
+
+    def __init__(self):
+        self.requests = 0  # lời gọi từ code của bot
+        self.attempts = 0  # request thật gửi đi (gồm cả thử lại)
+        self.errors = 0
+        self.rate_limited = 0
+        self.http_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.bucket = None
+        self.limit = None
+        self.remaining = None
+        self.reset_after = None
+        self.exhausted = 0  # số lần Discord báo còn 0 lượt trong bucket
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpStats:
+    def __init__(self, limit=0, limit_per_host=0, keepalive=15.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.routes = {}
+        self.rate_limit_scopes = {}  # scope của 429 (user/global/shared) -> số lần
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.pool_waits = 0
+        self.pool_wait_seconds = 0.0
+
+    def get(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        return stats
+
+    def make_connector(self):
+        # Giống mặc định của discord.py (IPv4) nhưng giới hạn pool/keep-alive theo cấu hình
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive,
+            family=socket.AF_INET
+        )
+
+    def instrument(self, http):
+        """Dùng connector theo cấu hình và đo thời gian chờ rate limit của từng route."""
+        original_login = http.static_login
+        original_request = http.request
+
+        async def static_login(token):
+            # Connector phải được tạo khi event loop đang chạy, ngay trước khi discord.py mở session
+            if http.connector is MISSING or http.connector.closed:
+                http.connector = self.make_connector()
+            return await original_login(token)
+
+        async def request(route, **kwargs):
+            current = [route.key, 0.0]
+            token = _current.set(current)
+            started = time.perf_counter()
+            try:
+                return await original_request(route, **kwargs)
+            finally:
+                stats = self.get(route.key)
+                stats.requests += 1
+                # Phần không nằm trên mạng là thời gian chờ bucket/global và ngủ sau 429
+                stats.wait_seconds += max(time.perf_counter() - started - current[1], 0.0)
+                _current.reset(token)
+
+        http.static_login = static_login
+        http.request = request
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_connection_queued_start.append(self._on_queued_start)
+        trace.on_connection_queued_end.append(self._on_queued_end)
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        return trace
+
+    def _finish_attempt(self, context):
+        elapsed = time.perf_counter() - context.started
+        current = _current.get()
+        if current is not None:
+            current[1] += elapsed
+        stats = self.get(current[0] if current is not None else OTHER_ROUTE)
+        stats.attempts += 1
+        stats.http_seconds += elapsed
+        return stats
+
+    async def _on_request_start(self, session, context, params):
+        context.started = time.perf_counter()
+
+    async def _on_request_end(self, session, context, params):
+        stats = self._finish_attempt(context)
+        response = params.response
+        headers = response.headers
+        if 'X-RateLimit-Remaining' in headers:
+            stats.bucket = headers.get('X-RateLimit-Bucket', stats.bucket)
+            stats.limit = _float(headers.get('X-RateLimit-Limit'))
+            stats.remaining = _float(headers.get('X-RateLimit-Remaining'))
+            stats.reset_after = _float(headers.get('X-RateLimit-Reset-After'))
+            if stats.remaining == 0:
+                stats.exhausted += 1
+        if response.status == 429:
+            stats.rate_limited += 1
+            scope = headers.get('X-RateLimit-Scope') or ('global' if headers.get('X-RateLimit-Global') else 'user')
+            self.rate_limit_scopes[scope] = self.rate_limit_scopes.get(scope, 0) + 1
+        elif response.status >= 400:
+            stats.errors += 1
+
+    async def _on_request_exception(self, session, context, params):
+        self._finish_attempt(context).errors += 1
+
+    async def _on_queued_start(self, session, context, params):
+        context.queued = time.perf_counter()
+
+    async def _on_queued_end(self, session, context, params):
+        self.pool_waits += 1
+        self.pool_wait_seconds += time.perf_counter() - context.queued
+
+    async def _on_connection_created(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.connections_reused += 1
+
+    def totals(self):
+        routes = self.routes.values()
+        return {
+            'requests': sum(s.requests for s in routes),
+            'attempts': sum(s.attempts for s in routes),
+            'rate_limited': sum(s.rate_limited for s in routes),
+            'http_seconds': sum(s.http_seconds for s in routes),
+            'wait_seconds': sum(s.wait_seconds for s in routes),
+        }
+
+    def top(self, limit=10):
+        """Các route chờ lâu nhất (rồi tới gọi nhiều nhất)."""
+        return sorted(self.routes.items(), key=lambda item: (item[1].wait_seconds, item[1].requests), reverse=True)[:limit]
+
+    def render_prometheus(self):
+        metrics = (
+            ('bot_http_requests_total', 'counter', 'Số lời gọi HTTP Discord theo route.', 'requests'),
+            ('bot_http_attempts_total', 'counter', 'Số request thật gửi đi (gồm thử lại).', 'attempts'),
+            ('bot_http_rate_limited_total', 'counter', 'Số phản hồi 429 theo route.', 'rate_limited'),
+            ('bot_http_seconds_total', 'counter', 'Thời gian request HTTP thật theo route.', 'http_seconds'),
+            ('bot_http_ratelimit_wait_seconds_total', 'counter', 'Thời gian chờ bucket/global reset theo route.', 'wait_seconds'),
+        )
+        lines = []
+        for name, kind, help_text, attr in metrics:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{{route="{route}"}} {getattr(stats, attr)}' for route, stats in self.routes.items()]
+        lines += [
+            '# HELP bot_http_ratelimit_remaining Số lượt còn lại trong bucket (theo header gần nhất).',
+            '# TYPE bot_http_ratelimit_remaining gauge',
+        ]
+        lines += [
+            f'bot_http_ratelimit_remaining{{route="{route}"}} {stats.remaining}'
+            for route, stats in self.routes.items() if stats.remaining is not None
+        ]
+        lines += [
+            '# HELP bot_http_pool_wait_seconds_total Thời gian chờ lấy connection trong pool.',
+            '# TYPE bot_http_pool_wait_seconds_total counter',
+            f'bot_http_pool_wait_seconds_total {self.pool_wait_seconds:.6f}',
+            '# HELP bot_http_connections_total Số connection HTTP theo kiểu (tạo mới/dùng lại).',
+            '# TYPE bot_http_connections_total counter',
+            f'bot_http_connections_total{{kind="created"}} {self.connections_created}',
+            f'bot_http_connections_total{{kind="reused"}} {self.connections_reused}',
+        ]
+        return '\n'.join(lines) + '\n'
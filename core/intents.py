@@ -0,0 +1,99 @@
+"""Tính gateway intents tối thiểu từ các lệnh đang bật.
+
+Mỗi lệnh khai báo intent nó cần qua ``extras={'intents': (...)}``. Bot chỉ
+xin các intent cơ bản (guild, tin nhắn) cộng với intent của những lệnh không
+bị tắt, nên Discord không gửi các sự kiện bot không dùng tới (typing, reaction,
+voice, cập nhật member...).
+
+Chế độ:
+
+- ``full``: như trước, ``Intents.default()`` + ``members`` + ``message_content``.
+- ``auto``: intent tối thiểu theo lệnh, vẫn bật ``message_content`` cho prefix.
+- ``unprivileged``: không dùng intent đặc quyền; lệnh cần intent đặc quyền bị
+  tắt và lệnh trong server chỉ nhận khi mention bot.
+- ``slash``: như ``auto`` nhưng không nhận ``message_content`` lẫn tin nhắn
+  trong server; lệnh chỉ dùng qua slash command (hoặc prefix trong DM), nên
+  không còn luồng MESSAGE_CREATE của mọi server.
+"""
+import importlib
+import inspect
+import time
+from collections import Counter
+
+import discord
+from discord.ext import commands
+
+MODES = ('full', 'auto', 'unprivileged', 'slash')
+
+# Danh sách guild/kênh và tin nhắn gọi lệnh
+BASE_INTENTS = ('guilds', 'guild_messages', 'dm_messages')
+PRIVILEGED = ('members', 'presences', 'message_content')
+
+
+def command_intents(extensions):
+    """Đọc ``{tên lệnh: tuple intent}`` từ các cog mà không cần nạp chúng vào bot."""
+    result = {}
+    for name in extensions:
+        module = importlib.import_module(name)
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, commands.Cog) and cls.__module__ == module.__name__:
+                for command in cls.__cog_commands__:
+                    result[command.qualified_name] = tuple(command.extras.get('intents', ()))
+    return result
+
+
+def resolve_intents(mode, required, disabled=()):
+    """Trả về ``(intents, lệnh phải tắt vì thiếu intent)`` cho chế độ ``mode``."""
+    if mode not in MODES:
+        raise ValueError(f'INTENTS_MODE phải là một trong {MODES}, nhận được {mode!r}')
+
+    if mode == 'full':
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.members = True
+        return intents, []
+
+    intents = discord.Intents.none()
+    for flag in BASE_INTENTS:
+        setattr(intents, flag, True)
+    intents.message_content = mode == 'auto'
+    if mode == 'slash':
+        intents.guild_messages = False
+
+    unavailable = []
+    for name, flags in required.items():
+        if name in disabled:
+            continue
+        if mode == 'unprivileged' and any(flag in PRIVILEGED for flag in flags):
+            unavailable.append(name)
+            continue
+        for flag in flags:
+            setattr(intents, flag, True)
+    return intents, unavailable
+
+
+def enabled_flags(intents):
+    return [name for name, value in intents if value]
+
+
+def drop_disabled_commands(bot):
+    """Gỡ các lệnh bị tắt; cog gọi sau ``add_cog`` để lệnh không quay lại khi reload."""
+    for name in bot.disabled_commands:
+        bot.remove_command(name)
+
+
+class EventVolume:
+    """Đếm sự kiện gateway theo loại trong một khoảng thời gian lấy mẫu."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.started = time.monotonic()
+
+    def add(self, event_type):
+        self.counts[event_type] += 1
+
+    def summary(self, limit=5):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        total = sum(self.counts.values())
+        top = ', '.join(f'{event} {count}' for event, count in self.counts.most_common(limit))
+        return f'{total} sự kiện trong {elapsed:.0f}s ({total / elapsed * 60:.0f}/phút) · nhiều nhất: {top or "-"}'
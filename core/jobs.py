@@ -0,0 +1,245 @@
+"""Job nền cho các lệnh owner chạy lâu (broadcast...).
+
+Lệnh gửi job vào ``JobManager`` rồi trả về ngay với mã job. Job chạy trên task
+riêng, báo tiến độ bằng cách sửa một tin nhắn trạng thái (tối đa mỗi
+``report_interval`` giây) và lưu checkpoint vào SQLite cùng lúc đó. Job bị ngắt
+do bot tắt/khởi động lại được giữ ở trạng thái ``running`` và chạy tiếp từ
+checkpoint ở lần khởi động sau; job bị hủy bằng lệnh thì dừng hẳn.
+
+Khi chạy cluster mọi tiến trình dùng chung một file SQLite, nên mỗi job ghi lại
+cluster đã tạo ra nó (``owner``). Tiến trình chỉ nạp, chạy tiếp và ghi đè job
+của chính mình, để job broadcast không bị mọi cluster chạy lại cùng lúc. Các
+cluster cùng làm một job ghi lại server đã xử lý vào bảng ``job_targets`` để lần
+chạy tiếp không gửi lại, kể cả khi cluster điều phối chưa kịp nhận kết quả.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+STATES = ('running', 'done', 'failed', 'cancelled')
+
+
+class Job:
+    def __init__(self, job_id, kind, payload, channel_id, message_id=None, checkpoint=None,
+                 state='running', created=None, error=None, owner=0):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.checkpoint = checkpoint if checkpoint is not None else {}
+        self.state = state
+        self.created = created or time.time()
+        self.error = error
+        self.owner = owner
+        self.task = None
+        self.cancel_requested = False
+        self.last_report = 0.0
+
+    @property
+    def finished(self):
+        return self.state != 'running'
+
+    def to_row(self):
+        return (
+            self.id, self.kind, self.state, json.dumps(self.payload), json.dumps(self.checkpoint),
+            self.channel_id, self.message_id, self.created, self.error, self.owner
+        )
+
+
+class JobManager:
+    def __init__(self, bot, path, owner=0, report_interval=5.0, keep_finished=86400.0):
+        self.bot = bot
+        self.path = path
+        self.owner = owner  # cluster id của tiến trình này (0 khi chạy một tiến trình)
+        self.report_interval = report_interval
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self._targets = []  # (job_id, guild_id, kết quả, lý do) chưa ghi xuống đĩa
+        self._handlers = {}  # kind -> (run(job), render(job) -> discord.Embed)
+
+    def register(self, kind, run, render):
+        """Đăng ký cách chạy và cách hiển thị tiến độ của một loại job (cog gọi lại khi reload)."""
+        self._handlers[kind] = (run, render)
+
+    @property
+    def running(self):
+        return [job for job in self.jobs.values() if not job.finished]
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, state TEXT NOT NULL, '
+            'payload TEXT NOT NULL, checkpoint TEXT NOT NULL, channel_id INTEGER, message_id INTEGER, '
+            'created REAL NOT NULL, error TEXT, owner INTEGER NOT NULL)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS job_targets (job_id TEXT NOT NULL, guild_id INTEGER NOT NULL, '
+            'outcome TEXT NOT NULL, reason TEXT, PRIMARY KEY (job_id, guild_id)) WITHOUT ROWID'
+        )
+        return connection
+
+    def _load(self):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM jobs WHERE state != 'running' AND created < ?", (time.time() - self.keep_finished,)
+                )
+                connection.execute(
+                    "DELETE FROM job_targets WHERE job_id NOT IN (SELECT id FROM jobs WHERE state = 'running')"
+                )
+            return connection.execute(
+                'SELECT id, kind, payload, channel_id, message_id, checkpoint, state, created, error FROM jobs '
+                'WHERE owner = ?', (self.owner,)
+            ).fetchall()
+        finally:
+            connection.close()
+
+    def _save(self, rows):
+        connection = self._connect()
+        try:
+            with connection:
+                # Không ghi đè dòng của cluster khác nếu trùng mã job
+                connection.executemany(
+                    'INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET '
+                    'state = excluded.state, checkpoint = excluded.checkpoint, message_id = excluded.message_id, '
+                    'error = excluded.error WHERE jobs.owner = excluded.owner',
+                    rows
+                )
+        finally:
+            connection.close()
+
+    def _save_targets(self, rows):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany('INSERT OR IGNORE INTO job_targets VALUES (?, ?, ?, ?)', rows)
+        finally:
+            connection.close()
+
+    def _load_targets(self, job_id):
+        connection = self._connect()
+        try:
+            return [
+                list(row) for row in
+                connection.execute('SELECT guild_id, outcome, reason FROM job_targets WHERE job_id = ?', (job_id,))
+            ]
+        finally:
+            connection.close()
+
+    def add_target(self, job_id, guild_id, outcome, reason):
+        """Ghi nhận một server đã xử lý trong job (kể cả job do cluster khác điều phối), ghi ở lần flush sau."""
+        self._targets.append((job_id, guild_id, outcome, reason))
+
+    async def flush_targets(self):
+        rows, self._targets = self._targets, []
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._save_targets, rows)
+        except sqlite3.Error:
+            logger.exception('Không lưu được danh sách server đã xử lý của job, sẽ thử lại')
+            self._targets = rows + self._targets
+
+    async def load_targets(self, job_id):
+        """Các server đã xử lý của job đã ghi xuống đĩa: list ``[guild_id, kết quả, lý do]``."""
+        return await asyncio.to_thread(self._load_targets, job_id)
+
+    async def _persist(self, job):
+        try:
+            await asyncio.to_thread(self._save, [job.to_row()])
+        except sqlite3.Error:
+            logger.exception('Không lưu được checkpoint của job %s', job.id)
+
+    async def load(self):
+        """Nạp job của cluster này từ đĩa và chạy tiếp các job còn dang dở."""
+        for row in await asyncio.to_thread(self._load):
+            job_id, kind, payload, channel_id, message_id, checkpoint, state, created, error = row
+            job = Job(job_id, kind, json.loads(payload), channel_id, message_id, json.loads(checkpoint), state, created, error,
+                      self.owner)
+            self.jobs[job.id] = job
+            if not job.finished:
+                logger.info('Chạy tiếp job %s (%s) từ checkpoint', job.id, job.kind)
+                self._start(job)
+
+    async def submit(self, kind, payload, send):
+        """Tạo job, gửi tin nhắn trạng thái bằng ``send`` (thường là ``ctx.send``) rồi chạy job trên task riêng.
+
+        Dùng ``ctx.send`` để slash command cũng được trả lời bằng chính tin nhắn trạng thái.
+        """
+        job = Job(uuid.uuid4().hex[:6], kind, payload, None, owner=self.owner)
+        _, render = self._handlers[kind]
+        message = await send(embed=render(job))
+        job.channel_id = message.channel.id
+        job.message_id = message.id
+        job.last_report = time.monotonic()
+        self.jobs[job.id] = job
+        await self._persist(job)
+        self._start(job)
+        return job
+
+    def _start(self, job):
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job):
+        await self.bot.wait_until_ready()
+        try:
+            if job.kind not in self._handlers:
+                raise LookupError(f'không có handler cho job {job.kind}')
+            run, _ = self._handlers[job.kind]
+            await run(job)
+            job.state = 'done'
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                # Bot đang tắt: giữ trạng thái running để chạy tiếp lần sau (flush_sync lưu checkpoint)
+                raise
+            job.state = 'cancelled'
+        except Exception as e:
+            logger.exception('Job %s (%s) lỗi', job.id, job.kind)
+            job.state = 'failed'
+            job.error = f'{type(e).__name__}: {e}'
+        await self.report(job, force=True)
+
+    async def report(self, job, force=False):
+        """Sửa tin nhắn trạng thái và lưu checkpoint, tối đa mỗi ``report_interval`` giây."""
+        now = time.monotonic()
+        if not force and now - job.last_report < self.report_interval:
+            return
+        job.last_report = now
+        await self._persist(job)
+
+        if job.channel_id is None or job.message_id is None or job.kind not in self._handlers:
+            return
+        # Kênh DM thường không có trong cache, sửa tin nhắn chỉ cần ID kênh
+        channel = self.bot.get_channel(job.channel_id) or self.bot.get_partial_messageable(job.channel_id)
+        _, render = self._handlers[job.kind]
+        try:
+            await channel.get_partial_message(job.message_id).edit(embed=render(job))
+        except discord.HTTPException as e:
+            logger.warning('Không sửa được tin nhắn trạng thái của job %s: %s', job.id, e)
+
+    def cancel(self, job_id):
+        """Hủy job đang chạy, trả về job hoặc None nếu không có job đang chạy với mã này."""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return None
+        job.cancel_requested = True
+        job.task.cancel()
+        return job
+
+    def flush_sync(self):
+        """Lưu checkpoint các job của cluster này và server đã xử lý khi tắt bot (sau khi event loop đã dừng)."""
+        rows = [job.to_row() for job in self.jobs.values() if job.owner == self.owner]
+        if rows:
+            self._save(rows)
+        targets, self._targets = self._targets, []
+        if targets:
+            self._save_targets(targets)
@@ -0,0 +1,120 @@
+"""Pipeline logging không chặn event loop.
+
+Mọi handler ghi file/console chạy trên một thread listener riêng; event loop
+chỉ đẩy record vào một queue có giới hạn. Khi queue gần đầy, record mức thấp
+(dưới WARNING) bị lấy mẫu; khi queue đầy, record bị bỏ và được đếm lại, để
+logging không bao giờ làm nghẽn loop.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from collections import Counter
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Mỗi record là một dòng JSON."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Record đi qua DroppingQueueHandler chỉ còn traceback dạng chuỗi
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = record.stack_info
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue, high_water=0.8, sample_rate=10):
+        super().__init__(log_queue)
+        self.high_water = int(log_queue.maxsize * high_water) if log_queue.maxsize > 0 else 0
+        self.sample_rate = sample_rate
+        self.dropped = Counter()
+        self._sampled = 0
+
+    def prepare(self, record):
+        # QueueHandler gốc gộp traceback vào message và xóa exc_text; ở đây chỉ gộp
+        # args, giữ traceback dạng chuỗi để formatter bên listener (JSON) tách riêng
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+    def enqueue(self, record):
+        low_priority = record.levelno < logging.WARNING
+        if low_priority and self.high_water and self.queue.qsize() >= self.high_water:
+            # Queue sắp đầy: chỉ giữ 1/sample_rate record mức thấp
+            self._sampled += 1
+            if self._sampled % self.sample_rate:
+                self.dropped[record.levelname] += 1
+                return
+        try:
+            if self.dropped and not low_priority:
+                self._report_dropped()
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped[record.levelname] += 1
+
+    def _report_dropped(self):
+        total = sum(self.dropped.values())
+        summary = ', '.join(f'{level}={count}' for level, count in self.dropped.items())
+        notice = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            'Queue log đầy, đã bỏ %s record (%s)', (total, summary), None
+        )
+        self.queue.put_nowait(self.prepare(notice))
+        self.dropped.clear()
+
+
+def start_logging(path='bot.log', level=logging.INFO, fmt=None, max_bytes=10 * 1024 * 1024,
+                  backup_count=5, when=None, json_lines=False, queue_size=10000):
+    """Gắn QueueHandler vào root logger và khởi động thread listener.
+
+    ``when`` (ví dụ ``'midnight'``) chọn xoay file theo thời gian; nếu bỏ
+    trống thì xoay theo kích thước ``max_bytes``.
+    """
+    fmt = fmt or '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+    if when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(fmt))
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(fmt))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler, listener
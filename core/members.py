@@ -0,0 +1,88 @@
+"""Cache member theo yêu cầu (lazy) thay vì chunk mọi guild khi khởi động.
+
+Ở chế độ ``lazy`` bot không chunk guild lúc READY. Khi một lệnh thật sự cần
+danh sách member đầy đủ, guild được chunk một lần (các lệnh gọi đồng thời dùng
+chung một request). Chỉ ``max_guilds`` guild dùng gần nhất được giữ member
+trong cache; guild ít dùng nhất bị xóa member khỏi cache theo LRU.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+MODES = ('full', 'lazy')
+
+
+class LazyMemberCache:
+    def __init__(self, bot, mode='full', max_guilds=100, on_chunked=None):
+        if mode not in MODES:
+            raise ValueError(f'MEMBER_CACHE_MODE phải là một trong {MODES}, nhận được {mode!r}')
+        self.bot = bot
+        self.mode = mode
+        self.max_guilds = max_guilds
+        self.on_chunked = on_chunked
+        self._recent = OrderedDict()  # guild_id -> None, theo thứ tự dùng gần nhất
+        self._chunking = {}
+        self.evictions = 0
+
+    @property
+    def lazy(self):
+        return self.mode == 'lazy'
+
+    @property
+    def chunk_at_startup(self):
+        return not self.lazy
+
+    def touch(self, guild):
+        """Đánh dấu guild vừa được dùng để không bị evict sớm."""
+        if not self.lazy or guild is None:
+            return
+        self._recent[guild.id] = None
+        self._recent.move_to_end(guild.id)
+        self._evict()
+
+    async def ensure_chunked(self, guild):
+        """Đảm bảo guild có đủ member trong cache trước khi dùng ``guild.members``."""
+        if guild is None:
+            return
+        self.touch(guild)
+        if guild.chunked:
+            return
+
+        task = self._chunking.get(guild.id)
+        if task is None:
+            task = asyncio.ensure_future(self._chunk(guild))
+            self._chunking[guild.id] = task
+            task.add_done_callback(lambda _: self._chunking.pop(guild.id, None))
+        await asyncio.shield(task)
+
+    async def _chunk(self, guild):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await guild.chunk(cache=True)
+        logger.info('Đã chunk %s (%s member) trong %.2fs', guild.id, len(guild.members), loop.time() - started)
+        if self.on_chunked is not None:
+            self.on_chunked(guild)
+
+    def forget(self, guild_id):
+        self._recent.pop(guild_id, None)
+
+    def _evict(self):
+        # Guild đang chunk được giữ lại trong LRU (member vừa nạp sẽ được dùng ngay),
+        # xóa guild cũ kế tiếp thay thế; nếu chỉ còn guild đang chunk thì tạm vượt giới hạn
+        excess = len(self._recent) - self.max_guilds
+        if excess <= 0:
+            return
+        victims = list(islice((guild_id for guild_id in self._recent if guild_id not in self._chunking), excess))
+        me_id = self.bot.user.id if self.bot.user else None
+        for guild_id in victims:
+            del self._recent[guild_id]
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            for member_id in [m for m in guild._members if m != me_id]:
+                guild._members.pop(member_id, None)
+            self.evictions += 1
+            logger.debug('Đã xóa cache member của guild %s', guild_id)
@@ -0,0 +1,145 @@
+"""Đo bộ nhớ của tiến trình bot: RSS, kích thước cache gateway và snapshot tracemalloc."""
+import os
+import resource
+import sys
+import sysconfig
+import time
+import tracemalloc
+from collections import OrderedDict
+
+
+def rss_bytes():
+    """RSS hiện tại (đọc từ /proc trên Linux, nếu không có thì dùng đỉnh RSS)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS trả về byte, Linux trả về KiB
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(size) < 1024 or unit == 'GiB':
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{size} B'
+        size /= 1024
+
+
+def cache_sizes(bot):
+    """Đếm đối tượng trong cache gateway (theo guild và tổng) mà không tạo bản sao danh sách."""
+    state = bot._connection
+    guilds = [
+        (guild, len(guild._members), len(guild._channels), len(guild._roles), len(guild.emojis))
+        for guild in bot.guilds
+    ]
+    guilds.sort(key=lambda row: row[1], reverse=True)
+    return {
+        'guilds': guilds,
+        'members': sum(row[1] for row in guilds),
+        'channels': sum(row[2] for row in guilds),
+        'roles': sum(row[3] for row in guilds),
+        'emojis': sum(row[4] for row in guilds),
+        'users': len(state._users),
+        'messages': len(state._messages) if state._messages is not None else 0,
+        'max_messages': state.max_messages or 0,
+    }
+
+
+_STDLIB = sysconfig.get_paths()['stdlib']
+
+# Frame của chính tracemalloc/importlib chỉ làm nhiễu kết quả
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class AllocationTracer:
+    """Chụp snapshot tracemalloc theo yêu cầu và so sánh hai snapshot để tìm rò rỉ.
+
+    tracemalloc làm chậm mọi lần cấp phát nên chỉ bật khi owner yêu cầu; chỉ giữ
+    ``keep`` snapshot gần nhất vì mỗi snapshot tốn khá nhiều bộ nhớ.
+    """
+
+    def __init__(self, frames=10, keep=4):
+        self.frames = frames
+        self.keep = keep
+        self.snapshots = OrderedDict()  # số thứ tự -> (thời điểm, snapshot)
+        self._next_id = 1
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(self.frames)
+        return True
+
+    def stop(self):
+        self.snapshots.clear()
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        return True
+
+    def traced(self):
+        """(hiện tại, đỉnh) số byte do tracemalloc theo dõi."""
+        return tracemalloc.get_traced_memory()
+
+    def take(self):
+        """Chụp snapshot mới (gọi trên thread riêng), trả về số thứ tự của nó."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self.snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(self.snapshots) > self.keep:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(self, snapshot_id, limit=25):
+        _, snapshot = self.snapshots[snapshot_id]
+        stats = snapshot.statistics('lineno')
+        lines = [
+            f'{format_bytes(stat.size):>12} {stat.count:>8} khối  {_where(stat.traceback)}'
+            for stat in stats[:limit]
+        ]
+        total = sum(stat.size for stat in stats)
+        return lines, total
+
+    def diff(self, old_id, new_id, limit=25):
+        _, old = self.snapshots[old_id]
+        _, new = self.snapshots[new_id]
+        stats = new.compare_to(old, 'lineno')
+        lines = [
+            f'{_signed(stat.size_diff):>13} {stat.count_diff:>+8} khối  {_where(stat.traceback)}'
+            for stat in stats[:limit]
+            if stat.size_diff or stat.count_diff
+        ]
+        total = sum(stat.size_diff for stat in stats)
+        return lines, total
+
+
+def _where(traceback):
+    frame = traceback[0]
+    return f'{_short_path(frame.filename)}:{frame.lineno}'
+
+
+def _short_path(filename):
+    # Đường dẫn tương đối với thư mục bot, thư viện chuẩn hoặc site-packages cho dễ đọc trong embed
+    for root in (os.getcwd(), _STDLIB):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    marker = os.sep + 'site-packages' + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return filename
+
+
+def _signed(size):
+    return ('+' if size >= 0 else '-') + format_bytes(abs(size))
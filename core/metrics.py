@@ -0,0 +1,146 @@
+"""Số liệu độ trễ/lưu lượng theo từng lệnh.
+
+Mỗi lệnh có số lần gọi, số lỗi, histogram độ trễ (bucket kiểu Prometheus và
+một reservoir mẫu gần nhất để tính p50/p95/p99) và tổng thời gian chờ HTTP
+của Discord trong lúc lệnh chạy.
+"""
+import bisect
+import contextvars
+import time
+from collections import deque
+
+from aiohttp import web
+
+# Bucket độ trễ (giây), theo kiểu Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Thời gian HTTP cộng dồn của lệnh đang chạy trong task hiện tại
+_http_time = contextvars.ContextVar('command_http_time', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'samples')
+
+    def __init__(self, buckets=LATENCY_BUCKETS, reservoir=2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=reservoir)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CommandStats:
+    __slots__ = ('calls', 'errors', 'latency', 'http_seconds', 'http_calls')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.http_seconds = 0.0
+        self.http_calls = 0
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.commands = {}
+
+    def get(self, name):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+
+    def start(self):
+        """Gọi trong before_invoke; trả về token để truyền vào ``finish``."""
+        accumulator = [0.0, 0]
+        _http_time.set(accumulator)
+        return time.perf_counter(), accumulator
+
+    def finish(self, name, token, failed):
+        started, accumulator = token
+        stats = self.get(name)
+        stats.calls += 1
+        if failed:
+            stats.errors += 1
+        stats.latency.observe(time.perf_counter() - started)
+        stats.http_seconds += accumulator[0]
+        stats.http_calls += accumulator[1]
+
+    def instrument_http(self, http):
+        """Bọc ``HTTPClient.request`` để đo thời gian chờ Discord trong mỗi lệnh."""
+        original = http.request
+
+        async def request(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                accumulator = _http_time.get()
+                if accumulator is not None:
+                    accumulator[0] += time.perf_counter() - started
+                    accumulator[1] += 1
+
+        http.request = request
+
+    def top(self, limit=10):
+        return sorted(self.commands.items(), key=lambda item: item[1].calls, reverse=True)[:limit]
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP bot_command_calls_total Số lần gọi lệnh.',
+            '# TYPE bot_command_calls_total counter',
+        ]
+        for name, stats in self.commands.items():
+            lines.append(f'bot_command_calls_total{{command="{name}"}} {stats.calls}')
+        lines += [
+            '# HELP bot_command_errors_total Số lần lệnh lỗi.',
+            '# TYPE bot_command_errors_total counter',
+        ]
+        for name, stats in self.commands.items():
+            lines.append(f'bot_command_errors_total{{command="{name}"}} {stats.errors}')
+        lines += [
+            '# HELP bot_command_http_seconds_total Thời gian chờ HTTP Discord trong lệnh.',
+            '# TYPE bot_command_http_seconds_total counter',
+        ]
+        for name, stats in self.commands.items():
+            lines.append(f'bot_command_http_seconds_total{{command="{name}"}} {stats.http_seconds:.6f}')
+        lines += [
+            '# HELP bot_command_latency_seconds Độ trễ xử lý lệnh.',
+            '# TYPE bot_command_latency_seconds histogram',
+        ]
+        for name, stats in self.commands.items():
+            histogram = stats.latency
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'bot_command_latency_seconds_bucket{{command="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'bot_command_latency_seconds_bucket{{command="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'bot_command_latency_seconds_sum{{command="{name}"}} {histogram.sum:.6f}')
+            lines.append(f'bot_command_latency_seconds_count{{command="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(render, host='127.0.0.1', port=9090):
+    """Chạy endpoint ``/metrics`` dạng text Prometheus; ``render()`` trả về nội dung."""
+    async def handle(request):
+        return web.Response(text=render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
@@ -0,0 +1,60 @@
+"""View phân trang bằng nút bấm; mỗi trang chỉ được dựng khi được yêu cầu."""
+import discord
+
+
+class Paginator(discord.ui.View):
+    def __init__(self, render, page_count, owner_id, timeout=180.0):
+        super().__init__(timeout=timeout)
+        self.render = render
+        self.page_count = max(page_count, 1)
+        self.owner_id = owner_id
+        self.page = 0
+        self.message = None
+        self._sync_buttons()
+
+    async def start(self, ctx):
+        embed = self.render(self.page)
+        if self.page_count == 1:
+            self.message = await ctx.send(embed=embed)
+            self.stop()
+        else:
+            self.message = await ctx.send(embed=embed, view=self)
+        return self.message
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Bạn không có quyền sử dụng lệnh này!", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+    def _sync_buttons(self):
+        self.first.disabled = self.previous.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= self.page_count - 1
+
+    async def _show(self, interaction, page):
+        self.page = min(max(page, 0), self.page_count - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(self.page), view=self)
+
+    @discord.ui.button(emoji="⏮️", style=discord.ButtonStyle.secondary)
+    async def first(self, interaction, button):
+        await self._show(interaction, 0)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.primary)
+    async def previous(self, interaction, button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.primary)
+    async def next(self, interaction, button):
+        await self._show(interaction, self.page + 1)
+
+    @discord.ui.button(emoji="⏭️", style=discord.ButtonStyle.secondary)
+    async def last(self, interaction, button):
+        await self._show(interaction, self.page_count - 1)
@@ -0,0 +1,88 @@
+"""Cập nhật presence (trạng thái hiển thị) của bot theo kiểu debounce.
+
+Các sự kiện làm presence thay đổi (join/rời server, đổi prefix, READY) chỉ đánh
+dấu "cần cập nhật". Một task duy nhất gom các lần đánh dấu đó và gửi tối đa một
+lần mỗi ``min_interval`` giây để nằm trong giới hạn đổi presence của Discord.
+Presence do owner đặt bằng lệnh ``status`` được giữ nguyên cho tới khi bỏ.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceUpdater:
+    def __init__(self, bot, render, min_interval=20.0):
+        self.bot = bot
+        self.render = render  # async () -> discord.BaseActivity, dựng presence tự động
+        self.min_interval = min_interval
+        self.override = None
+        self._dirty = False
+        self._task = None
+        self._last_update = None
+        self._sent = None  # dict của activity đã gửi lần cuối
+        self.updates = 0
+        self.coalesced = 0
+
+    def mark_dirty(self):
+        """Báo presence cần dựng lại; nhiều lần gọi gần nhau chỉ dẫn tới một lần gửi."""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        else:
+            self.coalesced += 1
+
+    def set_override(self, activity):
+        """Đặt presence cố định (lệnh status); các lần đánh dấu sau đó không ghi đè lên nó."""
+        self.override = activity
+        self.mark_dirty()
+
+    def is_showing(self, activity):
+        """``activity`` có đúng là presence đã gửi lần cuối không (khi đó sẽ không gửi lại)."""
+        return activity.to_dict() == self._sent
+
+    def next_update_in(self):
+        """Số giây tới khi được gửi presence tiếp theo (0 nếu gửi được ngay)."""
+        if self._last_update is None:
+            return 0.0
+        return max(self._last_update + self.min_interval - asyncio.get_running_loop().time(), 0.0)
+
+    def clear_override(self):
+        self.override = None
+        self.mark_dirty()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            if self._last_update is not None:
+                delay = self._last_update + self.min_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._dirty = False
+
+            activity = self.override if self.override is not None else await self.render()
+            data = activity.to_dict() if activity is not None else None
+            if data == self._sent:
+                continue
+
+            self._last_update = loop.time()
+            try:
+                await self.bot.change_presence(activity=activity)
+            except Exception as e:
+                logger.warning(f'⚠️ Không cập nhật được presence: {e}')
+                continue
+            self._sent = data
+            self.updates += 1
+            # IDENTIFY khi kết nối lại dùng presence này, nên không cần gửi lại sau mỗi lần reconnect
+            self.bot._connection._activity = data
+
+    def render_prometheus(self):
+        return (
+            '# HELP bot_presence_updates_total Số lần gửi presence lên gateway.\n'
+            '# TYPE bot_presence_updates_total counter\n'
+            f'bot_presence_updates_total {self.updates}\n'
+            '# HELP bot_presence_coalesced_total Số lần đánh dấu được gộp vào lần gửi đang chờ.\n'
+            '# TYPE bot_presence_coalesced_total counter\n'
+            f'bot_presence_coalesced_total {self.coalesced}\n'
+        )
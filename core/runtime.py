@@ -0,0 +1,59 @@
+"""Profile runtime: bật các tăng tốc tuỳ chọn trước khi chạy bot.
+
+Profile ``fast`` dùng uvloop làm event loop và bộ decode JSON nhanh (orjson,
+ujson) cho payload gateway/HTTP nếu đã cài; thiếu gói nào thì giữ mặc định của
+asyncio/stdlib. Gateway luôn dùng nén ``zlib-stream`` (discord.py bật sẵn).
+"""
+import asyncio
+import zlib
+
+import yarl
+from discord import utils
+from discord.gateway import DiscordWebSocket
+from discord.http import Route
+
+
+def _install_uvloop():
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return f'uvloop {uvloop.__version__}'
+
+
+def _install_json():
+    # discord.py tự dùng orjson khi import được
+    if utils.HAS_ORJSON:
+        return 'orjson'
+    try:
+        import ujson
+    except ImportError:
+        return None
+    # gateway.py và http.py đều gọi utils._from_json lúc chạy nên thay ở đây là đủ
+    utils._from_json = ujson.loads
+    return 'ujson'
+
+
+def apply_profile(profile):
+    """Cài đặt profile và trả về dict ``{tên tăng tốc: mô tả hoặc None nếu không có}``."""
+    active = {'compression': f'zlib-stream (zlib {zlib.ZLIB_RUNTIME_VERSION})'}
+    if profile == 'fast':
+        active['event loop'] = _install_uvloop()
+        active['json'] = _install_json()
+    elif utils.HAS_ORJSON:
+        active['json'] = 'orjson'
+    return active
+
+
+def describe(active):
+    return ', '.join(f'{name}: {value or "mặc định"}' for name, value in active.items())
+
+
+def use_endpoints(api_base, gateway_url):
+    """Trỏ REST và gateway tới server khác (ví dụ Discord giả lập khi load test)."""
+    if api_base:
+        Route.BASE = api_base.rstrip('/')
+    if gateway_url:
+        # Client không sharding luôn kết nối DEFAULT_GATEWAY, chỉ khi resume mới dùng URL trong READY
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(gateway_url)
@@ -0,0 +1,53 @@
+"""Đồng bộ slash command (application command) với Discord.
+
+Các lệnh là hybrid command: cùng một handler chạy cho cả prefix lẫn slash. Mỗi
+lần sync ghi đè toàn bộ lệnh global và bị giới hạn khá chặt, nên chỉ sync khi
+hash của payload khác với lần sync thành công trước (lưu trong file), và chỉ
+tiến trình chính (không chạy cluster hoặc cluster 0) mới sync.
+"""
+import hashlib
+import json
+import logging
+
+import discord
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+
+def tree_hash(tree, application_id):
+    payload = sorted((command.to_dict() for command in tree.get_commands()), key=lambda c: c['name'])
+    data = json.dumps([application_id, payload], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _read_hash(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+async def sync_app_commands(bot):
+    """Sync cây lệnh nếu đã thay đổi; trả về số lệnh đã sync hoặc None nếu bỏ qua."""
+    if not config.APP_COMMANDS_SYNC:
+        return None
+    if bot.cluster is not None and bot.cluster.cluster_id != 0:
+        return None
+
+    digest = tree_hash(bot.tree, bot.application_id)
+    if digest == _read_hash(config.APP_COMMANDS_HASH_FILE):
+        return None
+
+    try:
+        synced = await bot.tree.sync()
+    except discord.HTTPException:
+        logger.exception('Không sync được slash command, sẽ thử lại ở lần khởi động/reload sau')
+        return None
+
+    with open(config.APP_COMMANDS_HASH_FILE, 'w', encoding='utf-8') as f:
+        f.write(digest)
+    logger.info(f'🔁 Đã sync {len(synced)} slash command')
+    return len(synced)
@@ -0,0 +1,58 @@
+"""Registry embed dựng sẵn cho các lệnh có nội dung tĩnh (help, helpp, env).
+
+Phần tĩnh của mỗi embed được dựng một lần cho mỗi prefix và giữ ở dạng dict đã
+serialize. Mỗi lần gọi lệnh chỉ điền footer/thumbnail/timestamp.
+"""
+from collections import OrderedDict
+
+import discord
+
+
+class EmbedTemplates:
+    def __init__(self, max_prefixes=256):
+        self._builders = {}
+        self.max_prefixes = max_prefixes
+        # (prefix mặc định, {(tên, prefix): dict}) được thay thế cùng lúc khi rebuild
+        self._state = (None, OrderedDict())
+
+    def register(self, name):
+        """Decorator đăng ký hàm ``builder(prefix) -> discord.Embed``."""
+        def decorator(builder):
+            self._builders[name] = builder
+            return builder
+        return decorator
+
+    def rebuild(self, default_prefix):
+        """Dựng lại toàn bộ template rồi thay thế một lần, không để lộ trạng thái dở dang."""
+        compiled = OrderedDict(
+            ((name, default_prefix), builder(default_prefix).to_dict())
+            for name, builder in self._builders.items()
+        )
+        self._state = (default_prefix, compiled)
+
+    def _compiled(self, name, prefix):
+        default_prefix, compiled = self._state
+        key = (name, prefix or default_prefix)
+        data = compiled.get(key)
+        if data is None:
+            # Prefix riêng của server: dựng lần đầu rồi giữ lại, giới hạn theo LRU
+            data = compiled[key] = self._builders[name](key[1]).to_dict()
+            while len(compiled) > self.max_prefixes:
+                compiled.popitem(last=False)
+        else:
+            compiled.move_to_end(key)
+        return data
+
+    def render(self, name, *, prefix=None, footer=None, footer_icon=None, thumbnail=None, timestamp=False):
+        data = self._compiled(name, prefix)
+        embed = discord.Embed.from_dict(data)
+        # from_dict giữ tham chiếu tới list fields của template, nên sao chép để add_field không làm hỏng template
+        if 'fields' in data:
+            embed._fields = list(data['fields'])
+        if footer is not None:
+            embed.set_footer(text=footer, icon_url=footer_icon)
+        if thumbnail is not None:
+            embed.set_thumbnail(url=thumbnail)
+        if timestamp:
+            embed.timestamp = discord.utils.utcnow()
+        return embed
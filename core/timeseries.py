@@ -0,0 +1,213 @@
+"""Lưu lịch sử số liệu (ping, số server/thành viên, lệnh/phút, độ trễ event loop) trong SQLite.
+
+Mỗi lần lấy mẫu, giá trị được cộng dồn vào bucket của từng tầng lưu trữ (1 phút,
+15 phút, 1 giờ) ngay trong bộ nhớ. Chỉ bucket đã đóng mới được ghi xuống đĩa,
+theo lô trên thread riêng, và mỗi tầng tự xóa dữ liệu quá hạn. Xu hướng 1h/24h/7d
+đọc từ tầng phù hợp nên không phải quét toàn bộ mẫu thô.
+
+Khi chạy cluster mọi tiến trình ghi chung một file, mỗi dòng mang ``cluster`` của
+tiến trình ghi. Lúc đọc, các số liệu đếm (server, thành viên, lệnh/phút) được
+cộng qua các cluster, còn lại (ping, độ trễ) lấy trung bình theo số mẫu. Bucket
+đang mở được ghi khi tắt bot cùng số mẫu của nó, và bucket cùng mốc thời gian
+sau khi khởi động lại được gộp vào thay vì ghi đè.
+"""
+import asyncio
+import logging
+import math
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# (độ phân giải, thời gian giữ) tính bằng giây
+TIERS = (
+    (60, 2 * 86400),
+    (900, 14 * 86400),
+    (3600, 90 * 86400),
+)
+
+# Cửa sổ xu hướng -> tầng đọc
+WINDOWS = {'1h': (3600, 0), '24h': (86400, 1), '7d': (7 * 86400, 2)}
+
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS metric_buckets '
+    '(tier INTEGER NOT NULL, ts INTEGER NOT NULL, metric TEXT NOT NULL, cluster INTEGER NOT NULL, '
+    'avg REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL, count INTEGER NOT NULL, '
+    'PRIMARY KEY (tier, ts, metric, cluster)) WITHOUT ROWID'
+)
+
+# Gộp với bucket đã có cùng mốc (bucket dở dang ghi lúc tắt bot + phần còn lại sau khi khởi động lại)
+UPSERT = (
+    'INSERT INTO metric_buckets VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT (tier, ts, metric, cluster) DO UPDATE SET '
+    'avg = (avg * count + excluded.avg * excluded.count) / (count + excluded.count), '
+    'min = MIN(min, excluded.min), max = MAX(max, excluded.max), count = count + excluded.count'
+)
+
+
+class _Bucket:
+    __slots__ = ('start', 'total', 'count', 'low', 'high')
+
+    def __init__(self, start):
+        self.start = start
+        self.total = 0.0
+        self.count = 0
+        self.low = math.inf
+        self.high = -math.inf
+
+    def add(self, value):
+        self.total += value
+        self.count += 1
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    def row(self, tier, metric, cluster):
+        return (tier, self.start, metric, cluster, self.total / self.count, self.low, self.high, self.count)
+
+
+def _combine(rows, summed=False):
+    """Gộp nhiều dòng (avg, min, max, số mẫu) của cùng một mốc: cộng dồn hoặc trung bình theo số mẫu."""
+    count = sum(row[3] for row in rows)
+    if summed:
+        return sum(row[0] for row in rows), sum(row[1] for row in rows), sum(row[2] for row in rows), count
+    return sum(row[0] * row[3] for row in rows) / count, min(row[1] for row in rows), max(row[2] for row in rows), count
+
+
+class TimeSeriesStore:
+    def __init__(self, path, sample, cluster=0, summed=(), interval=60.0, flush_interval=300.0):
+        self.path = path
+        self.sample = sample  # () -> {tên số liệu: giá trị}
+        self.cluster = cluster  # cluster id của tiến trình này (0 khi chạy một tiến trình)
+        self.summed = frozenset(summed)  # số liệu cộng qua các cluster thay vì lấy trung bình
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self._buckets = {}  # (tier, metric) -> _Bucket đang mở
+        self._pending = []
+        self._task = None
+
+    def record(self, values, now=None):
+        now = time.time() if now is None else now
+        for metric, value in values.items():
+            if value is None or not math.isfinite(value):
+                continue
+            for tier, (resolution, _) in enumerate(TIERS):
+                start = int(now // resolution * resolution)
+                bucket = self._buckets.get((tier, metric))
+                if bucket is None or bucket.start != start:
+                    if bucket is not None:
+                        self._pending.append(bucket.row(tier, metric, self.cluster))
+                    bucket = self._buckets[(tier, metric)] = _Bucket(start)
+                bucket.add(value)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute(SCHEMA)
+        return connection
+
+    def _write(self, rows, now):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(UPSERT, rows)
+                for tier, (_, retention) in enumerate(TIERS):
+                    connection.execute('DELETE FROM metric_buckets WHERE tier = ? AND ts < ?', (tier, now - retention))
+        finally:
+            connection.close()
+
+    def _query(self, ranges):
+        connection = self._connect()
+        try:
+            return [
+                connection.execute(
+                    'SELECT tier, ts, metric, cluster, avg, min, max, count FROM metric_buckets '
+                    'WHERE tier = ? AND ts >= ?',
+                    (tier, since)
+                ).fetchall()
+                for tier, since in ranges
+            ]
+        finally:
+            connection.close()
+
+    async def trends(self, windows):
+        """Tóm tắt mọi số liệu theo từng cửa sổ (``'1h'``/``'24h'``/``'7d'``).
+
+        Trả về ``{cửa sổ: {metric: {avg, min, max, first, last}}}``.
+        """
+        now = time.time()
+        tiers = [WINDOWS[window][1] for window in windows]
+        results = await asyncio.to_thread(self._query, [(WINDOWS[w][1], now - WINDOWS[w][0]) for w in windows])
+
+        trends = {}
+        for window, tier, rows in zip(windows, tiers, results):
+            # Bucket chưa được ghi xuống đĩa của tiến trình này (đã đóng hoặc đang mở), gộp như khi ghi
+            local = [row for row in self._pending if row[0] == tier]
+            local += [bucket.row(tier, metric, self.cluster) for (t, metric), bucket in self._buckets.items() if t == tier]
+            merged = {tuple(row[1:4]): row[4:] for row in rows}
+            for row in local:
+                key, value = tuple(row[1:4]), row[4:]
+                previous = merged.get(key)
+                merged[key] = value if previous is None else _combine([previous, value])
+
+            # (mốc, số liệu) -> dòng của từng cluster
+            by_point = {}
+            for (ts, metric, _), row in merged.items():
+                by_point.setdefault((ts, metric), []).append(row)
+            # Cluster khác chỉ ghi bucket khi đóng: mốc gần đây chưa đủ cluster thì bỏ qua với số liệu cộng dồn
+            clusters = max(map(len, by_point.values()), default=0)
+
+            series = {}
+            for (ts, metric), metric_rows in sorted(by_point.items()):
+                summed = metric in self.summed
+                if summed and len(metric_rows) < clusters:
+                    continue
+                series.setdefault(metric, []).append(_combine(metric_rows, summed))
+            trends[window] = {
+                metric: {
+                    'avg': sum(p[0] for p in points) / len(points),
+                    'min': min(p[1] for p in points),
+                    'max': max(p[2] for p in points),
+                    'first': points[0][0],
+                    'last': points[-1][0],
+                }
+                for metric, points in series.items()
+            }
+        return trends
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                values = self.sample()
+            except Exception:
+                logger.exception('Không lấy được mẫu số liệu')
+                continue
+            self.record(values)
+            if loop.time() - last_flush >= self.flush_interval:
+                last_flush = loop.time()
+                await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write, rows, time.time())
+        except sqlite3.Error:
+            logger.exception('Không ghi được lịch sử số liệu xuống %s, sẽ thử lại', self.path)
+            self._pending = rows + self._pending
+
+    def flush_sync(self):
+        """Ghi cả bucket đang mở khi tắt bot (sau khi event loop đã dừng); lần khởi động sau gộp tiếp vào đó."""
+        rows = self._pending + [
+            bucket.row(tier, metric, self.cluster) for (tier, metric), bucket in self._buckets.items()
+        ]
+        self._pending = []
+        if rows:
+            self._write(rows, time.time())
@@ -0,0 +1,129 @@
+"""Đo độ trễ event loop liên tục và bắt stack khi loop bị chặn.
+
+Một callback tự lên lịch lại mỗi ``interval`` giây trên event loop và ghi lại
+nó chạy trễ bao lâu so với lịch (độ trễ loop, khác với ``bot.latency`` là ping
+gateway). Một thread riêng theo dõi lần "đập" cuối của callback: khi loop đứng
+quá ``threshold`` giây, thread đó chụp stack của thread event loop và ghi log
+kèm tên task đang chạy (lệnh hoặc event handler), ngay cả khi loop chưa trả lại
+quyền điều khiển.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Bucket độ trễ loop (giây)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LoopWatchdog:
+    def __init__(self, interval=0.1, threshold=0.25, stack_limit=15):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.lag = Histogram(LAG_BUCKETS)
+        self.stalls = 0
+        self.last_stall = None  # (thời điểm, số giây bị chặn, nhãn)
+        self._window_max = 0.0
+        self._labels = weakref.WeakKeyDictionary()  # task -> nhãn (ví dụ "lệnh stats")
+        self._loop = None
+        self._thread_id = None
+        self._beat = 0.0
+        self._expected = 0.0
+        self._captured = None
+
+    def start(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._expected = self._beat + self.interval
+        self._loop.call_later(self.interval, self._tick)
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+
+    def label(self, text):
+        """Gắn nhãn cho task hiện tại để log biết lệnh nào đang chạy khi loop bị chặn."""
+        task = asyncio.current_task()
+        if task is not None:
+            self._labels[task] = text
+
+    def unlabel(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._labels.pop(task, None)
+
+    def pop_max_lag(self):
+        """Độ trễ lớn nhất kể từ lần gọi trước (giây)."""
+        value, self._window_max = self._window_max, 0.0
+        return value
+
+    def _tick(self):
+        now = time.monotonic()
+        lag = max(now - self._expected, 0.0)
+        self._beat = now
+        self._expected = now + self.interval
+        self._loop.call_later(self.interval, self._tick)
+
+        self.lag.observe(lag)
+        self._window_max = max(self._window_max, lag)
+        if lag >= self.threshold:
+            self.stalls += 1
+            label = self._captured or 'không rõ'
+            self.last_stall = (time.time(), lag, label)
+            logger.warning(f'🐢 Event loop bị chặn {lag * 1000:.0f}ms ({label})')
+        self._captured = None
+
+    def _current_label(self):
+        # Đọc từ thread khác: dict task hiện tại của asyncio chỉ được đọc, không sửa
+        task = asyncio.tasks._current_tasks.get(self._loop)
+        if task is None:
+            return 'callback ngoài task'
+        return self._labels.get(task) or task.get_name()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            stalled = time.monotonic() - self._beat
+            if stalled < self.threshold + self.interval or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            label = self._current_label()
+            self._captured = label
+            stack = ''.join(traceback.format_stack(frame, limit=self.stack_limit)) if frame else ''
+            logger.warning(f'🐢 Event loop đứng {stalled * 1000:.0f}ms trong {label}, stack:\n{stack}')
+
+    def summary(self):
+        return {
+            'p50': self.lag.percentile(0.5),
+            'p99': self.lag.percentile(0.99),
+            'max': max(self.lag.samples, default=0.0),
+            'stalls': self.stalls,
+            'last_stall': self.last_stall,
+        }
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP bot_event_loop_lag_seconds Độ trễ event loop (callback chạy trễ so với lịch).',
+            '# TYPE bot_event_loop_lag_seconds histogram',
+        ]
+        cumulative = 0
+        for bound, count in zip(self.lag.buckets, self.lag.counts):
+            cumulative += count
+            lines.append(f'bot_event_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'bot_event_loop_lag_seconds_bucket{{le="+Inf"}} {self.lag.count}')
+        lines.append(f'bot_event_loop_lag_seconds_sum {self.lag.sum:.6f}')
+        lines.append(f'bot_event_loop_lag_seconds_count {self.lag.count}')
+        lines += [
+            '# HELP bot_event_loop_stalls_total Số lần event loop bị chặn quá ngưỡng.',
+            '# TYPE bot_event_loop_stalls_total counter',
+            f'bot_event_loop_stalls_total {self.stalls}',
+        ]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+from core.cluster import ClusterHub, shard_ranges
+
+# Chạy bot ở chế độ cluster: N tiến trình, mỗi tiến trình sở hữu một dải shard
+load_dotenv()
+
+CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', '2'))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', str(CLUSTER_COUNT)))
+CLUSTER_SOCKET = os.getenv('CLUSTER_SOCKET', 'cluster.sock')
+RESTART_DELAY = 5
+STOP_TIMEOUT = 30  # Giây chờ tiến trình tự tắt (ghi SQLite...) trước khi kill
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('launcher')
+
+
+async def run_cluster(cluster_id, shard_ids, stopping):
+    """Chạy một tiến trình bot và khởi động lại nếu nó thoát do lỗi."""
+    env = dict(
+        os.environ,
+        CLUSTER_ID=str(cluster_id),
+        SHARD_IDS=','.join(map(str, shard_ids)),
+        SHARD_COUNT=str(SHARD_COUNT),
+        CLUSTER_SOCKET=CLUSTER_SOCKET
+    )
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py')
+
+    while not stopping.is_set():
+        logger.info(f'🚀 Khởi động cluster {cluster_id} (shard {shard_ids})')
+        process = await asyncio.create_subprocess_exec(sys.executable, script, env=env)
+        waiter = asyncio.ensure_future(process.wait())
+        stop = asyncio.ensure_future(stopping.wait())
+        await asyncio.wait({waiter, stop}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stop.done():
+            # bot.py bắt SIGTERM và đóng bình thường để ghi nốt cài đặt, số liệu, checkpoint job
+            process.terminate()
+            try:
+                await asyncio.wait_for(waiter, STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f'⚠️ Cluster {cluster_id} không tắt sau {STOP_TIMEOUT}s, buộc dừng')
+                process.kill()
+                await process.wait()
+            return
+        stop.cancel()
+
+        if process.returncode == 0:
+            logger.info(f'✅ Cluster {cluster_id} đã tắt')
+            return
+        logger.warning(f'⚠️ Cluster {cluster_id} thoát với mã {process.returncode}, khởi động lại sau {RESTART_DELAY}s')
+        await asyncio.sleep(RESTART_DELAY)
+
+
+async def main():
+    if os.path.exists(CLUSTER_SOCKET):
+        os.remove(CLUSTER_SOCKET)
+
+    hub = ClusterHub(CLUSTER_SOCKET)
+    await hub.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    ranges = shard_ranges(SHARD_COUNT, CLUSTER_COUNT)
+    try:
+        await asyncio.gather(*(
+            run_cluster(cluster_id, shard_ids, stopping)
+            for cluster_id, shard_ids in enumerate(ranges)
+            if shard_ids
+        ))
+    finally:
+        await hub.close()
+        if os.path.exists(CLUSTER_SOCKET):
+            os.remove(CLUSTER_SOCKET)
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print(f"🧩 Chế độ cluster: {CLUSTER_COUNT} tiến trình, {SHARD_COUNT} shard")
+    print(f"🔌 IPC socket: {CLUSTER_SOCKET}")
+    print("="*50)
+    asyncio.run(main())